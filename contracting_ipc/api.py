@@ -4,12 +4,39 @@ API module for Contracting IPC.
 Contains whitelisted methods that can be called from client-side.
 """
 
+import base64
+import json
+
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.query_builder import Order
+from frappe.utils import cint, flt
+
+from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+    TOTAL_FIELDS,
+    get_project_totals,
+    get_totals_for_projects,
+)
+from contracting_ipc.instrumentation import instrument
+
+# Fields get_pending_ipcs returns, and get_pending_ipcs_page unless the caller picks others
+PENDING_IPC_DEFAULT_FIELDS = ["name", "customer", "project", "net_amount", "period_from", "period_to"]
+
+# Fields a caller of get_pending_ipcs_page may request
+PENDING_IPC_FIELDS = [
+    "name", "customer", "project", "company", "contract", "status", "period_from", "period_to",
+    "total_work_done", "retention_amount", "advance_deduction", "net_amount", "creation", "modified"
+]
+
+# Fields get_pending_ipcs_page can sort by; none can be NULL, which keyset cursors rely on
+PENDING_IPC_SORT_FIELDS = ["creation", "modified", "period_from", "period_to", "net_amount", "name"]
+
+PENDING_IPC_PAGE_LENGTH = 100
+PENDING_IPC_MAX_PAGE_LENGTH = 500
 
 
 @frappe.whitelist()
+@instrument("api.get_project_details")
 def get_project_details(project: str) -> dict:
     """
     Get project details for populating IPC fields.
@@ -23,16 +50,21 @@ def get_project_details(project: str) -> dict:
     if not project:
         return {}
     
-    project_doc = frappe.get_doc("Project", project)
+    project_details = frappe.db.get_value(
+        "Project", project, ["customer", "company", "project_name"], as_dict=True
+    )
+    if not project_details:
+        frappe.throw(_("Project {0} not found").format(project), frappe.DoesNotExistError)
     
     return {
-        "customer": project_doc.customer,
-        "company": project_doc.company,
-        "project_name": project_doc.project_name
+        "customer": project_details.customer,
+        "company": project_details.company,
+        "project_name": project_details.project_name
     }
 
 
 @frappe.whitelist()
+@instrument("api.get_contract_details")
 def get_contract_details(contract: str) -> dict:
     """
     Get contract details for populating IPC fields.
@@ -46,19 +78,30 @@ def get_contract_details(contract: str) -> dict:
     if not contract:
         return {}
     
-    contract_doc = frappe.get_doc("Contract", contract)
+    # contract_value is not a standard Contract field; read it only where it exists
+    fields = ["party_name"]
+    if frappe.get_meta("Contract").has_field("contract_value"):
+        fields.append("contract_value")
+
+    contract_details = frappe.db.get_value("Contract", contract, fields, as_dict=True)
+    if not contract_details:
+        frappe.throw(_("Contract {0} not found").format(contract), frappe.DoesNotExistError)
     
     return {
-        "customer": contract_doc.party_name,
-        "contract_value": flt(contract_doc.contract_value) if hasattr(contract_doc, 'contract_value') else 0
+        "customer": contract_details.party_name,
+        "contract_value": flt(contract_details.get("contract_value"))
     }
 
 
 @frappe.whitelist()
+@instrument("api.get_ipc_totals_by_project")
 def get_ipc_totals_by_project(project: str) -> dict:
     """
     Get cumulative IPC totals for a project.
     
+    Reads the incrementally maintained IPC Project Totals ledger instead
+    of aggregating every submitted IPC.
+
     Args:
         project: Project name
         
@@ -68,9 +111,55 @@ def get_ipc_totals_by_project(project: str) -> dict:
     if not project:
         return {}
     
+    totals = get_project_totals(project)
+    
+    return {
+        "total_work_done": totals.total_work_done,
+        "total_retention": totals.total_retention,
+        "total_advance": totals.total_advance,
+        "total_net": totals.total_net,
+        "ipc_count": totals.ipc_count
+    }
+
+
+@frappe.whitelist()
+@instrument("api.get_ipc_totals_by_projects")
+def get_ipc_totals_by_projects(projects, company: str = None, to_date: str = None) -> dict:
+    """
+    Get cumulative IPC totals for many projects in one call.
+
+    Without a company or date cutoff the totals are read from the IPC
+    Project Totals ledger; otherwise they are aggregated with a single
+    grouped query.
+
+    Args:
+        projects: List of project names (or JSON list)
+        company: Optional company filter
+        to_date: Optional cutoff; only IPCs with period_to on or before it count
+
+    Returns:
+        Dictionary of project -> cumulative totals; projects without IPCs get zeros
+    """
+    projects = frappe.parse_json(projects) if isinstance(projects, str) else projects
+    if not projects:
+        return {}
+
+    projects = list(dict.fromkeys(projects))
+
+    if not company and not to_date:
+        return get_totals_for_projects(projects)
+
+    conditions = ""
+    if company:
+        conditions += " AND company = %(company)s"
+
+    if to_date:
+        conditions += " AND period_to <= %(to_date)s"
+
     totals = frappe.db.sql(
-        """
+        f"""
         SELECT
+            project,
             SUM(total_work_done) as total_work_done,
             SUM(retention_amount) as total_retention,
             SUM(advance_deduction) as total_advance,
@@ -79,36 +168,229 @@ def get_ipc_totals_by_project(project: str) -> dict:
         FROM
             `tabIPC`
         WHERE
-            project = %s
+            project IN %(projects)s
             AND docstatus = 1
+            {conditions}
+        GROUP BY
+            project
         """,
-        project,
+        {"projects": tuple(projects), "company": company, "to_date": to_date},
         as_dict=1
     )
-    
-    if totals:
-        return totals[0]
-    
-    return {
-        "total_work_done": 0,
-        "total_retention": 0,
-        "total_advance": 0,
-        "total_net": 0,
-        "ipc_count": 0
+
+    result = {
+        project: frappe._dict({field: 0 for field in [*TOTAL_FIELDS, "ipc_count"]})
+        for project in projects
     }
+    for row in totals:
+        result[row.pop("project")] = row
+
+    return result
 
 
 @frappe.whitelist()
+@instrument("api.get_pending_ipcs")
 def get_pending_ipcs(customer: str = None, project: str = None) -> list:
     """
     Get list of pending (approved but not invoiced) IPCs.
+
+    Returns every pending IPC in one list; use `get_pending_ipcs_page` to
+    page through a large backlog.
+
+    Args:
+        customer: Optional customer filter
+        project: Optional project filter
+
+    Returns:
+        List of pending IPC documents
+    """
+    return frappe.get_all(
+        "IPC",
+        filters=get_pending_ipc_filters(customer, project),
+        fields=PENDING_IPC_DEFAULT_FIELDS,
+        order_by="creation desc"
+    )
+
+
+@frappe.whitelist()
+@instrument("api.get_pending_ipcs_page")
+def get_pending_ipcs_page(
+    customer: str = None,
+    project: str = None,
+    fields=None,
+    order_by: str = "creation desc",
+    cursor: str = None,
+    page_length: int = PENDING_IPC_PAGE_LENGTH,
+    with_summary=None
+) -> dict:
+    """
+    Get a page of pending (approved but not invoiced) IPCs.
+
+    Pages are cursor based: pass the `next_cursor` of a page to get the
+    one after it. Rows are ordered by the sort field, then by name, so
+    the order is stable while IPCs are invoiced between calls.
     
     Args:
         customer: Optional customer filter
         project: Optional project filter
+        fields: Optional list of fields (or JSON list) from `PENDING_IPC_FIELDS`;
+            name and the sort field are always returned
+        order_by: "<field> asc" or "<field> desc", field from `PENDING_IPC_SORT_FIELDS`
+        cursor: `next_cursor` of the previous page
+        page_length: Number of rows per page, at most `PENDING_IPC_MAX_PAGE_LENGTH`
+        with_summary: Also return the count and net amount of all pending IPCs;
+            defaults to the first page only
         
     Returns:
-        List of pending IPC documents
+        Dictionary with the rows in "data", the "next_cursor" (None on the
+        last page) and, if requested, a "summary" of count and net_amount
+    """
+    fields = get_pending_ipc_fields(fields)
+    sort_field, sort_order = parse_pending_ipc_order(order_by)
+    page_length = cint(page_length) or PENDING_IPC_PAGE_LENGTH
+    if not 0 < page_length <= PENDING_IPC_MAX_PAGE_LENGTH:
+        frappe.throw(
+            _("Page length must be between 1 and {0}").format(PENDING_IPC_MAX_PAGE_LENGTH),
+            title=_("Invalid Page Length")
+        )
+
+    filters = get_pending_ipc_filters(customer, project)
+    for field in (sort_field, "name"):
+        if field not in fields:
+            fields.append(field)
+
+    IPC = frappe.qb.DocType("IPC")
+    order = Order.desc if sort_order == "desc" else Order.asc
+    query = (
+        frappe.qb.get_query("IPC", fields=fields, filters=filters)
+        .orderby(IPC[sort_field], order=order)
+        .orderby(IPC.name, order=order)
+        .limit(page_length + 1)
+    )
+
+    if cursor:
+        cursor_value, cursor_name = decode_pending_ipc_cursor(cursor, sort_field)
+        if sort_order == "desc":
+            query = query.where(
+                (IPC[sort_field] < cursor_value)
+                | ((IPC[sort_field] == cursor_value) & (IPC.name < cursor_name))
+            )
+        else:
+            query = query.where(
+                (IPC[sort_field] > cursor_value)
+                | ((IPC[sort_field] == cursor_value) & (IPC.name > cursor_name))
+            )
+
+    # One row past the page tells whether another page follows
+    data = query.run(as_dict=True)
+    next_cursor = None
+    if len(data) > page_length:
+        data = data[:page_length]
+        next_cursor = encode_pending_ipc_cursor(data[-1], sort_field)
+
+    result = {"data": data, "next_cursor": next_cursor}
+
+    if with_summary is None:
+        with_summary = not cursor
+
+    if cint(with_summary):
+        result["summary"] = get_pending_ipc_summary(filters)
+
+    return result
+
+
+def get_pending_ipc_fields(fields=None) -> list:
+    """
+    Validate the fields requested from `get_pending_ipcs_page`.
+
+    Args:
+        fields: List of field names (or JSON list), None for the defaults
+
+    Returns:
+        List of field names
+    """
+    if not fields:
+        return list(PENDING_IPC_DEFAULT_FIELDS)
+
+    fields = frappe.parse_json(fields) if isinstance(fields, str) else fields
+    invalid = [field for field in fields if field not in PENDING_IPC_FIELDS]
+    if invalid:
+        frappe.throw(
+            _("Fields {0} cannot be requested").format(", ".join(map(str, invalid))),
+            title=_("Invalid Fields")
+        )
+
+    return list(dict.fromkeys(fields))
+
+
+def parse_pending_ipc_order(order_by: str) -> tuple:
+    """Split an "<field> <asc|desc>" sort key, accepting only the sortable fields."""
+    parts = (order_by or "creation desc").split()
+    sort_field = parts[0]
+    sort_order = parts[1].lower() if len(parts) > 1 else "asc"
+
+    if len(parts) > 2 or sort_field not in PENDING_IPC_SORT_FIELDS or sort_order not in ("asc", "desc"):
+        frappe.throw(
+            _("Pending IPCs can be sorted by {0}, ascending or descending").format(
+                ", ".join(PENDING_IPC_SORT_FIELDS)
+            ),
+            title=_("Invalid Sort Order")
+        )
+
+    return sort_field, sort_order
+
+
+def encode_pending_ipc_cursor(row, sort_field: str) -> str:
+    """Encode the position after `row` as an opaque cursor."""
+    cursor = json.dumps([sort_field, row[sort_field], row.name], default=str)
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def decode_pending_ipc_cursor(cursor: str, sort_field: str) -> tuple:
+    """
+    Decode a cursor from `encode_pending_ipc_cursor`.
+
+    Returns:
+        Tuple of the sort field value and the name of the last row
+    """
+    try:
+        cursor_field, value, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        cursor_field = None
+
+    if cursor_field != sort_field:
+        frappe.throw(
+            _("The cursor is invalid or belongs to a different sort order"),
+            title=_("Invalid Cursor")
+        )
+
+    return value, name
+
+
+def get_pending_ipc_summary(filters: dict) -> dict:
+    """Count the pending IPCs and total their net amount in one aggregate."""
+    summary = frappe.get_all(
+        "IPC",
+        filters=filters,
+        fields=["count(name) as count", "sum(net_amount) as net_amount"]
+    )[0]
+
+    return {"count": cint(summary.count), "net_amount": flt(summary.net_amount)}
+
+
+def get_pending_ipc_filters(customer: str = None, project: str = None) -> dict:
+    """
+    Build the filters that select approved IPCs awaiting a Sales Invoice.
+
+    Shared by `get_pending_ipcs`, `get_pending_ipcs_page` and bulk invoicing so both act on the
+    same set of certificates.
+
+    Args:
+        customer: Optional customer filter
+        project: Optional project filter
+
+    Returns:
+        Filters dictionary for frappe.get_all
     """
     filters = {
         "docstatus": 1,
@@ -122,9 +404,4 @@ def get_pending_ipcs(customer: str = None, project: str = None) -> list:
     if project:
         filters["project"] = project
     
-    return frappe.get_all(
-        "IPC",
-        filters=filters,
-        fields=["name", "customer", "project", "net_amount", "period_from", "period_to"],
-        order_by="creation desc"
-    )
+    return filters
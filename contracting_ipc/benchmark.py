@@ -0,0 +1,403 @@
+"""
+Synthetic data generator and benchmark suite for Contracting IPC.
+
+`seed_data` fills a site with companies, customers, projects and IPCs at
+configurable volumes. `run_benchmarks` times the main read and write paths
+on whatever data the site has, and `compare_with_baseline` flags cases
+that got slower, or issue more SQL statements, than a stored run.
+
+Usage:
+    bench --site bench.local seed-ipc-benchmark-data --ipcs 100000 --projects 2000
+    bench --site bench.local run-ipc-benchmark --output results.json
+
+Both write to the site; run them on a throwaway site, not in production.
+"""
+
+import json
+import math
+import random
+import statistics
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_months, add_years, get_first_day, now, today
+
+from contracting_ipc.instrumentation import measure
+
+# Prefix of the names of all generated records
+BENCHMARK_PREFIX = "_Bench"
+
+DEFAULT_VOLUMES = {
+    "ipcs": 100000,
+    "projects": 2000,
+    "customers": 500,
+    "companies": 3
+}
+
+# Share of generated IPCs inserted as submitted; the latest ones stay drafts
+SUBMITTED_SHARE = 0.8
+
+# Master records inserted between commits
+SEED_COMMIT_SIZE = 100
+
+# A case is slower when its median exceeds the baseline by this share...
+DEFAULT_TOLERANCE = 0.25
+
+# ...and by at least this many milliseconds, so sub-millisecond noise is ignored
+MIN_REGRESSION_MS = 5
+
+
+def seed_data(ipcs: int = None, projects: int = None, customers: int = None,
+              companies: int = None, seed: int = 42) -> dict:
+    """
+    Create benchmark companies, customers, projects and IPCs.
+
+    Masters that already exist are reused, so volumes can be raised by
+    seeding again. IPCs go through the bulk import pipeline; each project
+    gets consecutive monthly periods, the oldest ones submitted.
+
+    Args:
+        ipcs: Number of IPCs to create
+        projects: Number of projects
+        customers: Number of customers
+        companies: Number of companies
+        seed: Random seed, so repeated runs generate the same amounts
+
+    Returns:
+        Dictionary with the created volumes and the import errors
+    """
+    from contracting_ipc.ipc_import import import_ipcs
+
+    volumes = dict(DEFAULT_VOLUMES)
+    volumes.update({
+        key: value for key, value in
+        {"ipcs": ipcs, "projects": projects, "customers": customers, "companies": companies}.items()
+        if value
+    })
+    rng = random.Random(seed)
+
+    company_names = make_companies(volumes["companies"])
+    customer_names = make_customers(volumes["customers"])
+    project_rows = make_projects(volumes["projects"], company_names, customer_names)
+
+    submitted_rows, draft_rows = [], []
+    per_project = math.ceil(volumes["ipcs"] / len(project_rows))
+    start = get_first_day(add_months(today(), -per_project))
+
+    for project_idx, project in enumerate(project_rows):
+        for period in range(per_project):
+            if project_idx * per_project + period >= volumes["ipcs"]:
+                break
+
+            period_from = add_months(start, period)
+            row = {
+                "customer": project.customer,
+                "project": project.name,
+                "company": project.company,
+                "period_from": period_from,
+                "period_to": add_days(add_months(period_from, 1), -1),
+                "total_work_done": rng.randrange(10000, 500000, 100),
+                "retention_percentage": rng.choice([5, 10]),
+                "advance_deduction": rng.choice([0, 0, 1000, 2500])
+            }
+
+            if period < per_project * SUBMITTED_SHARE:
+                submitted_rows.append(row)
+            else:
+                draft_rows.append(row)
+
+    report = import_ipcs(submitted_rows, submit=True)
+    draft_report = import_ipcs(draft_rows)
+
+    return {
+        "companies": len(company_names),
+        "customers": len(customer_names),
+        "projects": len(project_rows),
+        "ipcs": len(report["imported"]) + len(draft_report["imported"]),
+        "errors": report["errors"] + draft_report["errors"]
+    }
+
+
+def make_companies(count: int) -> list:
+    """Create the benchmark companies with their chart of accounts."""
+    names = []
+    for idx in range(1, count + 1):
+        name = f"{BENCHMARK_PREFIX} Company {idx}"
+        if not frappe.db.exists("Company", name):
+            frappe.get_doc({
+                "doctype": "Company",
+                "company_name": name,
+                "abbr": f"BC{idx}",
+                "default_currency": "USD",
+                "country": "United States"
+            }).insert(ignore_permissions=True)
+            frappe.db.commit()
+        names.append(name)
+
+    return names
+
+
+def make_customers(count: int) -> list:
+    """Create the benchmark customers."""
+    names = []
+    for idx in range(1, count + 1):
+        name = f"{BENCHMARK_PREFIX} Customer {idx:04d}"
+        if not frappe.db.exists("Customer", name):
+            frappe.get_doc({
+                "doctype": "Customer",
+                "customer_name": name,
+                "customer_type": "Company"
+            }).insert(ignore_permissions=True)
+
+            if idx % SEED_COMMIT_SIZE == 0:
+                frappe.db.commit()
+        names.append(name)
+
+    frappe.db.commit()
+    return names
+
+
+def make_projects(count: int, companies: list, customers: list) -> list:
+    """Create the benchmark projects, spread over companies and customers."""
+    projects = []
+    for idx in range(1, count + 1):
+        project_name = f"{BENCHMARK_PREFIX} Project {idx:05d}"
+        project = frappe._dict(
+            company=companies[idx % len(companies)],
+            customer=customers[idx % len(customers)],
+            name=frappe.db.get_value("Project", {"project_name": project_name})
+        )
+
+        if not project.name:
+            project.name = frappe.get_doc({
+                "doctype": "Project",
+                "project_name": project_name,
+                "company": project.company,
+                "customer": project.customer
+            }).insert(ignore_permissions=True).name
+
+            if idx % SEED_COMMIT_SIZE == 0:
+                frappe.db.commit()
+        projects.append(project)
+
+    frappe.db.commit()
+    return projects
+
+
+def get_benchmark_context() -> frappe._dict:
+    """
+    Pick the busiest company, its busiest project and the project's customer
+    as benchmark inputs, so IPCs made by the cases pair them as real ones do.
+    """
+    context = frappe._dict()
+
+    for fieldname, condition in (("company", ""), ("project", "AND company = %(company)s"),
+                                 ("customer", "AND project = %(project)s")):
+        result = frappe.db.sql(
+            f"""
+            SELECT
+                {fieldname}
+            FROM
+                `tabIPC`
+            WHERE
+                docstatus < 2
+                {condition}
+            GROUP BY
+                {fieldname}
+            ORDER BY
+                COUNT(*) DESC
+            LIMIT 1
+            """,
+            context
+        )
+        if not result:
+            frappe.throw(_("There are no IPCs to benchmark. Run seed-ipc-benchmark-data first."))
+        context[fieldname] = result[0][0]
+
+    return context
+
+
+def get_cases(context) -> dict:
+    """
+    Benchmark cases by name.
+
+    Each case has `run(state)` which is measured, and optionally `setup()`
+    returning its state and `rollback` to undo its writes after each run.
+    """
+    from contracting_ipc.api import get_ipc_totals_by_project, get_pending_ipcs, get_pending_ipcs_page
+    from contracting_ipc.contracting_ipc.doctype.ipc.ipc import create_sales_invoice
+    from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import (
+        execute,
+        summary_cache_disabled,
+    )
+
+    def summary(**filters):
+        # Measure the report queries, not hits on the result cache warmed by the first run
+        def run(state):
+            with summary_cache_disabled():
+                return execute(frappe._dict(filters))
+
+        return frappe._dict(run=run)
+
+    def new_ipc():
+        # Far-future periods, clear of the seeded ones
+        period_from = add_years(today(), 10 + random.randrange(1000))
+        return frappe.get_doc({
+            "doctype": "IPC",
+            "customer": context.customer,
+            "project": context.project,
+            "company": context.company,
+            "period_from": period_from,
+            "period_to": add_days(period_from, 27),
+            "total_work_done": 100000,
+            "retention_percentage": 10
+        })
+
+    def pending_ipc():
+        # A fresh approved IPC per run, rolled back with its invoice, so the seeded ones are never used up
+        ipc = new_ipc().insert()
+        ipc.submit()
+        return ipc.name
+
+    return {
+        "ipc_summary.company": summary(company=context.company),
+        "ipc_summary.company_approved": summary(company=context.company, status="Approved"),
+        "ipc_summary.customer": summary(customer=context.customer),
+        "ipc_summary.group_by_project": summary(company=context.company, group_by="Project"),
+        "ipc_summary.lazy_load": summary(company=context.company, lazy_load=1),
+        "api.get_ipc_totals_by_project": frappe._dict(
+            run=lambda state: get_ipc_totals_by_project(context.project)
+        ),
+        "api.get_pending_ipcs": frappe._dict(
+            run=lambda state: get_pending_ipcs(customer=context.customer)
+        ),
+        "api.get_pending_ipcs_page": frappe._dict(
+            run=lambda state: get_pending_ipcs_page(customer=context.customer)
+        ),
+        "ipc.save": frappe._dict(run=lambda state: new_ipc().insert(), rollback=True),
+        "ipc.submit": frappe._dict(
+            setup=lambda: new_ipc().insert(), run=lambda ipc: ipc.submit(), rollback=True
+        ),
+        "create_sales_invoice": frappe._dict(setup=pending_ipc, run=create_sales_invoice, rollback=True)
+    }
+
+
+def run_case(case, iterations: int) -> dict:
+    """
+    Run a case once to warm caches, then `iterations` times measured.
+
+    The writes of a case with `rollback` are rolled back to a savepoint after
+    each run, leaving the caller's transaction alone.
+
+    Returns:
+        Dictionary with wall time statistics in milliseconds and the
+        median number of SQL statements
+    """
+    wall_times, sql_counts = [], []
+
+    for iteration in range(iterations + 1):
+        if case.rollback:
+            frappe.db.savepoint("benchmark_case")
+
+        state = case.setup() if case.setup else None
+
+        with measure() as frame:
+            case.run(state)
+
+        if case.rollback:
+            frappe.db.rollback(save_point="benchmark_case")
+        frappe.clear_messages()
+
+        if iteration:
+            wall_times.append(frame.wall_time * 1000)
+            sql_counts.append(frame.sql_count)
+
+    wall_times.sort()
+    return {
+        "iterations": iterations,
+        "median_ms": round(statistics.median(wall_times), 3),
+        "p95_ms": round(wall_times[math.ceil(0.95 * len(wall_times)) - 1], 3),
+        "mean_ms": round(statistics.mean(wall_times), 3),
+        "min_ms": round(wall_times[0], 3),
+        "max_ms": round(wall_times[-1], 3),
+        "sql_count": int(statistics.median(sql_counts))
+    }
+
+
+def run_benchmarks(iterations: int = 5, cases: list = None) -> dict:
+    """
+    Time every benchmark case.
+
+    Args:
+        iterations: Measured runs per case
+        cases: Optional list of case names to run, all cases otherwise
+
+    Returns:
+        Dictionary with run metadata and per-case results
+    """
+    frappe.set_user("Administrator")
+    context = get_benchmark_context()
+
+    results = {}
+    for name, case in get_cases(context).items():
+        if not cases or name in cases:
+            results[name] = run_case(case, iterations)
+
+    return {
+        "meta": {
+            "site": frappe.local.site,
+            "timestamp": now(),
+            "ipc_count": frappe.db.count("IPC"),
+            "context": context
+        },
+        "results": results
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    List the cases that regressed against a baseline run.
+
+    A case regresses when its median wall time exceeds the baseline by
+    more than `tolerance` (and `MIN_REGRESSION_MS`), or when it issues
+    more SQL statements. Cases missing from either run are skipped.
+
+    Returns:
+        List of {"case", "metric", "baseline", "current"} dictionaries
+    """
+    regressions = []
+
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+
+        if (current["median_ms"] > previous["median_ms"] * (1 + tolerance)
+                and current["median_ms"] - previous["median_ms"] >= MIN_REGRESSION_MS):
+            regressions.append({
+                "case": name, "metric": "median_ms",
+                "baseline": previous["median_ms"], "current": current["median_ms"]
+            })
+
+        if current["sql_count"] > previous["sql_count"]:
+            regressions.append({
+                "case": name, "metric": "sql_count",
+                "baseline": previous["sql_count"], "current": current["sql_count"]
+            })
+
+    return regressions
+
+
+def get_default_baseline_path() -> str:
+    """Baselines depend on the hardware, so they are kept per site."""
+    return frappe.get_site_path("ipc_benchmark_baseline.json")
+
+
+def read_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_results(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4, default=str)
@@ -0,0 +1,545 @@
+"""
+Bulk printing of IPC certificates for Contracting IPC.
+
+Renders the PDFs of many IPCs in background jobs instead of the request
+cycle. The IPCs are split into batches that are queued as separate jobs,
+so idle workers render them in parallel; the batch that finishes last
+queues the job that merges the PDFs into one PDF or ZIP File and notifies
+the user. A batch killed by a timeout or a worker restart never finishes,
+so a scheduled job also queues the merge of jobs with no batch left queued
+or running; the merge renders whatever the batches left out.
+
+Rendered PDFs are cached on disk per IPC, modified timestamp, print format
+(and its modified timestamp), letter head, language and user. An IPC is
+only rendered again after it changes, so submitted certificates are
+rendered once per user. The user is part of the key because a print format
+may show fields or linked documents depending on the user's permissions.
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, get_datetime, now_datetime
+
+from contracting_ipc.instrumentation import instrument
+
+DEFAULT_PRINT_FORMAT = "IPC Standard"
+
+# Output format -> file extension
+BULK_PRINT_FORMATS = {
+    "PDF": "pdf",
+    "ZIP": "zip"
+}
+
+# IPCs rendered per background job
+BULK_PRINT_BATCH_SIZE = 20
+
+# Maximum IPCs per bulk print
+MAX_BULK_PRINT_IPCS = 5000
+
+# Seconds the state of a bulk print job is kept in Redis
+BULK_PRINT_JOB_TTL = 6 * 60 * 60
+
+# Redis key prefix of bulk print job state
+BULK_PRINT_KEY_PREFIX = "ipc_bulk_print|"
+
+# Redis set of the bulk print jobs not merged yet
+BULK_PRINT_JOBS_KEY = "ipc_bulk_print_jobs"
+
+# Seconds a batch or merge job may run
+BULK_PRINT_TIMEOUT = 1800
+
+# Directory of rendered PDFs, under the site's private folder
+RENDER_CACHE_FOLDER = "ipc_print_cache"
+
+# Bytes read at a time when hashing the output file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Days a rendered PDF is kept after it was last used
+RENDER_CACHE_DAYS = 30
+
+# Days a bulk print File is kept
+BULK_PRINT_FILE_DAYS = 7
+
+
+@frappe.whitelist()
+@instrument("enqueue_bulk_print")
+def enqueue_bulk_print(names=None, filters=None, print_format: str = None,
+                       letterhead: str = None, file_format: str = "PDF") -> dict:
+    """
+    Queue the rendering of IPC certificates into one PDF or ZIP File.
+
+    The user is notified through the `ipc_bulk_print_ready` realtime event
+    and a notification when the File is available.
+
+    Args:
+        names: IPC names as JSON or list
+        filters: IPC Summary report filters as JSON or dict, used when no names are given
+        print_format: Print Format of IPC, IPC Standard by default
+        letterhead: Optional Letter Head
+        file_format: PDF for one merged PDF, ZIP for a PDF per IPC
+
+    Returns:
+        Dictionary with the job id and the number of IPCs queued
+    """
+    frappe.has_permission("IPC", "print", throw=True)
+
+    if file_format not in BULK_PRINT_FORMATS:
+        frappe.throw(_("Invalid bulk print format: {0}").format(file_format))
+
+    print_format = print_format or DEFAULT_PRINT_FORMAT
+    print_format_modified = get_print_format_modified(print_format)
+
+    names = get_bulk_print_names(frappe.parse_json(names), frappe.parse_json(filters))
+    if not names:
+        frappe.throw(_("There are no IPCs to print."), title=_("Nothing to Print"))
+
+    if len(names) > MAX_BULK_PRINT_IPCS:
+        frappe.throw(
+            _("A bulk print is limited to {0} IPCs, {1} were selected. Please narrow the filters.").format(
+                MAX_BULK_PRINT_IPCS, len(names)
+            ),
+            title=_("Too Many IPCs")
+        )
+
+    job_id = frappe.generate_hash(length=12)
+    batches = [
+        names[start:start + BULK_PRINT_BATCH_SIZE] for start in range(0, len(names), BULK_PRINT_BATCH_SIZE)
+    ]
+
+    frappe.cache.set_value(
+        BULK_PRINT_KEY_PREFIX + job_id,
+        {
+            "names": names,
+            "batches": len(batches),
+            "print_format": print_format,
+            "print_format_modified": print_format_modified,
+            "letterhead": letterhead,
+            "file_format": file_format,
+            "user": frappe.session.user
+        },
+        expires_in_sec=BULK_PRINT_JOB_TTL
+    )
+
+    for idx, batch in enumerate(batches):
+        frappe.enqueue(
+            "contracting_ipc.bulk_print.render_batch",
+            queue="long",
+            timeout=BULK_PRINT_TIMEOUT,
+            job_id=get_batch_job_id(job_id, idx),
+            print_job_id=job_id,
+            names=batch
+        )
+
+    # Added once every batch is queued, so the check for stalled jobs never sees a job without its batches
+    frappe.cache.sadd(BULK_PRINT_JOBS_KEY, job_id)
+
+    frappe.msgprint(
+        _("Printing of {0} IPCs has been queued. You will be notified when the file is ready.").format(
+            len(names)
+        ),
+        alert=True
+    )
+
+    return {"job_id": job_id, "count": len(names)}
+
+
+def get_print_format_modified(print_format: str) -> str:
+    """Validate that a Print Format belongs to IPC and get its modified timestamp."""
+    values = frappe.db.get_value("Print Format", print_format, ["doc_type", "modified"], as_dict=True)
+
+    if not values or values.doc_type != "IPC":
+        frappe.throw(
+            _("{0} is not a Print Format of IPC.").format(print_format), title=_("Invalid Print Format")
+        )
+
+    return str(values.modified)
+
+
+def get_bulk_print_names(names: list = None, filters: dict = None) -> list:
+    """
+    Get the IPCs to print that the user can read, in creation order.
+
+    Args:
+        names: IPC names
+        filters: IPC Summary report filters, used when no names are given;
+            they select the IPCs with the report's own conditions
+
+    Returns:
+        List of IPC names
+    """
+    if names is None:
+        names = get_report_names(frappe._dict(filters or {}))
+
+    if not names:
+        return []
+
+    permitted = set(
+        frappe.get_list("IPC", filters={"name": ["in", names]}, pluck="name", limit_page_length=0)
+    )
+    return [name for name in names if name in permitted]
+
+
+def get_report_names(filters) -> list:
+    """
+    Get the names of the IPCs the IPC Summary report shows for the filters,
+    in creation order, and at most one more than a bulk print takes.
+    """
+    from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import get_conditions
+
+    return frappe.db.sql_list(
+        f"""
+        SELECT
+            name
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus < 2
+            {get_conditions(filters)}
+        ORDER BY
+            creation ASC, name ASC
+        LIMIT %(limit)s
+        """,
+        {**filters, "limit": MAX_BULK_PRINT_IPCS + 1}
+    )
+
+
+def get_batch_job_id(job_id: str, idx: int) -> str:
+    """Get the background job id of a batch of a bulk print job."""
+    return f"{BULK_PRINT_KEY_PREFIX}{job_id}|{idx}"
+
+
+@instrument("render_batch")
+def render_batch(print_job_id: str, names: list) -> None:
+    """
+    Render a batch of a bulk print job into the render cache.
+
+    An IPC that fails to render is recorded and skipped. The batch that
+    completes the job queues `build_bulk_print_file`.
+
+    Args:
+        print_job_id: Bulk print job
+        names: IPC names of the batch
+    """
+    job = frappe.cache.get_value(BULK_PRINT_KEY_PREFIX + print_job_id)
+    if not job:
+        return
+
+    failed = []
+    try:
+        modified = dict(frappe.get_all(
+            "IPC", filters={"name": ["in", names]}, fields=["name", "modified"], as_list=True
+        ))
+
+        for name in names:
+            try:
+                if name not in modified:
+                    frappe.throw(_("IPC {0} no longer exists.").format(name))
+
+                get_rendered_pdf(
+                    name, modified[name], job["print_format"], job["print_format_modified"], job["letterhead"]
+                )
+            except Exception as e:
+                failed.append({"ipc": name, "error": str(e)})
+                frappe.clear_last_message()
+    finally:
+        if finish_batch(print_job_id, failed) == job["batches"]:
+            queue_merge(print_job_id)
+
+
+def finish_batch(job_id: str, failed: list) -> int:
+    """Record the failures of a batch and count it as done; returns the number of batches done."""
+    done_key = frappe.cache.make_key(BULK_PRINT_KEY_PREFIX + job_id + "|done")
+    failed_key = frappe.cache.make_key(BULK_PRINT_KEY_PREFIX + job_id + "|failed")
+
+    pipeline = frappe.cache.pipeline()
+    for failure in failed:
+        pipeline.rpush(failed_key, json.dumps(failure))
+    pipeline.expire(failed_key, BULK_PRINT_JOB_TTL)
+    pipeline.incr(done_key)
+    pipeline.expire(done_key, BULK_PRINT_JOB_TTL)
+
+    return cint(pipeline.execute()[-2])
+
+
+def queue_merge(job_id: str) -> bool:
+    """
+    Queue `build_bulk_print_file` for a bulk print job, unless it was queued already.
+
+    Returns:
+        True if the merge was queued
+    """
+    merge_key = frappe.cache.make_key(BULK_PRINT_KEY_PREFIX + job_id + "|merge")
+    if not frappe.cache.set(merge_key, 1, nx=True, ex=BULK_PRINT_JOB_TTL):
+        return False
+
+    frappe.enqueue(
+        "contracting_ipc.bulk_print.build_bulk_print_file",
+        queue="long",
+        timeout=BULK_PRINT_TIMEOUT,
+        print_job_id=job_id
+    )
+    return True
+
+
+def finish_stalled_bulk_prints() -> int:
+    """
+    Queue the merge of bulk print jobs that have no batch left queued or
+    running; run every few minutes. A batch killed by a timeout or a worker
+    restart is never counted as done, so without this its job would never
+    be merged.
+
+    Returns:
+        Number of merges queued
+    """
+    from frappe.utils.background_jobs import is_job_enqueued
+
+    queued = 0
+    for job_id in frappe.cache.smembers(BULK_PRINT_JOBS_KEY):
+        job_id = frappe.safe_decode(job_id)
+        job = frappe.cache.get_value(BULK_PRINT_KEY_PREFIX + job_id)
+
+        if not job:
+            # Expired before it could be merged
+            frappe.cache.srem(BULK_PRINT_JOBS_KEY, job_id)
+            continue
+
+        if any(is_job_enqueued(get_batch_job_id(job_id, idx)) for idx in range(job["batches"])):
+            continue
+
+        queued += queue_merge(job_id)
+
+    return queued
+
+
+def get_rendered_pdf(name: str, modified, print_format: str, print_format_modified: str,
+                     letterhead: str = None) -> str:
+    """
+    Get the path of an IPC's rendered PDF, rendering it on a cache miss.
+
+    Args:
+        name: IPC name
+        modified: Modified timestamp of the IPC
+        print_format: Print Format
+        print_format_modified: Modified timestamp of the Print Format
+        letterhead: Optional Letter Head
+
+    Returns:
+        Path of the PDF in the render cache
+    """
+    path = get_render_cache_path(name, modified, print_format, print_format_modified, letterhead)
+
+    if os.path.exists(path):
+        # Keep PDFs in use from expiring
+        os.utime(path)
+        return path
+
+    pdf = frappe.get_print(
+        "IPC",
+        name,
+        print_format,
+        as_pdf=True,
+        letterhead=letterhead,
+        no_letterhead=0 if letterhead else 1
+    )
+
+    # Written under a temporary name, so a concurrent job never reads a partial file
+    temp_path = f"{path}.{frappe.generate_hash(length=8)}"
+    with open(temp_path, "wb") as f:
+        f.write(pdf)
+    os.replace(temp_path, path)
+
+    return path
+
+
+def get_render_cache_path(name: str, modified, print_format: str, print_format_modified: str,
+                          letterhead: str = None) -> str:
+    """Get the render cache path of an IPC's PDF; any change to its inputs gives a new path."""
+    folder = frappe.get_site_path("private", RENDER_CACHE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+
+    key = json.dumps([
+        name,
+        str(get_datetime(modified)),
+        print_format,
+        print_format_modified,
+        letterhead or "",
+        frappe.local.lang,
+        frappe.session.user
+    ])
+
+    return os.path.join(folder, hashlib.md5(key.encode()).hexdigest() + ".pdf")
+
+
+@instrument("build_bulk_print_file")
+def build_bulk_print_file(print_job_id: str) -> str:
+    """
+    Merge the rendered PDFs of a bulk print job into a private File and notify the user.
+
+    IPCs that no batch rendered, e.g. because the batch was killed, are
+    rendered here.
+
+    Args:
+        print_job_id: Bulk print job
+
+    Returns:
+        URL of the created File
+    """
+    job = frappe.cache.get_value(BULK_PRINT_KEY_PREFIX + print_job_id)
+    if not job:
+        return
+
+    # Queued by the check for stalled jobs, the merge runs as Administrator
+    if frappe.session.user != job["user"]:
+        frappe.set_user(job["user"])
+
+    failed = [
+        json.loads(failure)
+        for failure in frappe.cache.lrange(BULK_PRINT_KEY_PREFIX + print_job_id + "|failed", 0, -1)
+    ]
+    failed_names = {failure["ipc"] for failure in failed}
+
+    modified = dict(frappe.get_all(
+        "IPC", filters={"name": ["in", job["names"]]}, fields=["name", "modified"], as_list=True
+    ))
+    paths = []
+    for name in job["names"]:
+        if name in failed_names or name not in modified:
+            continue
+
+        # Rendered again when the IPC changed since its batch ran
+        try:
+            paths.append((name, get_rendered_pdf(
+                name, modified[name], job["print_format"], job["print_format_modified"], job["letterhead"]
+            )))
+        except Exception as e:
+            failed.append({"ipc": name, "error": str(e)})
+            frappe.clear_last_message()
+
+    file_name = f"ipc_print_{print_job_id}.{BULK_PRINT_FORMATS[job['file_format']]}"
+    file_path = frappe.get_site_path("private", "files", file_name)
+
+    if job["file_format"] == "ZIP":
+        write_zip(file_path, paths)
+    else:
+        write_merged_pdf(file_path, paths)
+
+    content_hash = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            content_hash.update(block)
+
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": "/private/files/" + file_name,
+        "is_private": 1,
+        "file_size": os.path.getsize(file_path),
+        "content_hash": content_hash.hexdigest()
+    })
+    file_doc.insert(ignore_permissions=True)
+
+    notify_bulk_print_ready(file_doc, len(paths), failed)
+
+    for suffix in ("", "|done", "|failed", "|merge"):
+        frappe.cache.delete_value(BULK_PRINT_KEY_PREFIX + print_job_id + suffix)
+    frappe.cache.srem(BULK_PRINT_JOBS_KEY, print_job_id)
+
+    return file_doc.file_url
+
+
+def write_merged_pdf(file_path: str, paths: list) -> None:
+    """Merge the rendered PDFs into one PDF, in print order."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for _name, path in paths:
+        writer.append(path)
+
+    with open(file_path, "wb") as f:
+        writer.write(f)
+
+
+def write_zip(file_path: str, paths: list) -> None:
+    """Write the rendered PDFs to a ZIP archive, one file per IPC."""
+    # PDFs are compressed already
+    with zipfile.ZipFile(file_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, path in paths:
+            archive.write(path, arcname=f"{name}.pdf")
+
+
+def notify_bulk_print_ready(file_doc, count: int, failed: list) -> None:
+    """Notify the user of a finished bulk print through realtime and a notification."""
+    from frappe.desk.doctype.notification_log.notification_log import enqueue_create_notification
+
+    frappe.publish_realtime(
+        "ipc_bulk_print_ready",
+        {"file_url": file_doc.file_url, "file_name": file_doc.file_name, "count": count, "failed": failed},
+        user=frappe.session.user,
+        after_commit=True
+    )
+
+    subject = _("{0} IPC certificates are ready to download.").format(count)
+    if failed:
+        subject += " " + _("{0} could not be printed.").format(len(failed))
+
+    enqueue_create_notification(
+        frappe.session.user,
+        {
+            "type": "Alert",
+            "subject": subject,
+            "document_type": "File",
+            "document_name": file_doc.name,
+            "from_user": frappe.session.user
+        }
+    )
+
+
+def clear_render_cache(days: int = RENDER_CACHE_DAYS) -> int:
+    """
+    Delete rendered PDFs that have not been used for a number of days; run daily.
+
+    Returns:
+        Number of PDFs deleted
+    """
+    folder = frappe.get_site_path("private", RENDER_CACHE_FOLDER)
+    if not os.path.isdir(folder):
+        return 0
+
+    cutoff = add_days(now_datetime(), -cint(days)).timestamp()
+    deleted = 0
+
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                deleted += 1
+
+    return deleted
+
+
+def clear_bulk_print_files(days: int = BULK_PRINT_FILE_DAYS) -> int:
+    """
+    Delete bulk print Files older than a number of days; run daily.
+
+    Returns:
+        Number of Files deleted
+    """
+    names = frappe.get_all(
+        "File",
+        filters={
+            "file_name": ["like", "ipc_print_%"],
+            "is_private": 1,
+            "creation": ["<", add_days(now_datetime(), -cint(days))]
+        },
+        pluck="name"
+    )
+
+    for name in names:
+        frappe.delete_doc("File", name, ignore_permissions=True)
+
+    return len(names)
@@ -0,0 +1,176 @@
+"""
+Bench commands for Contracting IPC.
+
+Usage:
+    bench --site your-site.local rebuild-ipc-totals [--project PROJECT]
+    bench --site your-site.local audit-ipc-periods
+    bench --site your-site.local seed-ipc-benchmark-data [--ipcs 100000] [--projects 2000]
+    bench --site your-site.local run-ipc-benchmark [--output results.json] [--update-baseline]
+"""
+
+import sys
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-ipc-totals")
+@click.option("--project", help="Rebuild a single project instead of all projects")
+@pass_context
+def rebuild_ipc_totals(context, project=None):
+    """Backfill the IPC totals, contract balance and retention ledgers from submitted IPCs."""
+    from contracting_ipc.contracting_ipc.doctype.ipc_contract_balance.ipc_contract_balance import (
+        rebuild_contract_balances,
+    )
+    from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+        rebuild_project_totals,
+    )
+    from contracting_ipc.contracting_ipc.doctype.ipc_retention_ledger_entry import (
+        ipc_retention_ledger_entry,
+    )
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+
+    try:
+        count = rebuild_project_totals([project] if project else None)
+        click.echo(f"Rebuilt IPC totals for {count} project(s)")
+
+        count = ipc_retention_ledger_entry.rebuild_retention_ledger([project] if project else None)
+        click.echo(f"Posted {count} IPC retention ledger entries")
+
+        if not project:
+            count = rebuild_contract_balances()
+            click.echo(f"Rebuilt IPC balances for {count} contract(s)")
+
+        frappe.db.commit()
+    finally:
+        frappe.destroy()
+
+
+@click.command("audit-ipc-periods")
+@pass_context
+def audit_ipc_periods(context):
+    """List draft and submitted IPCs whose periods overlap another IPC of the same contract or project."""
+    from contracting_ipc.period_overlaps import audit_period_overlaps
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+
+    try:
+        overlaps = audit_period_overlaps()
+    finally:
+        frappe.destroy()
+
+    for overlap in overlaps:
+        click.echo(
+            f"{overlap['scope'].title()} {overlap['value']}: {overlap['ipc']} "
+            f"({overlap['period_from']} to {overlap['period_to']}) overlaps {overlap['overlaps']} "
+            f"({overlap['overlaps_period_from']} to {overlap['overlaps_period_to']})"
+        )
+
+    click.echo(f"{len(overlaps)} overlapping IPC period(s) found")
+    if overlaps:
+        sys.exit(1)
+
+
+@click.command("seed-ipc-benchmark-data")
+@click.option("--ipcs", type=int, help="Number of IPCs (default 100000)")
+@click.option("--projects", type=int, help="Number of projects (default 2000)")
+@click.option("--customers", type=int, help="Number of customers (default 500)")
+@click.option("--companies", type=int, help="Number of companies (default 3)")
+@click.option("--seed", type=int, default=42, help="Random seed for the generated amounts")
+@pass_context
+def seed_ipc_benchmark_data(context, ipcs=None, projects=None, customers=None, companies=None, seed=42):
+    """Fill the site with synthetic IPC data for benchmarking."""
+    from contracting_ipc.benchmark import seed_data
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    frappe.set_user("Administrator")
+
+    try:
+        report = seed_data(ipcs, projects, customers, companies, seed)
+        click.echo(
+            f"Seeded {report['companies']} companies, {report['customers']} customers, "
+            f"{report['projects']} projects and {report['ipcs']} IPCs"
+        )
+        if report["errors"]:
+            click.echo(f"{len(report['errors'])} IPC rows failed to import", err=True)
+    finally:
+        frappe.destroy()
+
+
+@click.command("run-ipc-benchmark")
+@click.option("--iterations", type=int, default=5, help="Measured runs per case")
+@click.option("--case", "cases", multiple=True, help="Run only this case; can be repeated")
+@click.option("--output", help="Write the results to this JSON file")
+@click.option(
+    "--baseline", help="Baseline JSON file (default: ipc_benchmark_baseline.json in the site folder)"
+)
+@click.option("--tolerance", type=float, help="Allowed slowdown before a case is a regression (default 0.25)")
+@click.option("--update-baseline", is_flag=True, help="Store these results as the new baseline")
+@pass_context
+def run_ipc_benchmark(context, iterations=5, cases=None, output=None, baseline=None,
+                      tolerance=None, update_baseline=False):
+    """Time the IPC hot paths and compare them against the stored baseline."""
+    import os
+
+    from contracting_ipc.benchmark import (
+        DEFAULT_TOLERANCE,
+        compare_with_baseline,
+        get_default_baseline_path,
+        read_results,
+        run_benchmarks,
+        write_results,
+    )
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+
+    try:
+        results = run_benchmarks(iterations, list(cases))
+        frappe.db.commit()
+
+        for name, result in results["results"].items():
+            click.echo(f"{name:36} median {result['median_ms']:>10.2f} ms  "
+                       f"p95 {result['p95_ms']:>10.2f} ms  {result['sql_count']:>5} queries")
+
+        if output:
+            write_results(results, output)
+
+        baseline = baseline or get_default_baseline_path()
+        regressions = []
+        if update_baseline:
+            write_results(results, baseline)
+            click.echo(f"Baseline written to {baseline}")
+        elif os.path.exists(baseline):
+            regressions = compare_with_baseline(
+                results, read_results(baseline), DEFAULT_TOLERANCE if tolerance is None else tolerance
+            )
+            for regression in regressions:
+                click.echo(
+                    f"REGRESSION {regression['case']} {regression['metric']}: "
+                    f"{regression['baseline']} -> {regression['current']}",
+                    err=True
+                )
+        else:
+            click.echo(f"No baseline at {baseline}; run with --update-baseline to store one")
+    finally:
+        frappe.destroy()
+
+    if regressions:
+        sys.exit(1)
+
+
+commands = [
+    rebuild_ipc_totals,
+    audit_ipc_periods,
+    seed_ipc_benchmark_data,
+    run_ipc_benchmark,
+]
@@ -0,0 +1,33 @@
+// Copyright (c) 2024, Your Company and contributors
+// For license information, please see license.txt
+
+frappe.provide("frappe.dashboards.chart_sources");
+
+frappe.dashboards.chart_sources["IPC Monthly Trends"] = {
+    method: "contracting_ipc.contracting_ipc.dashboard_chart_source.ipc_monthly_trends.ipc_monthly_trends.get",
+    filters: [
+        {
+            fieldname: "company",
+            label: __("Company"),
+            fieldtype: "Link",
+            options: "Company",
+            default: frappe.defaults.get_user_default("Company")
+        },
+        {
+            fieldname: "project",
+            label: __("Project"),
+            fieldtype: "Link",
+            options: "Project"
+        },
+        {
+            fieldname: "from_date",
+            label: __("From Date"),
+            fieldtype: "Date"
+        },
+        {
+            fieldname: "to_date",
+            label: __("To Date"),
+            fieldtype: "Date"
+        }
+    ]
+};
@@ -0,0 +1,69 @@
+"""
+IPC Monthly Trends Dashboard Chart Source.
+
+Certified work, invoiced amounts and retention per month, read from the
+IPC Monthly Rollup instead of aggregating IPCs. The rollup holds a row per
+project and month, so the chart is read fresh on every load rather than
+through the per-chart cache, which is shared by users of every company.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import add_months, flt, get_first_day, getdate, nowdate
+
+from contracting_ipc.contracting_ipc.doctype.ipc_monthly_rollup.ipc_monthly_rollup import (
+    get_monthly_totals,
+)
+
+# Months shown when the chart has no date filters
+DEFAULT_MONTHS = 12
+
+# Dataset label -> rollup field
+TREND_DATASETS = {
+    "Certified": "total_work_done",
+    "Invoiced": "total_invoiced",
+    "Retention": "total_retention"
+}
+
+
+@frappe.whitelist()
+def get(chart_name=None, chart=None, no_cache=None, filters=None, from_date=None, to_date=None,
+        timespan=None, time_interval=None, heatmap_year=None) -> dict:
+    """
+    Get the monthly trends of a company, optionally for one project.
+
+    Args:
+        chart_name: Dashboard Chart whose saved filters apply when none are given
+        filters: Chart filters as JSON or dict with company, project, from_date and to_date
+
+    Returns:
+        Chart data with a label per month and a dataset per trend
+    """
+    frappe.has_permission("IPC Monthly Rollup", "read", throw=True)
+
+    if not filters and chart_name:
+        filters = frappe.db.get_value("Dashboard Chart", chart_name, "filters_json")
+
+    filters = frappe._dict(frappe.parse_json(filters) or {})
+    company = filters.company or frappe.defaults.get_user_default("Company")
+    to_month = get_first_day(filters.to_date or nowdate())
+    from_month = get_first_day(filters.from_date or add_months(to_month, 1 - DEFAULT_MONTHS))
+
+    totals = get_monthly_totals(company, from_month, to_month, filters.project)
+
+    months = []
+    month = from_month
+    while month <= to_month:
+        months.append(month)
+        month = getdate(add_months(month, 1))
+
+    return {
+        "labels": [month.strftime("%b %Y") for month in months],
+        "datasets": [
+            {
+                "name": _(label),
+                "values": [flt(totals[month].get(field)) if month in totals else 0 for month in months]
+            }
+            for label, field in TREND_DATASETS.items()
+        ]
+    }
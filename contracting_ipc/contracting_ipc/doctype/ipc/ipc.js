@@ -6,8 +6,8 @@ frappe.ui.form.on("IPC", {
      * Form refresh handler - controls UI state and custom buttons
      */
     refresh: function (frm) {
-        // Recalculate amounts on refresh
-        frm.trigger("calculate_amounts");
+        // Load the contract's advance terms, then recalculate amounts
+        frm.trigger("fetch_advance_terms");
 
         // Add Create Sales Invoice button for submitted IPCs without invoice
         if (frm.doc.docstatus === 1 && !frm.doc.sales_invoice && frm.doc.status !== "Invoiced") {
@@ -48,6 +48,36 @@ frappe.ui.form.on("IPC", {
             }
             return { filters: filters };
         });
+
+        // Follow submissions, workflow transitions and invoicing made elsewhere
+        frappe.realtime.on("ipc_update", function (data) {
+            frm.events.ipc_update(frm, data);
+        });
+    },
+
+    /**
+     * Realtime handler - reloads the form when the open IPC changed on the server
+     */
+    ipc_update: function (frm, data) {
+        if (data.name !== frm.doc.name) {
+            return;
+        }
+
+        let changed = ["docstatus", "status", "workflow_state", "sales_invoice"].some(function (fieldname) {
+            return (data[fieldname] || null) !== (frm.doc[fieldname] || null);
+        });
+        if (!changed) {
+            return;
+        }
+
+        if (frm.is_dirty()) {
+            frappe.show_alert({
+                message: __("IPC {0} was updated ({1}). Reload to see the changes.", [data.name, __(data.status)]),
+                indicator: "orange"
+            });
+        } else {
+            frm.reload_doc();
+        }
     },
 
     /**
@@ -82,6 +112,41 @@ frappe.ui.form.on("IPC", {
         });
     },
 
+    /**
+     * Contract field change handler
+     */
+    contract: function (frm) {
+        frm.trigger("fetch_advance_terms");
+    },
+
+    /**
+     * Load the advance recovery terms of the contract for proposing the deduction
+     */
+    fetch_advance_terms: function (frm) {
+        frm.advance_terms = null;
+
+        if (!frm.doc.contract || frm.doc.docstatus !== 0) {
+            frm.trigger("calculate_amounts");
+            return;
+        }
+
+        frappe.db.get_value(
+            "IPC Contract Balance",
+            frm.doc.contract,
+            ["total_advance", "advance_recovery_percentage", "advance_recovered"]
+        ).then(function (r) {
+            frm.advance_terms = r.message;
+            frm.trigger("calculate_amounts");
+        });
+    },
+
+    /**
+     * Manual advance deduction toggle handler
+     */
+    manual_advance_deduction: function (frm) {
+        frm.trigger("calculate_amounts");
+    },
+
     /**
      * Total work done change handler
      */
@@ -111,6 +176,15 @@ frappe.ui.form.on("IPC", {
         let retention_percentage = flt(frm.doc.retention_percentage) || 0;
         let advance_deduction = flt(frm.doc.advance_deduction) || 0;
 
+        // Propose the advance deduction from the contract terms; the server re-checks it
+        let terms = frm.advance_terms;
+        if (frm.doc.docstatus === 0 && !frm.doc.manual_advance_deduction && terms && flt(terms.total_advance)) {
+            let outstanding = Math.max(flt(terms.total_advance) - flt(terms.advance_recovered), 0);
+            advance_deduction = flt(Math.min(total_work_done * flt(terms.advance_recovery_percentage) / 100, outstanding),
+                precision("advance_deduction"));
+            frm.set_value("advance_deduction", advance_deduction);
+        }
+
         // Calculate retention amount
         let retention_amount = flt(total_work_done * retention_percentage / 100, precision("retention_amount"));
         frm.set_value("retention_amount", retention_amount);
@@ -118,6 +192,12 @@ frappe.ui.form.on("IPC", {
         // Calculate net amount
         let net_amount = flt(total_work_done - retention_amount - advance_deduction, precision("net_amount"));
         frm.set_value("net_amount", net_amount);
+
+        // Cumulative work done; previously certified is set by the server
+        if (frm.doc.docstatus === 0) {
+            let certified_to_date = flt(flt(frm.doc.previous_certified) + total_work_done, precision("certified_to_date"));
+            frm.set_value("certified_to_date", certified_to_date);
+        }
     },
 
     /**
@@ -127,10 +207,14 @@ frappe.ui.form.on("IPC", {
         frappe.confirm(
             __("Are you sure you want to create a Sales Invoice for this IPC?"),
             function () {
+                // Reused by repeated clicks, so a retry returns the same invoice
+                frm.invoice_idempotency_key = frm.invoice_idempotency_key || frappe.utils.get_random(20);
+
                 frappe.call({
                     method: "contracting_ipc.contracting_ipc.doctype.ipc.ipc.create_sales_invoice",
                     args: {
-                        ipc_name: frm.doc.name
+                        ipc_name: frm.doc.name,
+                        idempotency_key: frm.invoice_idempotency_key
                     },
                     freeze: true,
                     freeze_message: __("Creating Sales Invoice..."),
@@ -10,16 +10,52 @@ This module handles the server-side logic for IPC documents including:
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import flt, getdate
+from frappe.model.workflow import get_workflow_name
+from frappe.realtime import get_doc_room, get_doctype_room
+from frappe.utils import cint, flt, getdate, nowdate
+
+from contracting_ipc.contracting_ipc.doctype.ipc_contract_balance.ipc_contract_balance import (
+    get_advance_outstanding,
+    get_contract_balance,
+    propose_advance_deduction,
+    update_contract_balance,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_monthly_rollup.ipc_monthly_rollup import (
+    update_monthly_rollup,
+    update_monthly_rollup_invoiced,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+    ensure_project_totals,
+    update_project_totals,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_ledger_entry.ipc_retention_ledger_entry import (
+    cancel_retention_entries,
+    make_retention_entry,
+)
+from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import clear_summary_cache
+from contracting_ipc.instrumentation import instrument
+from contracting_ipc.period_overlaps import validate_period_overlap
 
 
 class IPC(Document):
     """Controller class for Interim Payment Certificate (IPC) DocType."""
 
+    def autoname(self):
+        """Name the IPC after its project and its number within the project, e.g. IPC-PROJ-0001-0007."""
+        self.ipc_number = reserve_ipc_numbers(self.project)
+        self.name = get_ipc_name(self.project, self.ipc_number)
+
+    @instrument("IPC.validate")
     def validate(self):
         """Validate the IPC document before saving."""
         self.validate_dates()
+        validate_period_overlap(self)
+
+        balance = self.get_contract_balance()
+        self.set_advance_deduction(balance)
         self.calculate_amounts()
+        self.set_cumulative_amounts(balance)
+        self.validate_contract_value(balance)
 
     def validate_dates(self):
         """Ensure period_from is before or equal to period_to."""
@@ -30,67 +66,427 @@ class IPC(Document):
                     title=_("Invalid Date Range")
                 )
 
+    def get_contract_balance(self, for_update=False):
+        """
+        Read the running balance of the contract with a single row lookup.
+
+        Args:
+            for_update: Lock the balance row, so concurrent submissions on
+                the same contract are applied one after the other
+
+        Returns:
+            Contract balance, or None when the IPC has no contract
+        """
+        if not self.contract:
+            return None
+
+        return get_contract_balance(self.contract, for_update=for_update)
+
+    def set_advance_deduction(self, balance):
+        """
+        Propose the advance deduction from the advance recovery terms of
+        the contract and check it against the advance still outstanding.
+
+        Contracts without a total advance keep a free-typed deduction.
+
+        Args:
+            balance: Result of `get_contract_balance`
+        """
+        if not balance or not flt(balance.total_advance):
+            return
+
+        if not self.manual_advance_deduction:
+            self.advance_deduction = propose_advance_deduction(
+                self.total_work_done, balance, self.precision("advance_deduction")
+            )
+
+        outstanding = get_advance_outstanding(balance)
+        if flt(self.advance_deduction) > outstanding:
+            frappe.throw(
+                _(
+                    "Advance Deduction ({0}) cannot exceed the advance outstanding on Contract {1} ({2})."
+                ).format(
+                    frappe.format_value(self.advance_deduction, {"fieldtype": "Currency"}),
+                    self.contract,
+                    frappe.format_value(outstanding, {"fieldtype": "Currency"})
+                ),
+                title=_("Excess Advance Recovery")
+            )
+
     def calculate_amounts(self):
         """Calculate retention_amount and net_amount based on inputs."""
-        # Calculate retention amount
-        total_work_done = flt(self.total_work_done)
-        retention_percentage = flt(self.retention_percentage)
-        advance_deduction = flt(self.advance_deduction)
-
-        self.retention_amount = flt(
-            total_work_done * retention_percentage / 100.0,
-            self.precision("retention_amount")
+        self.retention_amount, self.net_amount = calculate_ipc_amounts(
+            self.total_work_done,
+            self.retention_percentage,
+            self.advance_deduction,
+            self.precision("retention_amount"),
+            self.precision("net_amount")
         )
 
-        # Calculate net amount
-        self.net_amount = flt(
-            total_work_done - self.retention_amount - advance_deduction,
-            self.precision("net_amount")
+    def set_cumulative_amounts(self, balance=None, for_update=False):
+        """
+        Set previously certified and to-date work done from the running
+        balance of the contract, or of the project when there is no contract.
+
+        Args:
+            balance: Contract balance already read by the caller
+            for_update: Lock the project totals row of an IPC without a
+                contract, so concurrent submissions are counted in order
+        """
+        if balance:
+            self.previous_certified = flt(balance.certified_to_date)
+        else:
+            self.previous_certified = get_certified_to_date(self.contract, self.project, for_update)
+
+        self.certified_to_date = flt(
+            flt(self.previous_certified) + flt(self.total_work_done),
+            self.precision("certified_to_date")
         )
 
+    def validate_contract_value(self, balance):
+        """
+        Ensure the work certified on the contract, including this IPC,
+        does not exceed the contract value.
+
+        Args:
+            balance: Result of `get_contract_balance`; a zero contract value
+                means the contract is not capped
+        """
+        if not balance or not flt(balance.contract_value):
+            return
+
+        if flt(self.certified_to_date) > flt(balance.contract_value):
+            frappe.throw(
+                _("Certified work of {0} on Contract {1} would exceed its value of {2} by {3}.").format(
+                    frappe.format_value(self.certified_to_date, {"fieldtype": "Currency"}),
+                    self.contract,
+                    frappe.format_value(balance.contract_value, {"fieldtype": "Currency"}),
+                    frappe.format_value(
+                        flt(self.certified_to_date) - flt(balance.contract_value), {"fieldtype": "Currency"}
+                    )
+                ),
+                title=_("Contract Value Exceeded")
+            )
+
+    def on_update(self):
+        """
+        Invalidate cached IPC Summary results after inserts, saves and
+        submission, and publish workflow transitions of draft IPCs; new
+        IPCs have not moved yet.
+        """
+        self.clear_summary_cache()
+
+        if self.docstatus == 0 and self.get_doc_before_save() and self.has_value_changed("workflow_state"):
+            publish_ipc_update(self, "workflow")
+
+    def on_update_after_submit(self):
+        """Invalidate cached IPC Summary results and publish workflow transitions of submitted IPCs."""
+        self.clear_summary_cache()
+
+        if self.has_value_changed("workflow_state"):
+            publish_ipc_update(self, "workflow")
+
+    @instrument("IPC.on_submit")
     def on_submit(self):
         """Actions to perform when IPC is submitted."""
-        self.db_set("status", "Approved")
+        self.update_ledgers()
+        publish_ipc_update(self, "submit")
+
+    def before_cancel(self):
+        """Reset the status; it is written with the cancellation itself."""
+        self.status = "Draft"
 
     def on_cancel(self):
         """Actions to perform when IPC is cancelled."""
-        self.db_set("status", "Draft")
+        self.update_ledgers(cancel=True)
+        self.clear_summary_cache()
+        publish_ipc_update(self, "cancel")
+
+    def on_trash(self):
+        """Drop the deleted IPC from cached IPC Summary results."""
+        self.clear_summary_cache()
+
+    def after_rename(self, old_name, new_name, merge=False):
+        """Cached IPC Summary rows carry the old name."""
+        self.clear_summary_cache()
+
+    def clear_summary_cache(self):
+        """Invalidate the cached IPC Summary results that can include this IPC, before or after the change."""
+        clear_summary_cache([self, self.get_doc_before_save()])
+
+    def update_ledgers(self, cancel=False):
+        """Apply this IPC to the running totals and balances, or reverse it on cancel."""
+        update_project_totals(self, cancel=cancel)
+        update_monthly_rollup(self, cancel=cancel)
 
+        if self.contract:
+            update_contract_balance(self, cancel=cancel)
+
+        if cancel:
+            cancel_retention_entries(self)
+        else:
+            make_retention_entry(self, self.retention_amount, nowdate(), self.period_to)
+
+    @instrument("IPC.before_submit")
     def before_submit(self):
         """Validate before submission."""
+        # Re-check against the locked contract balance, so concurrent
+        # submissions cannot recover the same advance or exceed the cap
+        balance = self.get_contract_balance(for_update=True)
+        self.set_advance_deduction(balance)
+        self.calculate_amounts()
+
         if flt(self.net_amount) <= 0:
             frappe.throw(
                 _("Net Amount must be greater than zero to submit the IPC."),
                 title=_("Invalid Amount")
             )
 
+        self.set_cumulative_amounts(balance, for_update=True)
+        self.validate_contract_value(balance)
+
+        # Re-check under the balance lock taken above, so two IPCs for the
+        # same period cannot both be submitted concurrently
+        validate_period_overlap(self)
+
+        # Written with the submission itself, instead of a separate UPDATE
+        self.status = "Approved"
+
+
+# Realtime event published when an IPC is submitted, cancelled, moves
+# through the workflow or is invoiced
+IPC_UPDATE_EVENT = "ipc_update"
+
+# IPC fields carried by the realtime event
+REALTIME_FIELDS = [
+    "docstatus", "status", "workflow_state", "sales_invoice",
+    "customer", "project", "company", "net_amount"
+]
+
+
+def publish_ipc_update(ipc, event: str, values: dict = None):
+    """
+    Publish the state of an IPC to its open forms and to the IPC list
+    views and dashboards, once the transaction commits.
+
+    Args:
+        ipc: IPC document or dict with `REALTIME_FIELDS`
+        event: What happened: "submit", "cancel", "workflow" or "invoice"
+        values: Field values written after `ipc` was read
+    """
+    values = values or {}
+    message = {field: values.get(field, ipc.get(field)) for field in REALTIME_FIELDS}
+    message.update({"name": ipc.name, "event": event})
+
+    # Explicit rooms, so events raised in background jobs are not routed
+    # to the job's progress room
+    for room in (get_doc_room("IPC", ipc.name), get_doctype_room("IPC")):
+        frappe.publish_realtime(IPC_UPDATE_EVENT, message, room=room, after_commit=True)
+
+
+def get_ipc_name(project: str, ipc_number: int) -> str:
+    """Get the name of a project's IPC with the given number."""
+    return f"{get_ipc_number_key(project)}{cint(ipc_number):04d}"
+
+
+def get_ipc_number_key(project: str) -> str:
+    """Get the tabSeries key of a project's IPC counter, which is also the prefix of its IPC names."""
+    return f"IPC-{project}-"
+
+
+def reserve_ipc_numbers(project: str, count: int = 1) -> int:
+    """
+    Reserve the next `count` IPC numbers of a project.
+
+    Every project has its own counter row in tabSeries, incremented by a
+    single upsert that locks only that row until the transaction ends.
+    IPCs of other projects never wait for it, and a rolled back insert
+    releases its number with the transaction, so numbers have no gaps.
+
+    Args:
+        project: Project name
+        count: Number of consecutive numbers to reserve
+
+    Returns:
+        The first reserved number
+    """
+    key = get_ipc_number_key(project)
+
+    if frappe.db.db_type == "postgres":
+        upsert = """
+            INSERT INTO `tabSeries` (`name`, `current`) VALUES (%(key)s, %(count)s)
+            ON CONFLICT (`name`) DO UPDATE SET `current` = `tabSeries`.`current` + %(count)s
+        """
+    else:
+        upsert = """
+            INSERT INTO `tabSeries` (`name`, `current`) VALUES (%(key)s, %(count)s)
+            ON DUPLICATE KEY UPDATE `current` = `current` + %(count)s
+        """
+    frappe.db.sql(upsert, {"key": key, "count": count})
+
+    # The row is locked by this transaction, so this reads its own increment
+    current = cint(frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s", key)[0][0])
+    return current - count + 1
+
+
+def get_balance_keys(contract: str, project: str) -> list:
+    """
+    Get the running balances a submitted IPC counts towards.
+
+    Every submitted IPC counts towards its project's balance (IPC Project
+    Totals), and also towards its contract's balance when it has one. An
+    IPC reads its previously certified work from the first balance: the
+    contract's, or the project's, which then includes the IPCs of the
+    project that have a contract.
+
+    Returns:
+        List of ("contract", name) and/or ("project", name) keys, the one read first
+    """
+    keys = [("project", project)]
+    if contract:
+        keys.insert(0, ("contract", contract))
+
+    return keys
+
+
+def get_certified_to_date(contract: str, project: str, for_update: bool = False) -> float:
+    """
+    Get the work certified so far on a contract, or on the project when
+    there is no contract, from its running balance; see `get_balance_keys`.
+
+    Args:
+        contract: Contract name
+        project: Project name
+        for_update: Lock the balance row until the end of the transaction
+
+    Returns:
+        Total work done of the submitted IPCs
+    """
+    if contract:
+        return flt(get_contract_balance(contract, for_update=for_update).certified_to_date)
+
+    if not project:
+        return 0
+
+    if for_update:
+        ensure_project_totals(project)
+
+    return flt(frappe.db.get_value("IPC Project Totals", project, "total_work_done", for_update=for_update))
+
+
+def calculate_ipc_amounts(total_work_done, retention_percentage, advance_deduction,
+                          retention_precision, net_precision) -> tuple:
+    """
+    Calculate the retention and net amounts of an IPC.
+
+    Shared by the IPC controller and the bulk paths so that every amount
+    is rounded the same way.
+
+    Returns:
+        Tuple of (retention_amount, net_amount)
+    """
+    total_work_done = flt(total_work_done)
+
+    # Calculate retention amount
+    retention_amount = flt(
+        total_work_done * flt(retention_percentage) / 100.0,
+        retention_precision
+    )
+
+    # Calculate net amount
+    net_amount = flt(
+        total_work_done - retention_amount - flt(advance_deduction),
+        net_precision
+    )
+
+    return retention_amount, net_amount
+
+
+def get_amount_precisions(company: str) -> tuple:
+    """Get the (retention_amount, net_amount) precisions IPCs of a company use."""
+    ipc = frappe.new_doc("IPC")
+    ipc.company = company
+    return ipc.precision("retention_amount"), ipc.precision("net_amount")
+
+
+# Composite indexes matching the IPC access paths: project totals,
+# pending invoicing, the IPC Summary report filters and its keyset cursor,
+# and the overlapping period lookups
+IPC_INDEXES = {
+    "project_docstatus_index": ["project", "docstatus"],
+    "pending_invoice_index": ["docstatus", "status", "sales_invoice"],
+    "company_status_period_index": ["company", "status", "period_from"],
+    "customer_status_period_index": ["customer", "status", "period_from"],
+    "creation_name_index": ["creation", "name"],
+    "contract_period_index": ["contract", "period_from"],
+    "project_period_index": ["project", "period_from"]
+}
+
+
+def on_doctype_update():
+    """Add composite indexes to tabIPC."""
+    for index_name, fields in IPC_INDEXES.items():
+        frappe.db.add_index("IPC", fields, index_name=index_name)
 
-def validate_ipc(doc, method=None):
-    """Hook function for IPC validation."""
-    doc.validate_dates()
-    doc.calculate_amounts()
 
+# Number of IPCs invoiced between commits in a bulk invoicing job
+INVOICE_CHUNK_SIZE = 50
 
-def on_submit_ipc(doc, method=None):
-    """Hook function for IPC submission."""
-    pass  # Additional submit logic can be added here
+# IPC fields needed to build a Sales Invoice and publish the invoiced IPC
+INVOICE_IPC_FIELDS = [
+    "name", "docstatus", "status", "sales_invoice", "customer", "company",
+    "project", "period_from", "period_to", "net_amount", "invoice_idempotency_key",
+    "workflow_state"
+]
 
 
 @frappe.whitelist()
-def create_sales_invoice(ipc_name: str) -> str:
+@instrument("create_sales_invoice")
+def create_sales_invoice(ipc_name: str, idempotency_key: str = None) -> str:
     """
     Create and submit a Sales Invoice from an IPC document.
 
+    The IPC row is locked (SELECT ... FOR UPDATE) until the request
+    commits, so concurrent calls for the same IPC run one after the other
+    and only the first creates an invoice.
+
     Args:
         ipc_name: Name of the IPC document
+        idempotency_key: Optional key identifying the request; a retry with
+            the key of the request that invoiced the IPC returns that invoice
 
     Returns:
         Name of the created Sales Invoice
     """
-    # Get the IPC document
-    ipc = frappe.get_doc("IPC", ipc_name)
+    ipc = frappe.db.get_value("IPC", ipc_name, INVOICE_IPC_FIELDS, as_dict=True, for_update=True)
+    if not ipc:
+        frappe.throw(_("IPC {0} not found").format(ipc_name), frappe.DoesNotExistError)
+
+    if ipc.sales_invoice and idempotency_key and ipc.invoice_idempotency_key == idempotency_key:
+        return ipc.sales_invoice
+
+    validate_ipc_for_invoice(ipc)
+
+    sales_invoice = make_sales_invoice(
+        ipc,
+        get_invoice_defaults(ipc.company, ipc.customer),
+        workflow_active=is_ipc_workflow_active(),
+        idempotency_key=idempotency_key
+    )
+
+    frappe.msgprint(
+        _("Sales Invoice {0} created successfully.").format(
+            frappe.utils.get_link_to_form("Sales Invoice", sales_invoice.name)
+        ),
+        title=_("Invoice Created"),
+        indicator="green"
+    )
+
+    return sales_invoice.name
 
-    # Validate IPC state
+
+def validate_ipc_for_invoice(ipc):
+    """Ensure the IPC is submitted and not invoiced yet."""
     if ipc.docstatus != 1:
         frappe.throw(
             _("IPC must be submitted before creating a Sales Invoice."),
@@ -109,27 +505,103 @@ def create_sales_invoice(ipc_name: str) -> str:
             title=_("Already Invoiced")
         )
 
-    # Get company settings for income account
-    company = frappe.get_doc("Company", ipc.company)
-    default_income_account = company.default_income_account
 
-    if not default_income_account:
+def is_ipc_workflow_active() -> bool:
+    """Check whether an active workflow is configured for IPC, from the workflow cache."""
+    return bool(get_workflow_name("IPC"))
+
+
+def get_invoice_defaults(company: str, customer: str, masters: dict = None) -> frappe._dict:
+    """
+    Get the income account, cost center and currency for invoicing an IPC.
+
+    Args:
+        company: Company of the IPC
+        customer: Customer of the IPC
+        masters: Optional cache of Company and Customer values, filled by
+            `load_invoice_masters` or on demand from the document cache,
+            so repeated calls read each master only once
+
+    Returns:
+        Dictionary with income_account, cost_center and currency
+    """
+    if masters is None:
+        masters = {}
+
+    company_key = ("Company", company)
+    if company_key not in masters:
+        masters[company_key] = frappe._dict(zip(
+            ["default_income_account", "default_currency", "cost_center"],
+            frappe.get_cached_value(
+                "Company", company, ["default_income_account", "default_currency", "cost_center"]
+            ) or [None, None, None],
+            strict=True
+        ))
+
+    customer_key = ("Customer", customer)
+    if customer_key not in masters:
+        masters[customer_key] = frappe.get_cached_value("Customer", customer, "default_currency")
+
+    company_details = masters[company_key]
+
+    if not company_details.default_income_account:
         frappe.throw(
-            _("Please set Default Income Account in Company {0}").format(ipc.company),
+            _("Please set Default Income Account in Company {0}").format(company),
             title=_("Missing Configuration")
         )
 
-    # Get customer default currency or company currency
-    customer = frappe.get_doc("Customer", ipc.customer)
-    currency = customer.default_currency or company.default_currency
+    return frappe._dict({
+        "income_account": company_details.default_income_account,
+        "cost_center": company_details.cost_center,
+        "currency": masters[customer_key] or company_details.default_currency
+    })
+
+
+def load_invoice_masters(ipcs: list, masters: dict) -> None:
+    """Fill the master cache for all companies and customers of the given IPCs in two queries."""
+    companies = {ipc.company for ipc in ipcs} - {key[1] for key in masters if key[0] == "Company"}
+    customers = {ipc.customer for ipc in ipcs} - {key[1] for key in masters if key[0] == "Customer"}
+
+    if companies:
+        for company in frappe.get_all(
+            "Company",
+            filters={"name": ["in", list(companies)]},
+            fields=["name", "default_income_account", "default_currency", "cost_center"]
+        ):
+            masters[("Company", company.pop("name"))] = company
+
+    if customers:
+        for customer in frappe.get_all(
+            "Customer",
+            filters={"name": ["in", list(customers)]},
+            fields=["name", "default_currency"]
+        ):
+            masters[("Customer", customer.name)] = customer.default_currency
+
 
-    # Create Sales Invoice
+def make_sales_invoice(ipc, invoice_defaults: dict, workflow_active: bool = False,
+                       idempotency_key: str = None):
+    """
+    Insert and submit the Sales Invoice for an IPC and link it back.
+
+    Does not commit; callers decide the transaction boundary and must
+    hold the lock on the IPC row.
+
+    Args:
+        ipc: IPC document or dict with `INVOICE_IPC_FIELDS`
+        invoice_defaults: Result of `get_invoice_defaults`
+        workflow_active: Whether to move the IPC workflow state to Invoiced
+        idempotency_key: Key of the request, stored on the IPC for retries
+
+    Returns:
+        The submitted Sales Invoice document
+    """
     sales_invoice = frappe.new_doc("Sales Invoice")
     sales_invoice.customer = ipc.customer
     sales_invoice.company = ipc.company
-    sales_invoice.currency = currency
+    sales_invoice.currency = invoice_defaults.currency
     sales_invoice.project = ipc.project
-    sales_invoice.ipc = ipc_name  # Custom link field
+    sales_invoice.ipc = ipc.name  # Custom link field
 
     # Set posting date
     sales_invoice.posting_date = frappe.utils.today()
@@ -137,7 +609,7 @@ def create_sales_invoice(ipc_name: str) -> str:
 
     # Add item for IPC work done
     description = _("Interim Payment Certificate: {0}\nPeriod: {1} to {2}").format(
-        ipc_name,
+        ipc.name,
         frappe.format_value(ipc.period_from, {"fieldtype": "Date"}),
         frappe.format_value(ipc.period_to, {"fieldtype": "Date"})
     )
@@ -148,9 +620,9 @@ def create_sales_invoice(ipc_name: str) -> str:
         "qty": 1,
         "rate": flt(ipc.net_amount),
         "amount": flt(ipc.net_amount),
-        "income_account": default_income_account,
+        "income_account": invoice_defaults.income_account,
         "project": ipc.project,
-        "cost_center": company.cost_center
+        "cost_center": invoice_defaults.cost_center
     })
 
     # Set taxes and charges if available
@@ -161,30 +633,149 @@ def create_sales_invoice(ipc_name: str) -> str:
     sales_invoice.insert()
     sales_invoice.submit()
 
-    # Update IPC with Sales Invoice reference and status
-    frappe.db.set_value("IPC", ipc_name, {
+    # Update IPC with Sales Invoice reference, status and workflow state
+    values = {
         "sales_invoice": sales_invoice.name,
-        "status": "Invoiced"
-    })
+        "status": "Invoiced",
+        "invoice_idempotency_key": idempotency_key
+    }
+    if workflow_active:
+        values["workflow_state"] = "Invoiced"
 
-    # Update workflow state if workflow is active
-    if frappe.db.exists("Workflow", {"document_type": "IPC", "is_active": 1}):
-        frappe.db.set_value("IPC", ipc_name, "workflow_state", "Invoiced")
+    frappe.db.set_value("IPC", ipc.name, values)
+    update_monthly_rollup_invoiced(ipc)
+    clear_summary_cache([ipc])
+    publish_ipc_update(ipc, "invoice", values)
 
-    frappe.db.commit()
+    return sales_invoice
+
+
+@frappe.whitelist()
+@instrument("enqueue_bulk_sales_invoices")
+def enqueue_bulk_sales_invoices(customer: str = None, project: str = None) -> dict:
+    """
+    Queue Sales Invoice creation for all pending IPCs as a background job.
+
+    Uses the same filters as `contracting_ipc.api.get_pending_ipcs`.
+
+    Args:
+        customer: Optional customer filter
+        project: Optional project filter
+
+    Returns:
+        Dictionary with the number of IPCs queued
+    """
+    from contracting_ipc.api import get_pending_ipc_filters
+
+    frappe.has_permission("Sales Invoice", "create", throw=True)
+
+    ipc_names = frappe.get_all(
+        "IPC",
+        filters=get_pending_ipc_filters(customer, project),
+        pluck="name",
+        order_by="creation asc"
+    )
+
+    if not ipc_names:
+        frappe.msgprint(_("There are no pending IPCs to invoice."))
+        return {"count": 0}
+
+    frappe.enqueue(
+        "contracting_ipc.contracting_ipc.doctype.ipc.ipc.make_bulk_sales_invoices",
+        queue="long",
+        timeout=3600,
+        ipc_names=ipc_names
+    )
 
     frappe.msgprint(
-        _("Sales Invoice {0} created successfully.").format(
-            frappe.utils.get_link_to_form("Sales Invoice", sales_invoice.name)
-        ),
-        title=_("Invoice Created"),
-        indicator="green"
+        _("Sales Invoice creation for {0} IPCs has been queued.").format(len(ipc_names)),
+        alert=True
     )
 
-    return sales_invoice.name
+    return {"count": len(ipc_names)}
+
+
+@instrument("make_bulk_sales_invoices")
+def make_bulk_sales_invoices(ipc_names: list) -> dict:
+    """
+    Create Sales Invoices for many IPCs, committing once per chunk.
+
+    Master data is loaded once per chunk for all its companies and
+    customers. An IPC that fails is rolled back on its own and reported,
+    the rest of the chunk is still invoiced.
+
+    Args:
+        ipc_names: Names of the IPCs to invoice
+
+    Returns:
+        Dictionary with the created invoices and the per-IPC failures
+    """
+    from contracting_ipc.api import get_pending_ipc_filters
+
+    total = len(ipc_names)
+    workflow_active = is_ipc_workflow_active()
+    masters = {}
+    invoiced, failed = [], []
+
+    for start in range(0, total, INVOICE_CHUNK_SIZE):
+        chunk = ipc_names[start:start + INVOICE_CHUNK_SIZE]
+
+        # Lock the chunk's rows, so an IPC invoiced concurrently through
+        # create_sales_invoice or another job is skipped, never duplicated
+        filters = get_pending_ipc_filters()
+        filters["name"] = ["in", chunk]
+        ipcs = frappe.get_all("IPC", filters=filters, fields=INVOICE_IPC_FIELDS, for_update=True)
+
+        # IPCs invoiced or cancelled since the job was queued
+        for ipc_name in set(chunk) - {ipc.name for ipc in ipcs}:
+            failed.append({"ipc": ipc_name, "error": _("IPC is no longer pending invoicing.")})
+
+        load_invoice_masters(ipcs, masters)
+
+        for ipc in ipcs:
+            frappe.db.savepoint("bulk_sales_invoice")
+            try:
+                sales_invoice = make_sales_invoice(
+                    ipc,
+                    get_invoice_defaults(ipc.company, ipc.customer, masters),
+                    workflow_active=workflow_active
+                )
+                invoiced.append({"ipc": ipc.name, "sales_invoice": sales_invoice.name})
+            except Exception as e:
+                frappe.db.rollback(save_point="bulk_sales_invoice")
+                failed.append({"ipc": ipc.name, "error": str(e)})
+                frappe.log_error(
+                    title=_("Bulk Sales Invoice creation failed for IPC {0}").format(ipc.name),
+                    reference_doctype="IPC",
+                    reference_name=ipc.name
+                )
+            finally:
+                frappe.clear_messages()
+
+        frappe.db.commit()
+
+        processed = min(start + INVOICE_CHUNK_SIZE, total)
+        frappe.publish_progress(
+            processed * 100 / total,
+            title=_("Creating Sales Invoices"),
+            description=_("{0} of {1} IPCs processed").format(processed, total)
+        )
+
+    summary = {"total": total, "invoiced": invoiced, "failed": failed}
+    frappe.publish_realtime("ipc_bulk_invoice_complete", summary, user=frappe.session.user)
+
+    return summary
+
+
+# IPC fields shown on dashboards, list badges and kanban cards
+DASHBOARD_FIELDS = [
+    "name", "total_work_done", "retention_amount", "advance_deduction",
+    "net_amount", "status", "sales_invoice"
+]
 
 
 @frappe.whitelist()
+@instrument("get_ipc_dashboard_data")
 def get_ipc_dashboard_data(ipc_name: str) -> dict:
     """
     Get dashboard data for an IPC document.
@@ -195,9 +786,42 @@ def get_ipc_dashboard_data(ipc_name: str) -> dict:
     Returns:
         Dictionary containing dashboard data
     """
-    ipc = frappe.get_doc("IPC", ipc_name)
+    ipc = frappe.db.get_value("IPC", ipc_name, DASHBOARD_FIELDS, as_dict=True)
+    if not ipc:
+        frappe.throw(_("IPC {0} not found").format(ipc_name), frappe.DoesNotExistError)
 
-    data = {
+    return get_dashboard_values(ipc)
+
+
+@frappe.whitelist()
+@instrument("get_ipc_dashboard_data_bulk")
+def get_ipc_dashboard_data_bulk(ipc_names) -> dict:
+    """
+    Get dashboard data for many IPCs with a single query.
+
+    Args:
+        ipc_names: List of IPC names (or JSON list)
+
+    Returns:
+        Dictionary of IPC name -> dashboard data, for the IPCs the user can read
+    """
+    ipc_names = frappe.parse_json(ipc_names) if isinstance(ipc_names, str) else ipc_names
+    if not ipc_names:
+        return {}
+
+    ipcs = frappe.get_list(
+        "IPC",
+        filters={"name": ["in", ipc_names]},
+        fields=DASHBOARD_FIELDS,
+        limit_page_length=0
+    )
+
+    return {ipc.name: get_dashboard_values(ipc) for ipc in ipcs}
+
+
+def get_dashboard_values(ipc) -> dict:
+    """Build the dashboard payload from IPC field values."""
+    return {
         "total_work_done": flt(ipc.total_work_done),
         "retention_amount": flt(ipc.retention_amount),
         "advance_deduction": flt(ipc.advance_deduction),
@@ -206,5 +830,3 @@ def get_ipc_dashboard_data(ipc_name: str) -> dict:
         "has_invoice": bool(ipc.sales_invoice),
         "invoice_name": ipc.sales_invoice
     }
-
-    return data
@@ -0,0 +1,313 @@
+// Copyright (c) 2024, Your Company and contributors
+// For license information, please see license.txt
+
+frappe.listview_settings["IPC"] = {
+    add_fields: ["status", "sales_invoice", "net_amount"],
+
+    /**
+     * Status badge from list fields, without loading each document
+     */
+    get_indicator: function (doc) {
+        if (doc.status === "Invoiced" || doc.sales_invoice) {
+            return [__("Invoiced"), "green", "status,=,Invoiced"];
+        } else if (doc.status === "Approved") {
+            return [__("Approved"), "blue", "status,=,Approved"];
+        }
+        return [__("Draft"), "orange", "status,=,Draft"];
+    },
+
+    /**
+     * List view load handler - adds bulk actions
+     */
+    onload: function (listview) {
+        listview.page.add_inner_button(__("Invoice Pending IPCs"), function () {
+            frappe.listview_settings["IPC"].invoice_pending_ipcs(listview);
+        });
+
+        listview.page.add_inner_button(__("Import IPCs"), function () {
+            frappe.listview_settings["IPC"].import_ipcs(listview);
+        });
+
+        listview.page.add_inner_button(__("Recalculate Retention"), function () {
+            frappe.listview_settings["IPC"].recalculate_retention(listview);
+        });
+
+        listview.page.add_actions_menu_item(__("Print in Background"), function () {
+            frappe.listview_settings["IPC"].bulk_print(listview.get_checked_items(true));
+        }, false);
+
+        frappe.realtime.off("ipc_bulk_print_ready");
+        frappe.realtime.on("ipc_bulk_print_ready", function (data) {
+            frappe.listview_settings["IPC"].show_bulk_print_ready(data);
+        });
+
+        frappe.realtime.off("ipc_import_complete");
+        frappe.realtime.on("ipc_import_complete", function (report) {
+            frappe.listview_settings["IPC"].show_import_report(report);
+            listview.refresh();
+        });
+
+        frappe.realtime.off("ipc_bulk_invoice_complete");
+        frappe.realtime.on("ipc_bulk_invoice_complete", function (summary) {
+            frappe.listview_settings["IPC"].show_bulk_invoice_summary(summary);
+            listview.refresh();
+        });
+
+        // Refresh on submissions, cancellations, workflow transitions and
+        // invoicing, instead of polling
+        let settings = frappe.listview_settings["IPC"];
+        if (settings.ipc_update_handler) {
+            frappe.realtime.off("ipc_update", settings.ipc_update_handler);
+        }
+        settings.ipc_update_handler = frappe.utils.debounce(function () {
+            if (listview.$result.is(":visible")) {
+                listview.refresh();
+            }
+        }, 1000);
+
+        frappe.realtime.doctype_subscribe("IPC");
+        frappe.realtime.on("ipc_update", settings.ipc_update_handler);
+    },
+
+    /**
+     * Queue Sales Invoice creation for pending IPCs
+     */
+    invoice_pending_ipcs: function (listview) {
+        let dialog = new frappe.ui.Dialog({
+            title: __("Invoice Pending IPCs"),
+            fields: [
+                {
+                    fieldname: "customer",
+                    label: __("Customer"),
+                    fieldtype: "Link",
+                    options: "Customer"
+                },
+                {
+                    fieldname: "project",
+                    label: __("Project"),
+                    fieldtype: "Link",
+                    options: "Project"
+                }
+            ],
+            primary_action_label: __("Create Sales Invoices"),
+            primary_action: function (values) {
+                dialog.hide();
+                frappe.call({
+                    method: "contracting_ipc.contracting_ipc.doctype.ipc.ipc.enqueue_bulk_sales_invoices",
+                    args: values,
+                    freeze: true,
+                    freeze_message: __("Queueing Sales Invoices...")
+                });
+            }
+        });
+        dialog.show();
+    },
+
+    /**
+     * Queue background rendering of the selected IPCs into one PDF or ZIP file
+     */
+    bulk_print: function (names) {
+        if (!names.length) {
+            frappe.msgprint(__("Please select the IPCs to print."));
+            return;
+        }
+
+        frappe.prompt(
+            [
+                {
+                    fieldname: "print_format",
+                    label: __("Print Format"),
+                    fieldtype: "Link",
+                    options: "Print Format",
+                    default: "IPC Standard",
+                    reqd: 1,
+                    get_query: function () {
+                        return {filters: {doc_type: "IPC"}};
+                    }
+                },
+                {
+                    fieldname: "letterhead",
+                    label: __("Letter Head"),
+                    fieldtype: "Link",
+                    options: "Letter Head"
+                },
+                {
+                    fieldname: "file_format",
+                    label: __("File Format"),
+                    fieldtype: "Select",
+                    options: "PDF\nZIP",
+                    default: "PDF",
+                    reqd: 1
+                }
+            ],
+            function (values) {
+                frappe.call({
+                    method: "contracting_ipc.bulk_print.enqueue_bulk_print",
+                    args: Object.assign({names: names}, values),
+                    freeze: true
+                });
+            },
+            __("Print {0} IPCs", [names.length]),
+            __("Print")
+        );
+    },
+
+    /**
+     * Offer the file of a finished bulk print
+     */
+    show_bulk_print_ready: function (data) {
+        let message = __("{0} IPC certificates are ready: {1}", [
+            data.count,
+            `<a href="${data.file_url}" target="_blank">${data.file_name}</a>`
+        ]);
+
+        if (data.failed.length) {
+            let rows = data.failed.map(function (row) {
+                return `<tr><td>${row.ipc}</td><td>${frappe.utils.escape_html(row.error)}</td></tr>`;
+            });
+            message += `<table class="table table-bordered" style="margin-top: 15px;">
+                <thead><tr><th>${__("IPC")}</th><th>${__("Error")}</th></tr></thead>
+                <tbody>${rows.join("")}</tbody>
+            </table>`;
+        }
+
+        frappe.msgprint({
+            title: __("Print Ready"),
+            indicator: data.failed.length ? "orange" : "green",
+            message: message
+        });
+    },
+
+    /**
+     * Queue a bulk import of IPCs from a CSV or JSON file
+     */
+    import_ipcs: function (listview) {
+        let dialog = new frappe.ui.Dialog({
+            title: __("Import IPCs"),
+            fields: [
+                {
+                    fieldname: "file_url",
+                    label: __("CSV or JSON File"),
+                    fieldtype: "Attach",
+                    reqd: 1
+                },
+                {
+                    fieldname: "submit",
+                    label: __("Import as Approved (Submitted)"),
+                    fieldtype: "Check"
+                }
+            ],
+            primary_action_label: __("Import"),
+            primary_action: function (values) {
+                dialog.hide();
+                frappe.call({
+                    method: "contracting_ipc.ipc_import.enqueue_ipc_import",
+                    args: values,
+                    freeze: true
+                });
+            }
+        });
+        dialog.show();
+    },
+
+    /**
+     * Apply a new retention percentage to draft IPCs after previewing the deltas
+     */
+    recalculate_retention: function (listview) {
+        let method = "contracting_ipc.recalculation.recalculate_retention";
+        let dialog = new frappe.ui.Dialog({
+            title: __("Recalculate Retention"),
+            fields: [
+                {fieldname: "contract", label: __("Contract"), fieldtype: "Link", options: "Contract"},
+                {fieldname: "project", label: __("Project"), fieldtype: "Link", options: "Project"},
+                {fieldname: "company", label: __("Company"), fieldtype: "Link", options: "Company"},
+                {
+                    fieldname: "retention_percentage",
+                    label: __("New Retention Percentage (%)"),
+                    fieldtype: "Float",
+                    reqd: 1
+                }
+            ],
+            primary_action_label: __("Preview"),
+            primary_action: function (values) {
+                frappe.call({
+                    method: method,
+                    args: Object.assign({dry_run: 1}, values),
+                    freeze: true,
+                    callback: function (r) {
+                        let changes = r.message;
+                        frappe.confirm(
+                            __("{0} draft IPCs will change. Retention changes by {1} and Net Amount by {2}. Apply?", [
+                                changes.count,
+                                format_currency(changes.retention_delta),
+                                format_currency(changes.net_delta)
+                            ]),
+                            function () {
+                                dialog.hide();
+                                frappe.call({
+                                    method: method,
+                                    args: Object.assign({dry_run: 0}, values),
+                                    freeze: true,
+                                    callback: function () {
+                                        listview.refresh();
+                                    }
+                                });
+                            }
+                        );
+                    }
+                });
+            }
+        });
+        dialog.show();
+    },
+
+    /**
+     * Show the row-level report of a bulk import
+     */
+    show_import_report: function (report) {
+        let message = __("{0} of {1} IPCs imported.", [report.imported.length, report.total]);
+
+        if (report.errors.length) {
+            let rows = report.errors.map(function (error) {
+                let errors = error.errors.map(frappe.utils.escape_html).join("<br>");
+                return `<tr><td>${error.row}</td><td>${errors}</td></tr>`;
+            });
+            message += `<table class="table table-bordered" style="margin-top: 15px;">
+                <thead><tr><th>${__("Row")}</th><th>${__("Errors")}</th></tr></thead>
+                <tbody>${rows.join("")}</tbody>
+            </table>`;
+        }
+
+        frappe.msgprint({
+            title: __("IPC Import Complete"),
+            indicator: report.errors.length ? "orange" : "green",
+            message: message
+        });
+    },
+
+    /**
+     * Show the outcome of a bulk invoicing job
+     */
+    show_bulk_invoice_summary: function (summary) {
+        let message = __("{0} Sales Invoices created out of {1} IPCs.", [
+            summary.invoiced.length,
+            summary.total
+        ]);
+
+        if (summary.failed.length) {
+            let rows = summary.failed.map(function (row) {
+                return `<tr><td>${row.ipc}</td><td>${frappe.utils.escape_html(row.error)}</td></tr>`;
+            });
+            message += `<table class="table table-bordered" style="margin-top: 15px;">
+                <thead><tr><th>${__("IPC")}</th><th>${__("Error")}</th></tr></thead>
+                <tbody>${rows.join("")}</tbody>
+            </table>`;
+        }
+
+        frappe.msgprint({
+            title: __("Bulk Invoicing Complete"),
+            indicator: summary.failed.length ? "orange" : "green",
+            message: message
+        });
+    }
+};
@@ -2,6 +2,8 @@
 Test cases for IPC DocType.
 """
 
+from unittest.mock import patch
+
 import frappe
 from frappe.tests.utils import FrappeTestCase
 from frappe.utils import flt, today, add_days
@@ -10,6 +12,9 @@ from frappe.utils import flt, today, add_days
 class TestIPC(FrappeTestCase):
     """Test cases for IPC (Interim Payment Certificate) DocType."""
 
+    # Start of the next period handed out by get_test_period
+    next_period_start = "2050-01-01"
+
     @classmethod
     def setUpClass(cls):
         """Set up test data."""
@@ -47,21 +52,66 @@ class TestIPC(FrappeTestCase):
             })
             project.insert(ignore_permissions=True)
 
-    def get_ipc_doc(self, **kwargs):
-        """Create an IPC document with default values."""
-        default_values = {
+    @classmethod
+    def set_invoice_defaults(cls):
+        """Set the income account and cost center Sales Invoices of _Test Company need."""
+        company = frappe.get_doc("Company", "_Test Company")
+        if not company.default_income_account:
+            company.default_income_account = frappe.db.get_value(
+                "Account", {"company": company.name, "root_type": "Income", "is_group": 0}
+            )
+        if not company.cost_center:
+            company.cost_center = frappe.db.get_value(
+                "Cost Center", {"company": company.name, "is_group": 0}
+            )
+        company.save()
+
+    @classmethod
+    def get_test_period(cls, days=30):
+        """
+        Get a (period_from, period_to) no other test IPC uses, since IPCs of
+        a project or contract must not overlap.
+        """
+        period_from = TestIPC.next_period_start
+        TestIPC.next_period_start = add_days(period_from, days + 1)
+        return period_from, add_days(period_from, days)
+
+    @classmethod
+    def make_ipc(cls, insert=True, submit=False, **kwargs):
+        """
+        Make a test IPC on _Test Project, for a period of its own unless one is given.
+
+        Args:
+            insert: Insert the IPC
+            submit: Insert and submit the IPC
+            **kwargs: Field values overriding the defaults
+
+        Returns:
+            The IPC document
+        """
+        values = {
             "doctype": "IPC",
             "customer": "_Test Customer",
             "project": "_Test Project",
             "company": "_Test Company",
-            "period_from": today(),
-            "period_to": add_days(today(), 30),
             "total_work_done": 100000,
-            "retention_percentage": 10,
-            "advance_deduction": 5000
+            "retention_percentage": 10
         }
-        default_values.update(kwargs)
-        return frappe.get_doc(default_values)
+        if "period_from" not in kwargs:
+            values["period_from"], values["period_to"] = cls.get_test_period()
+        values.update(kwargs)
+
+        ipc = frappe.get_doc(values)
+        if insert or submit:
+            ipc.insert()
+        if submit:
+            ipc.submit()
+        return ipc
+
+    def get_ipc_doc(self, **kwargs):
+        """Create an IPC document with default values."""
+        kwargs.setdefault("advance_deduction", 5000)
+        return self.make_ipc(insert=False, **kwargs)
 
     def test_retention_calculation(self):
         """Test that retention amount is calculated correctly."""
@@ -122,3 +172,129 @@ class TestIPC(FrappeTestCase):
 
         ipc.reload()
         self.assertEqual(ipc.status, "Approved")
+
+    def test_dashboard_data_bulk(self):
+        """Test that bulk dashboard data matches the single-IPC endpoint."""
+        from contracting_ipc.contracting_ipc.doctype.ipc.ipc import (
+            get_ipc_dashboard_data,
+            get_ipc_dashboard_data_bulk,
+        )
+
+        first = self.get_ipc_doc(total_work_done=50000)
+        first.insert()
+        second = self.get_ipc_doc(total_work_done=70000)
+        second.insert()
+
+        bulk = get_ipc_dashboard_data_bulk([first.name, second.name])
+
+        self.assertEqual(bulk[first.name], get_ipc_dashboard_data(first.name))
+        self.assertEqual(bulk[second.name]["net_amount"], flt(second.net_amount))
+        self.assertFalse(bulk[second.name]["has_invoice"])
+
+    def test_cumulative_amounts(self):
+        """Test that cumulative fields chain through submit, cancel and amend."""
+        previous = flt(frappe.db.get_value("IPC Project Totals", "_Test Project", "total_work_done"))
+
+        first = self.get_ipc_doc(total_work_done=40000)
+        first.insert()
+        first.submit()
+        self.assertEqual(flt(first.previous_certified), previous)
+        self.assertEqual(flt(first.certified_to_date), previous + 40000)
+
+        second = self.get_ipc_doc(total_work_done=25000)
+        second.insert()
+        second.submit()
+        self.assertEqual(flt(second.previous_certified), previous + 40000)
+        self.assertEqual(flt(second.certified_to_date), previous + 65000)
+
+        # Amending the second IPC replaces its work done in the running balance
+        second.cancel()
+        amended = frappe.copy_doc(second)
+        amended.amended_from = second.name
+        amended.total_work_done = 30000
+        amended.insert()
+        amended.submit()
+        self.assertEqual(flt(amended.previous_certified), previous + 40000)
+        self.assertEqual(flt(amended.certified_to_date), previous + 70000)
+
+    def test_backfill_matches_running_balances(self):
+        """Test that the backfill patch sets the cumulative fields and ledger the way submission does."""
+        from contracting_ipc.patches.v1_0 import backfill_ipc_cumulative_amounts
+
+        contract = frappe.get_doc({
+            "doctype": "Contract",
+            "party_type": "Customer",
+            "party_name": "_Test Customer",
+            "start_date": "2050-01-01",
+            "contract_terms": "_Test Contract Terms"
+        }).insert(ignore_permissions=True).name
+
+        previous = flt(frappe.db.get_value("IPC Project Totals", "_Test Project", "total_work_done"))
+        ipcs = []
+        for kwargs in ({"contract": contract}, {}, {"contract": contract}, {}):
+            ipc = self.get_ipc_doc(advance_deduction=0, **kwargs)
+            ipc.insert()
+            ipc.submit()
+            ipcs.append(ipc)
+
+        # The project balance counts the IPCs that have a contract too
+        self.assertEqual(flt(ipcs[1].previous_certified), previous + flt(ipcs[0].total_work_done))
+        expected = {ipc.name: (flt(ipc.previous_certified), flt(ipc.certified_to_date)) for ipc in ipcs}
+        totals = flt(frappe.db.get_value("IPC Project Totals", "_Test Project", "total_work_done"))
+
+        frappe.db.delete("IPC Project Totals", {"name": "_Test Project"})
+        for ipc in ipcs:
+            frappe.db.set_value("IPC", ipc.name, {"previous_certified": 0, "certified_to_date": 0})
+
+        backfill_ipc_cumulative_amounts.execute()
+
+        self.assertEqual(
+            flt(frappe.db.get_value("IPC Project Totals", "_Test Project", "total_work_done")), totals
+        )
+        for ipc in ipcs:
+            values = frappe.db.get_value("IPC", ipc.name, ["previous_certified", "certified_to_date"])
+            self.assertEqual(tuple(flt(value) for value in values), expected[ipc.name], ipc.name)
+
+    def test_realtime_updates(self):
+        """Test that submit and cancel publish the new state to the form and list rooms."""
+        from frappe.realtime import get_doc_room, get_doctype_room
+
+        ipc = self.get_ipc_doc()
+        ipc.insert()
+
+        with patch("frappe.publish_realtime") as publish_realtime:
+            ipc.submit()
+            ipc.cancel()
+
+        messages = [
+            (call.kwargs["room"], call.args[1]["event"], call.args[1]["status"])
+            for call in publish_realtime.call_args_list
+            if call.args[0] == "ipc_update"
+        ]
+        self.assertEqual(messages, [
+            (get_doc_room("IPC", ipc.name), "submit", "Approved"),
+            (get_doctype_room("IPC"), "submit", "Approved"),
+            (get_doc_room("IPC", ipc.name), "cancel", "Draft"),
+            (get_doctype_room("IPC"), "cancel", "Draft")
+        ])
+        self.assertEqual(publish_realtime.call_args_list[0].args[1]["net_amount"], ipc.net_amount)
+
+    def test_project_numbering(self):
+        """Test that IPCs are numbered within their project and amendments keep the number."""
+        from contracting_ipc.contracting_ipc.doctype.ipc.ipc import get_ipc_name
+
+        first = self.get_ipc_doc()
+        first.insert()
+        second = self.get_ipc_doc()
+        second.insert()
+
+        self.assertEqual(second.ipc_number, first.ipc_number + 1)
+        self.assertEqual(second.name, get_ipc_name("_Test Project", second.ipc_number))
+
+        second.submit()
+        second.cancel()
+        amended = frappe.copy_doc(second)
+        amended.amended_from = second.name
+        amended.insert()
+        self.assertEqual(amended.ipc_number, second.ipc_number)
+        self.assertEqual(amended.name, f"{second.name}-1")
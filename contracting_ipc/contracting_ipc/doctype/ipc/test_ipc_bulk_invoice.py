@@ -0,0 +1,108 @@
+"""
+Test cases for bulk Sales Invoice creation from IPCs.
+"""
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from contracting_ipc.contracting_ipc.doctype.ipc import ipc as ipc_module
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+
+TEST_PROJECT = "_Test Bulk Invoice Project"
+
+
+class TestIPCBulkInvoice(FrappeTestCase):
+    """Test queueing and running bulk invoicing of pending IPCs."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data and the company's invoicing defaults."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+        test_ipc.TestIPC.set_invoice_defaults()
+
+        if not frappe.db.exists("Project", TEST_PROJECT):
+            frappe.get_doc({
+                "doctype": "Project",
+                "project_name": TEST_PROJECT,
+                "company": "_Test Company"
+            }).insert(ignore_permissions=True)
+
+    def setUp(self):
+        """Submit pending IPCs for the test project."""
+        frappe.db.savepoint("test_bulk_invoice")
+        self.ipcs = []
+        for idx in range(5):
+            self.ipcs.append(test_ipc.TestIPC.make_ipc(
+                submit=True, project=TEST_PROJECT, total_work_done=10000 * (idx + 1)
+            ))
+
+    def tearDown(self):
+        """Drop the IPCs and invoices of the test, so every test starts with only its own pending IPCs."""
+        frappe.db.rollback(save_point="test_bulk_invoice")
+
+    def queue_bulk_invoices(self):
+        """Queue bulk invoicing for the test project; returns the IPC names given to the job."""
+        with patch("frappe.enqueue") as enqueue:
+            result = ipc_module.enqueue_bulk_sales_invoices(project=TEST_PROJECT)
+
+        ipc_names = enqueue.call_args.kwargs["ipc_names"]
+        self.assertEqual(result["count"], len(ipc_names))
+        return ipc_names
+
+    def run_bulk_invoices(self, ipc_names):
+        """Run the bulk invoicing job in small chunks, keeping its commits in the test transaction."""
+        with patch.object(ipc_module, "INVOICE_CHUNK_SIZE", 2), patch.object(frappe.db, "commit"):
+            return ipc_module.make_bulk_sales_invoices(ipc_names)
+
+    def get_invoices(self, ipc_name):
+        """Get the Sales Invoices created for an IPC."""
+        return frappe.get_all("Sales Invoice", filters={"ipc": ipc_name}, pluck="name")
+
+    def test_failed_ipc_is_rolled_back_alone(self):
+        """Test that one failing IPC is rolled back and reported while the others are invoiced."""
+        failing = self.ipcs[2].name
+        make_sales_invoice = ipc_module.make_sales_invoice
+
+        def make_sales_invoice_failing(ipc, *args, **kwargs):
+            # Fail after the invoice is inserted and linked, so the savepoint has work to undo
+            sales_invoice = make_sales_invoice(ipc, *args, **kwargs)
+            if ipc.name == failing:
+                frappe.throw("Test failure")
+            return sales_invoice
+
+        ipc_names = self.queue_bulk_invoices()
+        with patch.object(ipc_module, "make_sales_invoice", side_effect=make_sales_invoice_failing):
+            summary = self.run_bulk_invoices(ipc_names)
+
+        self.assertEqual(summary["total"], 5)
+        self.assertEqual([row["ipc"] for row in summary["failed"]], [failing])
+        self.assertEqual(summary["failed"][0]["error"], "Test failure")
+        self.assertCountEqual(
+            [row["ipc"] for row in summary["invoiced"]],
+            [ipc.name for ipc in self.ipcs if ipc.name != failing]
+        )
+
+        self.assertFalse(frappe.db.get_value("IPC", failing, "sales_invoice"))
+        self.assertFalse(self.get_invoices(failing))
+        for row in summary["invoiced"]:
+            self.assertEqual(frappe.db.get_value("IPC", row["ipc"], "sales_invoice"), row["sales_invoice"])
+
+    def test_ipc_invoiced_after_queueing_is_skipped(self):
+        """Test that an IPC invoiced between queueing and the job run is not invoiced twice."""
+        ipc_names = self.queue_bulk_invoices()
+        invoiced_first = ipc_module.create_sales_invoice(self.ipcs[0].name)
+
+        summary = self.run_bulk_invoices(ipc_names)
+
+        self.assertEqual(summary["total"], 5)
+        self.assertEqual(len(summary["invoiced"]), 4)
+        self.assertEqual(
+            summary["failed"], [{"ipc": self.ipcs[0].name, "error": "IPC is no longer pending invoicing."}]
+        )
+        self.assertEqual(self.get_invoices(self.ipcs[0].name), [invoiced_first])
+
+        # Nothing is left to queue
+        self.assertEqual(ipc_module.enqueue_bulk_sales_invoices(project=TEST_PROJECT), {"count": 0})
@@ -0,0 +1,238 @@
+"""
+Test cases for bulk IPC import.
+"""
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, today
+
+from contracting_ipc import ipc_import
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import get_ipc_name
+from contracting_ipc.contracting_ipc.doctype.ipc_contract_balance.ipc_contract_balance import (
+    get_contract_balance,
+)
+from contracting_ipc.ipc_import import import_ipcs_from_file, prepare_rows, reserve_names
+
+
+class TestIPCImport(FrappeTestCase):
+    """Test cases for validating and calculating imported IPC rows."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+    def get_row(self, **kwargs):
+        """Build an import row with default values."""
+        row = {
+            "customer": "_Test Customer",
+            "project": "_Test Project",
+            "company": "_Test Company",
+            "period_from": "2023-01-01",
+            "period_to": "2023-01-31",
+            "total_work_done": "123456.789",
+            "retention_percentage": "7.5",
+            "advance_deduction": "1000.005"
+        }
+        row.update(kwargs)
+        return row
+
+    def test_amounts_match_document_calculation(self):
+        """Test that imported amounts are rounded exactly like IPC.calculate_amounts."""
+        row = self.get_row()
+        prepared, errors = prepare_rows([row])
+        self.assertFalse(errors)
+
+        ipc = test_ipc.TestIPC.make_ipc(insert=False, **row)
+        ipc.calculate_amounts()
+
+        self.assertEqual(prepared[0].retention_amount, flt(ipc.retention_amount))
+        self.assertEqual(prepared[0].net_amount, flt(ipc.net_amount))
+
+    def test_row_level_errors(self):
+        """Test that invalid rows are reported with their row number."""
+        rows = [
+            self.get_row(),
+            self.get_row(period_from="2023-02-01", period_to="2023-01-01"),
+            self.get_row(customer="_Test Missing Customer"),
+            self.get_row(total_work_done="")
+        ]
+        prepared, errors = prepare_rows(rows)
+
+        self.assertEqual([row.idx for row in prepared], [1])
+        self.assertEqual([error["row"] for error in errors], [2, 3, 4])
+
+    def test_non_numeric_amounts(self):
+        """Test that amounts that are not numbers are reported instead of read as zero."""
+        prepared, errors = prepare_rows([
+            self.get_row(total_work_done="abc"),
+            self.get_row(retention_percentage="ten"),
+            self.get_row(advance_deduction="1,000 USD")
+        ])
+
+        self.assertFalse(prepared)
+        self.assertEqual([error["row"] for error in errors], [1, 2, 3])
+
+    def test_submit_requires_positive_net_amount(self):
+        """Test that rows imported as submitted need a positive net amount."""
+        prepared, errors = prepare_rows([self.get_row(advance_deduction="200000")], submit=True)
+
+        self.assertFalse(prepared)
+        self.assertEqual(errors[0]["row"], 1)
+
+    def test_reserved_names_are_consecutive_per_project(self):
+        """Test that rows are numbered in file order, following each project's counter."""
+        first = [frappe._dict(project="_Test Project") for _i in range(3)]
+        other = [frappe._dict(project="_Test Import Project") for _i in range(2)]
+        second = [frappe._dict(project="_Test Project") for _i in range(2)]
+
+        reserve_names(first + other)
+        reserve_names(second)
+
+        numbers = [row.ipc_number for row in first + second]
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + 5)))
+        self.assertEqual(second[-1].name, get_ipc_name("_Test Project", numbers[-1]))
+        self.assertEqual(other[1].ipc_number, other[0].ipc_number + 1)
+
+    def make_contract(self, **balance):
+        """Create a contract with a balance row holding the given values."""
+        contract = frappe.get_doc({
+            "doctype": "Contract",
+            "party_type": "Customer",
+            "party_name": "_Test Customer",
+            "start_date": today(),
+            "contract_terms": "_Test Contract Terms"
+        }).insert(ignore_permissions=True).name
+        frappe.get_doc({
+            "doctype": "IPC Contract Balance",
+            "contract": contract,
+            "company": "_Test Company"
+        }).insert()
+        frappe.db.set_value("IPC Contract Balance", contract, balance)
+        return contract
+
+    def test_advance_recovery(self):
+        """Test that submitted rows recover the contract's advance like IPCs, up to what is outstanding."""
+        contract = self.make_contract(total_advance=20000, advance_recovery_percentage=10)
+
+        rows = []
+        manual_deductions = {3: 5000}
+        for idx, total_work_done in enumerate((100000, 80000, 50000, 50000), start=1):
+            advance_deduction = manual_deductions.get(idx)
+            period_from, period_to = test_ipc.TestIPC.get_test_period()
+            rows.append(self.get_row(
+                contract=contract, period_from=period_from, period_to=period_to,
+                total_work_done=total_work_done, retention_percentage=10,
+                manual_advance_deduction=1 if advance_deduction else 0, advance_deduction=advance_deduction
+            ))
+
+        with patch.object(frappe.db, "commit"):
+            report = ipc_import.import_ipcs(rows, submit=True)
+
+        # The manual deduction of row 3 exceeds the 2000 left after rows 1 and 2
+        self.assertEqual([error["row"] for error in report["errors"]], [3])
+
+        imported = frappe.get_all(
+            "IPC",
+            filters={"name": ["in", report["imported"]]},
+            fields=["advance_deduction", "net_amount", "total_work_done", "retention_amount"],
+            order_by="ipc_number asc"
+        )
+        self.assertEqual([flt(row.advance_deduction) for row in imported], [10000, 8000, 2000])
+        for row in imported:
+            self.assertEqual(
+                flt(row.net_amount), flt(row.total_work_done - row.retention_amount - row.advance_deduction)
+            )
+        self.assertEqual(flt(get_contract_balance(contract).advance_recovered), 20000)
+
+    def test_row_over_contract_value_is_skipped(self):
+        """Test that a row over its contract's value is reported while the rest of the file is imported."""
+        contract = self.make_contract(contract_value=100000)
+
+        lines = [
+            "customer,project,company,contract,period_from,period_to,total_work_done,retention_percentage"
+        ]
+        for total_work_done in (40000, 50000, 30000, 10000):
+            period_from, period_to = test_ipc.TestIPC.get_test_period()
+            lines.append(",".join([
+                "_Test Customer", "_Test Project", "_Test Company", contract,
+                period_from, period_to, str(total_work_done), "10"
+            ]))
+
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": "ipc_import.csv",
+            "content": "\n".join(lines),
+            "is_private": 1
+        }).insert(ignore_permissions=True)
+
+        project_total = flt(frappe.db.get_value("IPC Project Totals", "_Test Project", "total_work_done"))
+
+        # Two chunks of two rows, each committed on its own
+        with patch.object(ipc_import, "IMPORT_CHUNK_SIZE", 2), patch.object(frappe.db, "commit") as commit:
+            report = import_ipcs_from_file(file_doc.file_url, submit=1)
+
+        self.assertEqual(commit.call_count, 2)
+        self.assertEqual(report["total"], 4)
+        self.assertEqual([error["row"] for error in report["errors"]], [3])
+        self.assertEqual(len(report["imported"]), 3)
+
+        # The skipped row does not count towards the rows after it
+        imported = frappe.get_all(
+            "IPC",
+            filters={"name": ["in", report["imported"]]},
+            fields=["total_work_done", "previous_certified", "certified_to_date", "docstatus"],
+            order_by="ipc_number asc"
+        )
+        self.assertEqual(
+            [(flt(row.previous_certified), flt(row.certified_to_date)) for row in imported],
+            [(0, 40000), (40000, 90000), (90000, 100000)]
+        )
+        self.assertTrue(all(row.docstatus == 1 for row in imported))
+        self.assertEqual(flt(get_contract_balance(contract).certified_to_date), 100000)
+        self.assertEqual(
+            flt(frappe.db.get_value("IPC Project Totals", "_Test Project", "total_work_done")),
+            project_total + 100000
+        )
+        self.assertEqual(
+            frappe.db.count("IPC Retention Ledger Entry", {"voucher_no": ["in", report["imported"]]}), 3
+        )
+
+    def test_import_needs_read_access_to_the_file(self):
+        """Test that an import cannot be queued from a private file the user cannot read."""
+        user = "test_ipc_import@example.com"
+        if not frappe.db.exists("User", user):
+            frappe.get_doc({
+                "doctype": "User",
+                "email": user,
+                "first_name": "IPC Import",
+                "send_welcome_email": 0,
+                "roles": [{"role": "IPC Manager"}]
+            }).insert(ignore_permissions=True)
+
+        others_file = frappe.get_doc({
+            "doctype": "File",
+            "file_name": "others_import.csv",
+            "content": "customer,project",
+            "is_private": 1
+        }).insert(ignore_permissions=True)
+
+        frappe.set_user(user)
+        self.addCleanup(frappe.set_user, "Administrator")
+
+        own_file = frappe.get_doc({
+            "doctype": "File",
+            "file_name": "own_import.csv",
+            "content": "customer,project",
+            "is_private": 1
+        }).insert()
+
+        with patch("frappe.enqueue") as enqueue:
+            self.assertRaises(frappe.PermissionError, ipc_import.enqueue_ipc_import, others_file.file_url)
+            ipc_import.enqueue_ipc_import(own_file.file_url)
+
+        self.assertEqual(enqueue.call_count, 1)
@@ -0,0 +1,116 @@
+"""
+Index regression tests for IPC queries.
+
+Seeds tabIPC and checks with EXPLAIN that the hot query shapes are served
+by an index instead of a full table scan.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate, now_datetime
+
+from contracting_ipc.api import get_pending_ipc_filters
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import on_doctype_update
+from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import get_conditions
+
+SEED_ROWS = 600
+
+
+class TestIPCIndexes(FrappeTestCase):
+    """Test that IPC queries use the composite indexes."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Seed tabIPC with enough rows for the optimizer to prefer indexes."""
+        super().setUpClass()
+        if frappe.db.db_type != "mariadb":
+            return
+
+        on_doctype_update()
+        cls.seed_ipcs()
+
+    @classmethod
+    def seed_ipcs(cls):
+        """Bulk insert IPCs spread over several companies, customers and projects."""
+        fields = [
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "customer", "project", "company", "status",
+            "period_from", "period_to", "total_work_done", "net_amount"
+        ]
+        timestamp = now_datetime()
+        start = getdate("2020-01-01")
+        statuses = ["Draft", "Approved", "Invoiced"]
+
+        values = []
+        for i in range(SEED_ROWS):
+            status = statuses[i % 3]
+            values.append((
+                f"_T-IPC-IDX-{i:05d}", timestamp, timestamp, "Administrator", "Administrator",
+                0 if status == "Draft" else 1,
+                f"_Test Index Customer {i % 25}",
+                f"_Test Index Project {i % 40}",
+                f"_Test Index Company {i % 5}",
+                status,
+                add_days(start, i), add_days(start, i + 30),
+                1000, 900
+            ))
+
+        frappe.db.bulk_insert("IPC", fields, values)
+
+    def setUp(self):
+        if frappe.db.db_type != "mariadb":
+            self.skipTest("EXPLAIN checks are written for MariaDB")
+
+    def assertUsesIndex(self, query, values=None):
+        """Fail if EXPLAIN reports a full scan of tabIPC."""
+        plan = frappe.db.sql(f"EXPLAIN {query}", values, as_dict=1)
+        ipc_plan = [row for row in plan if row.table == "tabIPC"]
+
+        self.assertTrue(ipc_plan, plan)
+        for row in ipc_plan:
+            self.assertNotEqual(row.type, "ALL", f"Full scan of tabIPC: {row}")
+            self.assertTrue(row.key, f"No index used for tabIPC: {row}")
+
+    def test_project_totals_query(self):
+        """Test the project + docstatus aggregate."""
+        self.assertUsesIndex(
+            """
+            SELECT SUM(total_work_done), SUM(net_amount), COUNT(*)
+            FROM `tabIPC`
+            WHERE project = %s AND docstatus = 1
+            """,
+            ("_Test Index Project 7",)
+        )
+
+    def test_pending_ipcs_query(self):
+        """Test the get_pending_ipcs query."""
+        query = frappe.get_all(
+            "IPC",
+            filters=get_pending_ipc_filters(),
+            fields=["name", "customer", "project", "net_amount", "period_from", "period_to"],
+            order_by="creation desc",
+            run=0
+        )
+        self.assertUsesIndex(query)
+
+    def test_report_queries(self):
+        """Test the IPC Summary query for its common filter combinations."""
+        filter_sets = [
+            {"company": "_Test Index Company 2"},
+            {"company": "_Test Index Company 2", "status": "Approved"},
+            {"company": "_Test Index Company 2", "status": "Approved", "from_date": "2020-03-01"},
+            {"customer": "_Test Index Customer 3"},
+            {"customer": "_Test Index Customer 3", "status": "Invoiced", "from_date": "2020-06-01"}
+        ]
+
+        for filters in filter_sets:
+            with self.subTest(filters=filters):
+                self.assertUsesIndex(
+                    f"""
+                    SELECT name, net_amount
+                    FROM `tabIPC`
+                    WHERE docstatus < 2 {get_conditions(filters)}
+                    ORDER BY creation DESC
+                    """,
+                    filters
+                )
@@ -0,0 +1,116 @@
+"""
+Concurrency tests for Sales Invoice creation from an IPC.
+
+Workers run in separate processes with their own database connections,
+so the IPC under test is committed and removed again by the test.
+"""
+
+import multiprocessing
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+
+# Number of processes racing to invoice the same IPC
+WORKERS = 8
+
+
+def make_invoice_in_worker(site, sites_path, ipc_name, idempotency_key, barrier, results):
+    """Invoice an IPC from a fresh connection once all workers are ready."""
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+    frappe.set_user("Administrator")
+
+    from contracting_ipc.contracting_ipc.doctype.ipc.ipc import create_sales_invoice
+
+    try:
+        barrier.wait()
+        sales_invoice = create_sales_invoice(ipc_name, idempotency_key)
+        # The request commit, which releases the IPC row lock
+        frappe.db.commit()
+        results.put(("ok", sales_invoice))
+    except Exception as e:
+        frappe.db.rollback()
+        results.put(("error", str(e)))
+    finally:
+        frappe.destroy()
+
+
+class TestIPCInvoiceConcurrency(FrappeTestCase):
+    """Test that parallel invoicing of one IPC creates exactly one Sales Invoice."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data and the company's invoicing defaults."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+        test_ipc.TestIPC.set_invoice_defaults()
+        frappe.db.commit()
+
+    def setUp(self):
+        """Submit and commit an IPC the workers can see."""
+        self.ipc = test_ipc.TestIPC.make_ipc(submit=True)
+        frappe.db.commit()
+
+    def tearDown(self):
+        """Remove the committed invoices and IPC."""
+        frappe.db.rollback()
+
+        # A Sales Invoice still linked from the submitted IPC cannot be cancelled
+        frappe.db.set_value("IPC", self.ipc.name, {"sales_invoice": None, "status": "Approved"})
+
+        for name in frappe.get_all("Sales Invoice", filters={"ipc": self.ipc.name}, pluck="name"):
+            sales_invoice = frappe.get_doc("Sales Invoice", name)
+            if sales_invoice.docstatus == 1:
+                sales_invoice.cancel()
+            frappe.delete_doc("Sales Invoice", name, force=1)
+
+        self.ipc.reload()
+        self.ipc.cancel()
+        frappe.delete_doc("IPC", self.ipc.name, force=1)
+        frappe.db.commit()
+
+    def get_invoices(self):
+        return frappe.get_all(
+            "Sales Invoice", filters={"ipc": self.ipc.name, "docstatus": 1}, pluck="name"
+        )
+
+    def run_workers(self, idempotency_key=None):
+        """Start the workers together and collect their results."""
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(WORKERS)
+        results = context.Queue()
+
+        processes = [
+            context.Process(
+                target=make_invoice_in_worker,
+                args=(frappe.local.site, frappe.local.sites_path, self.ipc.name,
+                      idempotency_key, barrier, results)
+            )
+            for _i in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+
+        outcomes = [results.get(timeout=120) for _i in range(WORKERS)]
+        for process in processes:
+            process.join()
+
+        return outcomes
+
+    def test_parallel_workers_create_one_invoice(self):
+        """Test that only one of many concurrent calls creates an invoice."""
+        outcomes = self.run_workers()
+
+        created = [result for status, result in outcomes if status == "ok"]
+        self.assertEqual(len(created), 1)
+        self.assertEqual(self.get_invoices(), created)
+
+    def test_retries_with_key_return_existing_invoice(self):
+        """Test that concurrent retries with one idempotency key all get the same invoice."""
+        outcomes = self.run_workers(idempotency_key=frappe.generate_hash(length=20))
+
+        self.assertEqual({status for status, result in outcomes}, {"ok"})
+        self.assertEqual(len({result for status, result in outcomes}), 1)
+        self.assertEqual(len(self.get_invoices()), 1)
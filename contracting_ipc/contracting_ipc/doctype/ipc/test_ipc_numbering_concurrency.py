@@ -0,0 +1,133 @@
+"""
+Concurrency tests for per-project IPC numbering.
+
+Workers run in separate processes with their own database connections,
+so the IPCs under test are committed and removed again by the test.
+"""
+
+import multiprocessing
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, cint
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import get_ipc_name, get_ipc_number_key
+
+# Number of processes inserting IPCs at the same time, per project
+WORKERS = 6
+
+PROJECTS = ["_Test Numbering Project 1", "_Test Numbering Project 2"]
+
+
+def insert_ipc_in_worker(site, sites_path, project, period_from, commit, barrier, results):
+    """Insert an IPC from a fresh connection once all workers are ready, then commit or roll back."""
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+    frappe.set_user("Administrator")
+
+    try:
+        barrier.wait()
+        ipc = test_ipc.TestIPC.make_ipc(
+            project=project, period_from=period_from, period_to=add_days(period_from, 30)
+        )
+
+        if commit:
+            frappe.db.commit()
+            results.put(("ok", project, ipc.name, ipc.ipc_number))
+        else:
+            frappe.db.rollback()
+            results.put(("rolled back", project, ipc.name, ipc.ipc_number))
+    except Exception as e:
+        frappe.db.rollback()
+        results.put(("error", project, str(e), None))
+    finally:
+        frappe.destroy()
+
+
+class TestIPCNumberingConcurrency(FrappeTestCase):
+    """Test that IPCs inserted concurrently are numbered without gaps or duplicates."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data and the projects the workers insert into."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+        for project in PROJECTS:
+            if not frappe.db.exists("Project", project):
+                frappe.get_doc({
+                    "doctype": "Project",
+                    "project_name": project,
+                    "company": "_Test Company"
+                }).insert(ignore_permissions=True)
+        frappe.db.commit()
+
+    def tearDown(self):
+        """Remove the committed IPCs."""
+        frappe.db.rollback()
+
+        for ipc in frappe.get_all(
+            "IPC", filters={"project": ["in", PROJECTS], "docstatus": ["<", 2]}, fields=["name", "docstatus"]
+        ):
+            # Submitted IPCs, e.g. left by an interrupted run, are cancelled to reverse their ledgers
+            if ipc.docstatus == 1:
+                frappe.get_doc("IPC", ipc.name).cancel()
+        for name in frappe.get_all("IPC", filters={"project": ["in", PROJECTS]}, pluck="name"):
+            frappe.delete_doc("IPC", name, force=1)
+        frappe.db.commit()
+
+    def get_counter(self, project):
+        current = frappe.db.sql(
+            "SELECT `current` FROM `tabSeries` WHERE `name` = %s", get_ipc_number_key(project)
+        )
+        return cint(current[0][0]) if current else 0
+
+    def run_workers(self):
+        """Start the workers of both projects together; every third one rolls back."""
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(WORKERS * len(PROJECTS))
+        results = context.Queue()
+
+        processes = [
+            context.Process(
+                target=insert_ipc_in_worker,
+                args=(frappe.local.site, frappe.local.sites_path, project,
+                      add_days("2060-01-01", idx * 31), idx % 3 != 2, barrier, results)
+            )
+            for project in PROJECTS
+            for idx in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+
+        outcomes = [results.get(timeout=120) for _i in processes]
+        for process in processes:
+            process.join()
+
+        return outcomes
+
+    def test_concurrent_numbers_have_no_gaps_or_duplicates(self):
+        """Test that each project's committed IPCs continue its counter one by one."""
+        counters = {project: self.get_counter(project) for project in PROJECTS}
+
+        outcomes = self.run_workers()
+        # Start a new snapshot that sees the workers' commits
+        frappe.db.rollback()
+        self.assertEqual([outcome for outcome in outcomes if outcome[0] == "error"], [])
+
+        for project in PROJECTS:
+            committed = len([outcome for outcome in outcomes if outcome[:2] == ("ok", project)])
+            ipcs = frappe.get_all(
+                "IPC", filters={"project": project}, fields=["name", "ipc_number"], order_by="ipc_number"
+            )
+
+            # Rolled back inserts give their numbers back to the next insert
+            self.assertEqual(
+                [ipc.ipc_number for ipc in ipcs],
+                list(range(counters[project] + 1, counters[project] + committed + 1))
+            )
+            self.assertEqual(
+                [ipc.name for ipc in ipcs], [get_ipc_name(project, ipc.ipc_number) for ipc in ipcs]
+            )
+            self.assertEqual(self.get_counter(project), counters[project] + committed)
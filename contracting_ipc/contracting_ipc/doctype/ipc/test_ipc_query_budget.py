@@ -0,0 +1,198 @@
+"""
+SQL query budgets for the core IPC operations.
+
+Every operation runs once to warm the metadata and document caches and
+is then measured; the test fails, listing the statements, when an
+operation issues more statements than its budget. Tighten a budget when
+a code path is consolidated.
+
+The totals of the document lifecycle include Frappe's own statements, so
+the app's ledger tables also get exact budgets of their own, and
+submitting on a contract must not cost more the more IPCs it already has.
+"""
+
+import re
+from contextlib import contextmanager
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.instrumentation import measure
+
+# Operation -> maximum statements, or a dict of "total" and per-table maximums
+QUERY_BUDGETS = {
+    "ipc.insert": 30,
+    # Project totals: read in validate, locked in before_submit, then added to.
+    # Each IPC of the test starts a month of its own, so a rollup row is created
+    "ipc.submit": {
+        "total": 47,
+        "tabIPC Project Totals": 5,
+        "tabIPC Contract Balance": 0,
+        "tabIPC Monthly Rollup": 3,
+        "tabIPC Retention Ledger Entry": 1,
+        "tabIPC Retention Balance": 2
+    },
+    # The contract balance takes the place of the project totals for reads
+    "ipc.submit_on_contract": {
+        "total": 47,
+        "tabIPC Contract Balance": 5,
+        "tabIPC Project Totals": 2
+    },
+    "ipc.cancel": {
+        "total": 42,
+        "tabIPC Project Totals": 2,
+        "tabIPC Contract Balance": 0,
+        "tabIPC Monthly Rollup": 2,
+        "tabIPC Retention Ledger Entry": 2,
+        "tabIPC Retention Balance": 2
+    },
+    # Sales Invoice internals belong to ERPNext; budget only the IPC reads and writes
+    "create_sales_invoice": {"tabIPC": 2, "tabWorkflow": 0, "tabCompany": 0, "tabCustomer": 0},
+    "api.get_project_details": 1,
+    "api.get_contract_details": 1,
+    "api.get_ipc_totals_by_project": 1,
+    "api.get_ipc_totals_by_projects": 1,
+    "api.get_pending_ipcs": 1,
+    # The first page also runs the count/sum summary
+    "api.get_pending_ipcs_page": 2,
+    "get_ipc_dashboard_data": 1,
+    "get_ipc_dashboard_data_bulk": 1,
+    # Uncached: the keyset page query only
+    "IPC Summary.get_next_page": 1,
+    "recalculate_retention": 2
+}
+
+TABLE_PATTERN = re.compile(r"`(tab[^`]+)`")
+
+
+class QueryBudgetTestCase(FrappeTestCase):
+    """Test case with an assertion on the SQL statements of a block."""
+
+    @contextmanager
+    def assertQueryBudget(self, operation: str):
+        """Fail when the block issues more statements than `QUERY_BUDGETS[operation]` allows."""
+        budget = QUERY_BUDGETS[operation]
+        if isinstance(budget, int):
+            budget = {"total": budget}
+
+        with measure(record_queries=True) as frame:
+            yield frame
+
+        for scope, limit in budget.items():
+            if scope == "total":
+                queries = frame.queries
+            else:
+                queries = [query for query in frame.queries if scope in TABLE_PATTERN.findall(query)]
+
+            listing = "\n".join(queries)
+            self.assertLessEqual(
+                len(queries),
+                limit,
+                msg=f"{operation} ran {len(queries)} statements on {scope}, budget is {limit}:\n{listing}"
+            )
+
+
+class TestIPCQueryBudget(QueryBudgetTestCase):
+    """Query budgets of the IPC lifecycle, invoicing and whitelisted methods."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+        test_ipc.TestIPC.set_invoice_defaults()
+
+        cls.contract = frappe.get_doc({
+            "doctype": "Contract",
+            "party_type": "Customer",
+            "party_name": "_Test Customer",
+            "start_date": "2035-01-01",
+            "contract_terms": "_Test Contract Terms"
+        }).insert(ignore_permissions=True).name
+
+    def make_ipc(self):
+        """Get a new IPC with a period of its own."""
+        return test_ipc.TestIPC.make_ipc(insert=False, advance_deduction=5000)
+
+    def make_submitted_ipc(self):
+        ipc = self.make_ipc().insert()
+        ipc.submit()
+        return ipc
+
+    def test_lifecycle_budgets(self):
+        """Test insert, submit and cancel of an IPC."""
+        self.make_submitted_ipc().cancel()
+
+        ipc = self.make_ipc()
+        with self.assertQueryBudget("ipc.insert"):
+            ipc.insert()
+
+        with self.assertQueryBudget("ipc.submit"):
+            ipc.submit()
+
+        with self.assertQueryBudget("ipc.cancel"):
+            ipc.cancel()
+
+    def test_submit_on_contract_does_not_grow_with_its_ipcs(self):
+        """Test that submitting on a contract runs as many statements after one prior IPC as after several."""
+        sql_counts = []
+        for _i in range(6):
+            ipc = self.make_ipc()
+            ipc.contract = self.contract
+            ipc.insert()
+
+            with self.assertQueryBudget("ipc.submit_on_contract") as frame:
+                ipc.submit()
+            sql_counts.append(frame.sql_count)
+
+        # The first submission creates the balance row of the contract
+        self.assertEqual(sql_counts[-1], sql_counts[1], msg=f"Statements per submission: {sql_counts}")
+
+    def test_invoice_budget(self):
+        """Test that invoicing reads and writes the IPC and its masters minimally."""
+        from contracting_ipc.contracting_ipc.doctype.ipc.ipc import create_sales_invoice
+
+        create_sales_invoice(self.make_submitted_ipc().name)
+
+        ipc = self.make_submitted_ipc()
+        with self.assertQueryBudget("create_sales_invoice"):
+            create_sales_invoice(ipc.name)
+
+    def run_uncached(self, method, *args):
+        """Call a report method without the result cache, which would answer the measured call."""
+        from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import summary_cache_disabled
+
+        with summary_cache_disabled():
+            return method(*args)
+
+    def test_api_budgets(self):
+        """Test every whitelisted read method."""
+        from contracting_ipc import api
+        from contracting_ipc.contracting_ipc.doctype.ipc import ipc as ipc_module
+        from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import get_next_page
+        from contracting_ipc.recalculation import recalculate_retention
+
+        ipc = self.make_submitted_ipc()
+        calls = {
+            "api.get_project_details": lambda: api.get_project_details("_Test Project"),
+            "api.get_contract_details": lambda: api.get_contract_details(self.contract),
+            "api.get_ipc_totals_by_project": lambda: api.get_ipc_totals_by_project("_Test Project"),
+            "api.get_ipc_totals_by_projects": lambda: api.get_ipc_totals_by_projects(
+                ["_Test Project"], company="_Test Company"
+            ),
+            "api.get_pending_ipcs": lambda: api.get_pending_ipcs(customer="_Test Customer"),
+            "api.get_pending_ipcs_page": lambda: api.get_pending_ipcs_page(customer="_Test Customer"),
+            "get_ipc_dashboard_data": lambda: ipc_module.get_ipc_dashboard_data(ipc.name),
+            "get_ipc_dashboard_data_bulk": lambda: ipc_module.get_ipc_dashboard_data_bulk([ipc.name]),
+            "IPC Summary.get_next_page": lambda: self.run_uncached(
+                get_next_page, {"company": "_Test Company"}, str(ipc.creation), ipc.name
+            ),
+            "recalculate_retention": lambda: recalculate_retention(5, project="_Test Project")
+        }
+
+        for operation, call in calls.items():
+            with self.subTest(operation=operation):
+                call()
+                with self.assertQueryBudget(operation):
+                    call()
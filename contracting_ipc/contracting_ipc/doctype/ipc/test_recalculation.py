@@ -0,0 +1,108 @@
+"""
+Test cases for mass recalculation of IPC retention.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.recalculation import recalculate_retention
+
+
+class TestRecalculation(FrappeTestCase):
+    """Test cases for recalculating retention on draft IPCs."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+    def make_ipc(self, total_work_done, submit=False):
+        """Create an IPC for the test project, with an advance deduction that rounds."""
+        return test_ipc.TestIPC.make_ipc(
+            submit=submit, total_work_done=total_work_done, advance_deduction=333.33
+        )
+
+    def test_dry_run_does_not_write(self):
+        """Test that a dry run reports deltas without changing IPCs."""
+        ipc = self.make_ipc(100000)
+
+        changes = recalculate_retention(5, project="_Test Project", dry_run=1)
+        change = next(change for change in changes["ipcs"] if change["name"] == ipc.name)
+
+        self.assertEqual(change["retention_delta"], -5000)
+        self.assertEqual(change["net_delta"], 5000)
+        self.assertEqual(flt(frappe.db.get_value("IPC", ipc.name, "retention_amount")), 10000)
+
+    def test_recalculation_matches_document_calculation(self):
+        """Test that written amounts equal a re-save of each draft, and submitted IPCs are untouched."""
+        drafts = [self.make_ipc(amount) for amount in (12345.675, 98765.4321)]
+        submitted = self.make_ipc(50000, submit=True)
+
+        recalculate_retention(7.25, project="_Test Project", dry_run=0)
+
+        for draft in drafts:
+            draft.reload()
+            expected = frappe.get_doc(draft.as_dict())
+            expected.calculate_amounts()
+
+            self.assertEqual(flt(draft.retention_percentage), 7.25)
+            self.assertEqual(flt(draft.retention_amount), flt(expected.retention_amount))
+            self.assertEqual(flt(draft.net_amount), flt(expected.net_amount))
+
+        self.assertEqual(flt(frappe.db.get_value("IPC", submitted.name, "retention_percentage")), 10)
+
+    def test_scope_is_required(self):
+        """Test that a recalculation without a scope is rejected."""
+        with self.assertRaises(frappe.ValidationError):
+            recalculate_retention(5)
+
+    def test_percentage_out_of_range(self):
+        """Test that a retention percentage outside 0 to 100 is rejected."""
+        for retention_percentage in (-1, 100.01):
+            with self.subTest(retention_percentage=retention_percentage):
+                self.assertRaises(
+                    frappe.ValidationError,
+                    recalculate_retention,
+                    retention_percentage,
+                    project="_Test Project"
+                )
+
+    def test_only_permitted_ipcs_are_recalculated(self):
+        """Test that IPCs hidden from the user by a user permission are left out."""
+        ipc = self.make_ipc(100000)
+
+        user = "test_recalculation@example.com"
+        if not frappe.db.exists("User", user):
+            frappe.get_doc({
+                "doctype": "User",
+                "email": user,
+                "first_name": "IPC Recalculation",
+                "send_welcome_email": 0,
+                "roles": [{"role": "IPC Manager"}]
+            }).insert(ignore_permissions=True)
+
+        if not frappe.db.exists("Project", "_Test Recalculation Project"):
+            frappe.get_doc({
+                "doctype": "Project",
+                "project_name": "_Test Recalculation Project",
+                "company": "_Test Company"
+            }).insert(ignore_permissions=True)
+
+        frappe.get_doc({
+            "doctype": "User Permission",
+            "user": user,
+            "allow": "Project",
+            "for_value": "_Test Recalculation Project",
+            "apply_to_all_doctypes": 1
+        }).insert(ignore_permissions=True)
+
+        frappe.set_user(user)
+        self.addCleanup(frappe.set_user, "Administrator")
+
+        changes = recalculate_retention(5, company="_Test Company", dry_run=0)
+
+        self.assertNotIn(ipc.name, [change["name"] for change in changes["ipcs"]])
+        self.assertEqual(flt(frappe.db.get_value("IPC", ipc.name, "retention_percentage")), 10)
@@ -0,0 +1 @@
+# IPC Contract Balance DocType
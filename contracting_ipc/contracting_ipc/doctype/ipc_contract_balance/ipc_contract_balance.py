@@ -0,0 +1,236 @@
+"""
+IPC Contract Balance DocType Controller.
+
+Keeps the running balances of a contract: the work certified by its
+submitted IPCs, capped by the contract value, and the advance they have
+recovered. The row is updated when an IPC is submitted or cancelled, so
+an IPC can read its cumulative figures, check the cap and propose its
+advance deduction without scanning earlier certificates.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, now
+
+# Fields read by IPCs from the balance of their contract
+BALANCE_FIELDS = [
+    "contract_value", "certified_to_date", "ipc_count", "total_advance",
+    "advance_recovery_percentage", "advance_recovered"
+]
+
+
+class IPCContractBalance(Document):
+    """Controller class for IPC Contract Balance DocType."""
+
+    def validate(self):
+        """Validate the contract value and the advance payment terms."""
+        if flt(self.contract_value) < 0:
+            frappe.throw(_("Contract Value cannot be negative."), title=_("Invalid Amount"))
+
+        if flt(self.contract_value) and flt(self.contract_value) < flt(self.certified_to_date):
+            frappe.throw(
+                _("Contract Value cannot be less than the work already certified ({0}).").format(
+                    frappe.format_value(self.certified_to_date, {"fieldtype": "Currency"})
+                ),
+                title=_("Invalid Amount")
+            )
+
+        if flt(self.total_advance) < 0:
+            frappe.throw(_("Total Advance cannot be negative."), title=_("Invalid Amount"))
+
+        if not 0 <= flt(self.advance_recovery_percentage) <= 100:
+            frappe.throw(
+                _("Advance Recovery (%) must be between 0 and 100."),
+                title=_("Invalid Percentage")
+            )
+
+        if flt(self.total_advance) < flt(self.advance_recovered):
+            frappe.throw(
+                _("Total Advance cannot be less than the advance already recovered ({0}).").format(
+                    frappe.format_value(self.advance_recovered, {"fieldtype": "Currency"})
+                ),
+                title=_("Invalid Amount")
+            )
+
+
+def ensure_contract_balance(contract: str):
+    """Create the balance row for a contract if it does not exist yet."""
+    if frappe.db.exists("IPC Contract Balance", contract):
+        return
+
+    # contract_value is not a standard Contract field; seed the cap from it only where it exists
+    fields = ["party_name"]
+    if frappe.get_meta("Contract").has_field("contract_value"):
+        fields.append("contract_value")
+    contract_details = frappe.db.get_value("Contract", contract, fields, as_dict=True) or frappe._dict()
+
+    balance = frappe.new_doc("IPC Contract Balance")
+    balance.contract = contract
+    balance.customer = contract_details.party_name
+    balance.contract_value = flt(contract_details.get("contract_value"))
+
+    # A failed insert aborts the whole transaction on Postgres unless rolled back to a savepoint
+    frappe.db.savepoint("ensure_contract_balance")
+    try:
+        balance.insert(ignore_permissions=True)
+    except frappe.DuplicateEntryError:
+        # Created by a concurrent transaction
+        frappe.db.rollback(save_point="ensure_contract_balance")
+
+
+def get_contract_balance(contract: str, for_update: bool = False) -> frappe._dict:
+    """
+    Get the running balances of a contract.
+
+    Args:
+        contract: Contract name
+        for_update: Lock the balance row until the end of the transaction
+
+    Returns:
+        Dictionary with the balance fields
+    """
+    if for_update:
+        ensure_contract_balance(contract)
+
+    balance = frappe.db.get_value(
+        "IPC Contract Balance",
+        contract,
+        BALANCE_FIELDS,
+        as_dict=True,
+        for_update=for_update
+    )
+
+    return balance or frappe._dict({field: 0 for field in BALANCE_FIELDS})
+
+
+def get_advance_outstanding(balance) -> float:
+    """Get the advance still to be recovered from a contract balance."""
+    return max(flt(balance.total_advance) - flt(balance.advance_recovered), 0)
+
+
+def propose_advance_deduction(total_work_done, balance, precision=None) -> float:
+    """
+    Propose the advance deduction of an IPC from its contract balance.
+
+    The recovery percentage is applied to the work done and capped at the
+    advance still outstanding.
+
+    Args:
+        total_work_done: Work done certified by the IPC
+        balance: Result of `get_contract_balance`
+        precision: Precision of the advance deduction
+
+    Returns:
+        Proposed advance deduction
+    """
+    deduction = flt(total_work_done) * flt(balance.advance_recovery_percentage) / 100.0
+
+    return flt(min(deduction, get_advance_outstanding(balance)), precision)
+
+
+def update_contract_balance(ipc, cancel: bool = False):
+    """
+    Add a submitted IPC to its contract balance, or remove a cancelled one.
+
+    Args:
+        ipc: IPC document
+        cancel: True when the IPC is being cancelled
+    """
+    sign = -1 if cancel else 1
+    add_to_contract_balance(
+        ipc.contract, ipc.company, sign * flt(ipc.total_work_done), sign * flt(ipc.advance_deduction), sign
+    )
+
+
+def add_to_contract_balance(contract: str, company: str, total_work_done: float,
+                            advance_deduction: float, ipc_count: int):
+    """
+    Add certified work, recovered advance and an IPC count to a contract balance.
+
+    The row is updated with a relative UPDATE so concurrent submissions
+    on the same contract cannot overwrite each other.
+    """
+    ensure_contract_balance(contract)
+
+    frappe.db.sql(
+        """
+        UPDATE
+            `tabIPC Contract Balance`
+        SET
+            certified_to_date = certified_to_date + %(total_work_done)s,
+            advance_recovered = advance_recovered + %(advance_deduction)s,
+            company = COALESCE(company, %(company)s),
+            ipc_count = ipc_count + %(ipc_count)s,
+            modified = %(modified)s
+        WHERE
+            name = %(contract)s
+        """,
+        {
+            "total_work_done": flt(total_work_done),
+            "advance_deduction": flt(advance_deduction),
+            "company": company,
+            "ipc_count": ipc_count,
+            "modified": now(),
+            "contract": contract
+        }
+    )
+
+
+def rebuild_contract_balances(contracts: list = None) -> int:
+    """
+    Recompute contract balances from submitted IPCs.
+
+    The contract value and advance payment terms are entered by users and
+    are left untouched.
+
+    Args:
+        contracts: Optional list of contracts to rebuild, all contracts otherwise
+
+    Returns:
+        Number of contracts rebuilt
+    """
+    conditions = ""
+    if contracts:
+        conditions = " AND contract IN %(contracts)s"
+
+    balances = frappe.db.sql(
+        f"""
+        SELECT
+            contract,
+            MAX(company) as company,
+            SUM(total_work_done) as certified_to_date,
+            SUM(advance_deduction) as advance_recovered,
+            COUNT(*) as ipc_count
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus = 1
+            AND COALESCE(contract, '') != ''
+            {conditions}
+        GROUP BY
+            contract
+        """,
+        {"contracts": tuple(contracts or ())},
+        as_dict=1
+    )
+    balances_by_contract = {row.contract: row for row in balances}
+
+    # Contracts that have a balance row but no submitted IPCs are reset to zero
+    balance_filters = {"contract": ["in", contracts]} if contracts else {}
+    for contract in frappe.get_all("IPC Contract Balance", filters=balance_filters, pluck="name"):
+        balances_by_contract.setdefault(contract, frappe._dict(contract=contract))
+
+    for contract, row in balances_by_contract.items():
+        ensure_contract_balance(contract)
+        values = {
+            "certified_to_date": flt(row.certified_to_date),
+            "advance_recovered": flt(row.advance_recovered),
+            "ipc_count": row.ipc_count or 0
+        }
+        if row.company:
+            values["company"] = row.company
+
+        frappe.db.set_value("IPC Contract Balance", contract, values, update_modified=True)
+
+    return len(balances_by_contract)
@@ -0,0 +1,117 @@
+"""
+Test cases for IPC Contract Balance DocType.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, today
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.contracting_ipc.doctype.ipc_contract_balance.ipc_contract_balance import (
+    get_contract_balance,
+    rebuild_contract_balances,
+)
+
+
+class TestIPCContractBalance(FrappeTestCase):
+    """Test cases for advance recovery on contract balances."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+    def setUp(self):
+        """Create a contract with an advance of 20000 recovered at 10%."""
+        contract = frappe.get_doc({
+            "doctype": "Contract",
+            "party_type": "Customer",
+            "party_name": "_Test Customer",
+            "start_date": today(),
+            "contract_terms": "_Test Contract Terms"
+        }).insert(ignore_permissions=True)
+        self.contract = contract.name
+
+        frappe.get_doc({
+            "doctype": "IPC Contract Balance",
+            "contract": self.contract,
+            "company": "_Test Company",
+            "total_advance": 20000,
+            "advance_recovery_percentage": 10
+        }).insert()
+
+    def make_ipc(self, total_work_done, **kwargs):
+        """Create an IPC on the test contract."""
+        values = {"contract": self.contract, "total_work_done": total_work_done, "retention_percentage": 5}
+        values.update(kwargs)
+        return test_ipc.TestIPC.make_ipc(**values)
+
+    def test_deduction_proposed_from_terms(self):
+        """Test that the deduction is the recovery percentage of the work done."""
+        ipc = self.make_ipc(50000)
+
+        self.assertEqual(flt(ipc.advance_deduction), 5000)
+        self.assertEqual(flt(ipc.net_amount), 50000 - 2500 - 5000)
+
+    def test_recovered_balance_on_submit_and_cancel(self):
+        """Test that submitting recovers the advance and cancelling gives it back."""
+        ipc = self.make_ipc(50000)
+        ipc.submit()
+        self.assertEqual(flt(get_contract_balance(self.contract).advance_recovered), 5000)
+
+        ipc.cancel()
+        self.assertEqual(flt(get_contract_balance(self.contract).advance_recovered), 0)
+
+    def test_deduction_capped_at_outstanding(self):
+        """Test that the last IPC only recovers what is left of the advance."""
+        first = self.make_ipc(150000)
+        first.submit()
+        self.assertEqual(flt(first.advance_deduction), 15000)
+
+        second = self.make_ipc(150000)
+        self.assertEqual(flt(second.advance_deduction), 5000)
+
+    def test_manual_deduction_cannot_exceed_outstanding(self):
+        """Test that a manual deduction above the outstanding advance is rejected."""
+        ipc = self.make_ipc(50000, manual_advance_deduction=1, advance_deduction=8000)
+        self.assertEqual(flt(ipc.advance_deduction), 8000)
+
+        self.assertRaises(
+            frappe.ValidationError,
+            self.make_ipc, 50000, manual_advance_deduction=1, advance_deduction=25000
+        )
+
+    def test_rebuild_keeps_advance_terms(self):
+        """Test that rebuilding recomputes the recovered advance but keeps the terms."""
+        self.make_ipc(50000).submit()
+        frappe.db.set_value("IPC Contract Balance", self.contract, "advance_recovered", 0)
+
+        rebuild_contract_balances([self.contract])
+        balance = get_contract_balance(self.contract)
+
+        self.assertEqual(flt(balance.advance_recovered), 5000)
+        self.assertEqual(flt(balance.total_advance), 20000)
+        self.assertEqual(flt(balance.advance_recovery_percentage), 10)
+
+    def test_contract_value_cap(self):
+        """Test that certifying beyond the contract value is rejected on save."""
+        frappe.db.set_value("IPC Contract Balance", self.contract, "contract_value", 100000)
+
+        self.make_ipc(100000)
+        self.assertRaises(frappe.ValidationError, self.make_ipc, 100001)
+
+    def test_contract_value_checked_on_submit(self):
+        """Test that drafts within the cap on their own cannot be submitted past it together."""
+        frappe.db.set_value("IPC Contract Balance", self.contract, "contract_value", 100000)
+
+        first = self.make_ipc(60000)
+        second = self.make_ipc(60000)
+
+        first.submit()
+        self.assertRaises(frappe.ValidationError, second.submit)
+
+        first.cancel()
+        second.reload()
+        second.submit()
+        self.assertEqual(flt(get_contract_balance(self.contract).certified_to_date), 60000)
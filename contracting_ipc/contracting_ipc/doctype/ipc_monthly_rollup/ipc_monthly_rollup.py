@@ -0,0 +1,310 @@
+"""
+IPC Monthly Rollup DocType Controller.
+
+Keeps one row per company, project and month with the amounts of the
+submitted IPCs whose period starts in that month, and how much of it has
+been invoiced. Rows are updated incrementally when an IPC is submitted,
+invoiced or cancelled, and rebuilt from `tabIPC` every night to repair
+drift, so workspace charts and number cards never aggregate `tabIPC`.
+"""
+
+import datetime
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, flt, get_first_day, get_year_start, getdate, now, nowdate
+
+# Rollup field -> IPC field it accumulates for submitted IPCs
+TOTAL_FIELDS = {
+    "total_work_done": "total_work_done",
+    "total_retention": "retention_amount",
+    "total_net": "net_amount"
+}
+
+# Rollup fields holding amounts or counts
+ROLLUP_FIELDS = [*TOTAL_FIELDS, "ipc_count", "total_invoiced", "invoiced_count"]
+
+
+class IPCMonthlyRollup(Document):
+    """Controller class for IPC Monthly Rollup DocType."""
+
+    def autoname(self):
+        """Name the row after its company, project and month."""
+        self.month = get_first_day(self.month)
+        self.name = get_rollup_name(self.company, self.project, self.month)
+
+
+def on_doctype_update():
+    """Index for the monthly trends and number cards of a company."""
+    frappe.db.add_index("IPC Monthly Rollup", ["company", "month"])
+
+
+def get_rollup_name(company: str, project: str, month) -> str:
+    """Get the name of the rollup row of a company, project and month."""
+    return f"{company}-{project}-{getdate(month).strftime('%Y-%m')}"
+
+
+def update_monthly_rollup(ipc, cancel: bool = False):
+    """
+    Add a submitted IPC to its month, or remove a cancelled one.
+
+    A cancelled IPC that was invoiced also leaves the invoiced totals.
+
+    Args:
+        ipc: IPC document
+        cancel: True when the IPC is being cancelled
+    """
+    sign = -1 if cancel else 1
+    values = {
+        rollup_field: sign * flt(ipc.get(ipc_field)) for rollup_field, ipc_field in TOTAL_FIELDS.items()
+    }
+    values["ipc_count"] = sign
+
+    if cancel and ipc.sales_invoice:
+        values["total_invoiced"] = sign * flt(ipc.net_amount)
+        values["invoiced_count"] = sign
+
+    add_to_rollup(ipc.company, ipc.project, ipc.period_from, values)
+
+
+def update_monthly_rollup_invoiced(ipc):
+    """
+    Add an invoiced IPC's net amount to the invoiced totals of its month.
+
+    Args:
+        ipc: IPC document or dict with company, project, period_from and net_amount
+    """
+    add_to_rollup(
+        ipc.company, ipc.project, ipc.period_from,
+        {"total_invoiced": flt(ipc.net_amount), "invoiced_count": 1}
+    )
+
+
+def add_to_rollup(company: str, project: str, period_from, values: dict):
+    """
+    Add amounts and counts to a rollup row.
+
+    The row is updated with a relative UPDATE so concurrent submissions
+    in the same month cannot overwrite each other.
+
+    Args:
+        company: Company of the IPC
+        project: Project of the IPC
+        period_from: Start of the IPC period, which picks the month
+        values: Rollup field -> amount or count to add
+    """
+    name = ensure_monthly_rollup(company, project, period_from)
+
+    frappe.db.sql(
+        """
+        UPDATE
+            `tabIPC Monthly Rollup`
+        SET
+            {assignments},
+            modified = %(modified)s
+        WHERE
+            name = %(name)s
+        """.format(assignments=", ".join(f"{field} = {field} + %({field})s" for field in values)),
+        {**values, "name": name, "modified": now()}
+    )
+
+
+def ensure_monthly_rollup(company: str, project: str, period_from) -> str:
+    """Create the rollup row for a company, project and month if it does not exist yet; returns its name."""
+    name = get_rollup_name(company, project, period_from)
+    if frappe.db.exists("IPC Monthly Rollup", name):
+        return name
+
+    rollup = frappe.new_doc("IPC Monthly Rollup")
+    rollup.company = company
+    rollup.project = project
+    rollup.month = period_from
+
+    # A failed insert aborts the whole transaction on Postgres unless rolled back to a savepoint
+    frappe.db.savepoint("ensure_monthly_rollup")
+    try:
+        rollup.insert(ignore_permissions=True)
+    except frappe.DuplicateEntryError:
+        # Created by a concurrent transaction
+        frappe.db.rollback(save_point="ensure_monthly_rollup")
+
+    return name
+
+
+def get_monthly_totals(company: str, from_month, to_month, project: str = None) -> dict:
+    """
+    Get the rollup totals of a company per month.
+
+    Reads one row per project and month of the range, however many IPCs
+    they cover.
+
+    Args:
+        company: Company
+        from_month: Any date in the first month
+        to_month: Any date in the last month
+        project: Optional project
+
+    Returns:
+        Dictionary of month (first day) -> totals, for months with submitted IPCs
+    """
+    conditions = " AND project = %(project)s" if project else ""
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            month,
+            SUM(total_work_done) as total_work_done,
+            SUM(total_retention) as total_retention,
+            SUM(total_net) as total_net,
+            SUM(ipc_count) as ipc_count,
+            SUM(total_invoiced) as total_invoiced,
+            SUM(invoiced_count) as invoiced_count
+        FROM
+            `tabIPC Monthly Rollup`
+        WHERE
+            company = %(company)s
+            AND month BETWEEN %(from_month)s AND %(to_month)s
+            {conditions}
+        GROUP BY
+            month
+        """,
+        {
+            "company": company,
+            "from_month": get_first_day(from_month),
+            "to_month": get_first_day(to_month),
+            "project": project
+        },
+        as_dict=1
+    )
+
+    return {getdate(row.month): row for row in rows}
+
+
+def get_year_to_date_total(field: str, filters=None) -> dict:
+    """
+    Get a rollup total of the current year for a number card.
+
+    Args:
+        field: Rollup field to total
+        filters: Number card filters as JSON or dict with company and project
+
+    Returns:
+        Number card value with its fieldtype
+    """
+    frappe.has_permission("IPC Monthly Rollup", "read", throw=True)
+
+    filters = frappe._dict(frappe.parse_json(filters) or {})
+    company = filters.company or frappe.defaults.get_user_default("Company")
+
+    totals = get_monthly_totals(company, get_year_start(nowdate()), nowdate(), filters.project)
+
+    return {
+        "value": sum(flt(row.get(field)) for row in totals.values()),
+        "fieldtype": "Int" if field.endswith("_count") else "Currency"
+    }
+
+
+@frappe.whitelist()
+def get_certified_this_year(filters=None) -> dict:
+    """Number card: work certified by IPCs with periods starting this year."""
+    return get_year_to_date_total("total_work_done", filters)
+
+
+@frappe.whitelist()
+def get_invoiced_this_year(filters=None) -> dict:
+    """Number card: net amount invoiced for IPCs with periods starting this year."""
+    return get_year_to_date_total("total_invoiced", filters)
+
+
+@frappe.whitelist()
+def get_retention_this_year(filters=None) -> dict:
+    """Number card: retention held on IPCs with periods starting this year."""
+    return get_year_to_date_total("total_retention", filters)
+
+
+def rebuild_monthly_rollup(projects: list = None) -> int:
+    """
+    Recompute rollup rows from submitted IPCs, repairing any drift.
+
+    Only rows whose totals differ are written, and rows left without
+    submitted IPCs are deleted. Runs nightly for all projects, and after
+    bulk imports for the imported projects.
+
+    Args:
+        projects: Optional list of projects to rebuild, all projects otherwise
+
+    Returns:
+        Number of rows created, corrected or deleted
+    """
+    conditions = ""
+    if projects:
+        conditions = " AND project IN %(projects)s"
+
+    # Months are grouped with EXTRACT, which runs on MariaDB and Postgres alike
+    totals = frappe.db.sql(
+        f"""
+        SELECT
+            company,
+            project,
+            EXTRACT(YEAR FROM period_from) as period_year,
+            EXTRACT(MONTH FROM period_from) as period_month,
+            SUM(total_work_done) as total_work_done,
+            SUM(retention_amount) as total_retention,
+            SUM(net_amount) as total_net,
+            COUNT(*) as ipc_count,
+            SUM(CASE WHEN COALESCE(sales_invoice, '') != '' THEN net_amount ELSE 0 END) as total_invoiced,
+            SUM(CASE WHEN COALESCE(sales_invoice, '') != '' THEN 1 ELSE 0 END) as invoiced_count
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus = 1
+            {conditions}
+        GROUP BY
+            company, project, period_year, period_month
+        """,
+        {"projects": tuple(projects or ())},
+        as_dict=1
+    )
+    for row in totals:
+        row.month = datetime.date(cint(row.period_year), cint(row.period_month), 1)
+    expected = {get_rollup_name(row.company, row.project, row.month): row for row in totals}
+
+    rollup_filters = {"project": ["in", projects]} if projects else {}
+    current = {
+        row.name: row
+        for row in frappe.get_all(
+            "IPC Monthly Rollup", filters=rollup_filters, fields=["name", *ROLLUP_FIELDS]
+        )
+    }
+
+    repaired = 0
+    for name in set(current) - set(expected):
+        frappe.delete_doc("IPC Monthly Rollup", name, ignore_permissions=True, force=True)
+        repaired += 1
+
+    for name, row in expected.items():
+        values = {field: flt(row.get(field)) for field in TOTAL_FIELDS}
+        values.update({
+            "total_invoiced": flt(row.total_invoiced),
+            "ipc_count": cint(row.ipc_count),
+            "invoiced_count": cint(row.invoiced_count)
+        })
+
+        if name in current and all(
+            flt(current[name].get(field), 6) == flt(value, 6) for field, value in values.items()
+        ):
+            continue
+
+        ensure_monthly_rollup(row.company, row.project, row.month)
+        frappe.db.set_value("IPC Monthly Rollup", name, values, update_modified=True)
+        repaired += 1
+
+    return repaired
+
+
+@frappe.whitelist()
+def rebuild(project: str = None) -> int:
+    """Rebuild the monthly rollup for one project or for all projects."""
+    frappe.only_for("System Manager")
+
+    return rebuild_monthly_rollup([project] if project else None)
@@ -0,0 +1,124 @@
+"""
+Test cases for IPC Monthly Rollup DocType.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, get_first_day, getdate
+
+from contracting_ipc.contracting_ipc.dashboard_chart_source.ipc_monthly_trends.ipc_monthly_trends import get
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.contracting_ipc.doctype.ipc_monthly_rollup.ipc_monthly_rollup import (
+    ROLLUP_FIELDS,
+    get_rollup_name,
+    rebuild_monthly_rollup,
+)
+
+
+class TestIPCMonthlyRollup(FrappeTestCase):
+    """Test that the monthly rollup matches the submitted IPCs."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+        test_ipc.TestIPC.set_invoice_defaults()
+
+    def make_ipc(self, total_work_done, submit=True):
+        """Create an IPC for the test project."""
+        return test_ipc.TestIPC.make_ipc(submit=submit, total_work_done=total_work_done)
+
+    def get_totals_from_ipcs(self, period_from):
+        """Aggregate the submitted IPCs of the test project in the month of a date directly."""
+        month = get_first_day(period_from)
+        return frappe.db.sql(
+            """
+            SELECT
+                COALESCE(SUM(total_work_done), 0) as total_work_done,
+                COALESCE(SUM(retention_amount), 0) as total_retention,
+                COALESCE(SUM(net_amount), 0) as total_net,
+                COUNT(*) as ipc_count,
+                COALESCE(
+                    SUM(CASE WHEN COALESCE(sales_invoice, '') != '' THEN net_amount END), 0
+                ) as total_invoiced,
+                COUNT(NULLIF(COALESCE(sales_invoice, ''), '')) as invoiced_count
+            FROM
+                `tabIPC`
+            WHERE
+                project = %s
+                AND company = %s
+                AND docstatus = 1
+                AND period_from BETWEEN %s AND LAST_DAY(%s)
+            """,
+            ("_Test Project", "_Test Company", month, month),
+            as_dict=1
+        )[0]
+
+    def assertRollupMatches(self, period_from):
+        """Compare the rollup row of a month with the aggregate over its submitted IPCs."""
+        expected = self.get_totals_from_ipcs(period_from)
+        rollup = frappe.db.get_value(
+            "IPC Monthly Rollup",
+            get_rollup_name("_Test Company", "_Test Project", period_from),
+            ROLLUP_FIELDS,
+            as_dict=True
+        ) or frappe._dict()
+
+        for field in ROLLUP_FIELDS:
+            self.assertEqual(flt(rollup.get(field), 2), flt(expected[field], 2), field)
+
+    def test_rollup_follows_submit_invoice_and_cancel(self):
+        """Test that submitting, invoicing and cancelling IPCs keeps the rollup consistent."""
+        from contracting_ipc.contracting_ipc.doctype.ipc.ipc import create_sales_invoice
+
+        first = self.make_ipc(100000)
+        second = self.make_ipc(55000.55)
+        self.make_ipc(20000, submit=False)
+
+        create_sales_invoice(first.name)
+        for ipc in (first, second):
+            self.assertRollupMatches(ipc.period_from)
+
+        second.cancel()
+        self.assertRollupMatches(second.period_from)
+
+    def test_rebuild_repairs_drift(self):
+        """Test that the rebuild corrects changed rows and removes rows without IPCs."""
+        ipc = self.make_ipc(80000)
+        name = get_rollup_name(ipc.company, ipc.project, ipc.period_from)
+        frappe.db.set_value("IPC Monthly Rollup", name, {"total_work_done": 1, "ipc_count": 7})
+
+        orphan = frappe.get_doc({
+            "doctype": "IPC Monthly Rollup",
+            "company": "_Test Company",
+            "project": "_Test Project",
+            "month": "1999-01-01",
+            "ipc_count": 3
+        }).insert(ignore_permissions=True)
+
+        self.assertGreaterEqual(rebuild_monthly_rollup(["_Test Project"]), 2)
+        self.assertRollupMatches(ipc.period_from)
+        self.assertFalse(frappe.db.exists("IPC Monthly Rollup", orphan.name))
+
+        # A consistent rollup is left untouched
+        self.assertEqual(rebuild_monthly_rollup(["_Test Project"]), 0)
+
+    def test_monthly_trends_chart(self):
+        """Test that the chart source returns a value per month, zero for months without IPCs."""
+        ipc = self.make_ipc(42000)
+        month = getdate(get_first_day(ipc.period_from))
+
+        data = get(filters={
+            "company": "_Test Company",
+            "project": "_Test Project",
+            "from_date": "2049-11-01",
+            "to_date": month
+        })
+
+        self.assertEqual(data["labels"][-1], month.strftime("%b %Y"))
+        self.assertEqual(data["labels"][0], "Nov 2049")
+
+        certified = data["datasets"][0]["values"]
+        self.assertEqual(certified[0], 0)
+        self.assertEqual(flt(certified[-1], 2), flt(self.get_totals_from_ipcs(month).total_work_done, 2))
@@ -0,0 +1,21 @@
+"""
+IPC Performance Log DocType Controller.
+
+Sampled timings of instrumented IPC operations, written in the background
+by `contracting_ipc.instrumentation`.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+
+
+class IPCPerformanceLog(Document):
+    """Controller class for IPC Performance Log DocType."""
+
+    @staticmethod
+    def clear_old_logs(days=30):
+        """Delete logs older than `days`; called by Log Settings."""
+        table = frappe.qb.DocType("IPC Performance Log")
+        frappe.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
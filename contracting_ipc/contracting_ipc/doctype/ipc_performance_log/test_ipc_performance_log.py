@@ -0,0 +1,71 @@
+"""
+Test cases for IPC instrumentation and IPC Performance Log.
+"""
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from contracting_ipc import instrumentation
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.instrumentation import format_prometheus, get_snapshot, instrument, reset_stats
+
+
+class TestIPCPerformanceLog(FrappeTestCase):
+    """Test cases for the instrumented IPC operations."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+    def setUp(self):
+        reset_stats()
+
+    def tearDown(self):
+        frappe.local.conf.pop("ipc_instrumentation", None)
+        reset_stats()
+
+    def test_disabled_records_nothing(self):
+        """Test that no counters are written while instrumentation is off."""
+        test_ipc.TestIPC.make_ipc()
+
+        self.assertEqual(get_snapshot(), {})
+
+    def test_validate_is_measured(self):
+        """Test that saving an IPC records a call with its SQL statements."""
+        frappe.local.conf.ipc_instrumentation = 1
+
+        test_ipc.TestIPC.make_ipc()
+        test_ipc.TestIPC.make_ipc()
+        stats = get_snapshot()["IPC.validate"]
+
+        self.assertEqual(stats["calls"], 2)
+        self.assertGreater(stats["sql_count"], 0)
+        self.assertGreaterEqual(stats["wall_time"], stats["sql_time"])
+        self.assertGreaterEqual(stats["max_wall_time"], stats["wall_time"] / 2)
+
+    def test_failure_to_measure_is_raised(self):
+        """Test that an error starting a measurement is raised as is and nothing is recorded."""
+        frappe.local.conf.ipc_instrumentation = 1
+
+        @instrument("test_operation")
+        def operation():
+            return 1
+
+        with patch.object(instrumentation, "install_sql_hook", side_effect=RuntimeError("No hook")):
+            self.assertRaisesRegex(RuntimeError, "No hook", operation)
+
+        self.assertEqual(get_snapshot(), {})
+
+    def test_prometheus_format(self):
+        """Test that every operation is exported as labelled samples."""
+        frappe.local.conf.ipc_instrumentation = 1
+        test_ipc.TestIPC.make_ipc()
+
+        text = format_prometheus(get_snapshot())
+
+        self.assertIn("# TYPE ipc_operation_calls_total counter", text)
+        self.assertIn('ipc_operation_calls_total{operation="IPC.validate"} 1', text)
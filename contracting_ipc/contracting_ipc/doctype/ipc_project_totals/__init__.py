@@ -0,0 +1 @@
+# IPC Project Totals DocType
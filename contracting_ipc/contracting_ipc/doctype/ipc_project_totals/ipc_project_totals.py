@@ -0,0 +1,205 @@
+"""
+IPC Project Totals DocType Controller.
+
+Keeps one row per project with the cumulative amounts of its submitted
+IPCs. Rows are updated incrementally when an IPC is submitted or
+cancelled, so reading a project's totals never aggregates `tabIPC`.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, now
+
+# Ledger field -> IPC field it accumulates
+TOTAL_FIELDS = {
+    "total_work_done": "total_work_done",
+    "total_retention": "retention_amount",
+    "total_advance": "advance_deduction",
+    "total_net": "net_amount"
+}
+
+
+class IPCProjectTotals(Document):
+    """Controller class for IPC Project Totals DocType."""
+
+    pass
+
+
+def update_project_totals(ipc, cancel: bool = False):
+    """
+    Add a submitted IPC to its project's totals, or remove a cancelled one.
+
+    The row is updated with a relative UPDATE so concurrent submissions
+    on the same project cannot overwrite each other.
+
+    Args:
+        ipc: IPC document
+        cancel: True when the IPC is being cancelled
+    """
+    sign = -1 if cancel else 1
+    values = {
+        ledger_field: sign * flt(ipc.get(ipc_field)) for ledger_field, ipc_field in TOTAL_FIELDS.items()
+    }
+    values["ipc_count"] = sign
+
+    add_to_project_totals(ipc.project, ipc.company, values)
+
+
+def add_to_project_totals(project: str, company: str, values: dict):
+    """
+    Add amounts and an IPC count to a project's totals.
+
+    Args:
+        project: Project name
+        company: Company of the project's IPCs
+        values: Every `TOTAL_FIELDS` ledger field and ipc_count -> amount or count to add
+    """
+    ensure_project_totals(project, company)
+
+    frappe.db.sql(
+        """
+        UPDATE
+            `tabIPC Project Totals`
+        SET
+            total_work_done = total_work_done + %(total_work_done)s,
+            total_retention = total_retention + %(total_retention)s,
+            total_advance = total_advance + %(total_advance)s,
+            total_net = total_net + %(total_net)s,
+            ipc_count = ipc_count + %(ipc_count)s,
+            modified = %(modified)s
+        WHERE
+            name = %(project)s
+        """,
+        {**values, "project": project, "modified": now()}
+    )
+
+
+def ensure_project_totals(project: str, company: str = None):
+    """Create the totals row for a project if it does not exist yet."""
+    if frappe.db.exists("IPC Project Totals", project):
+        return
+
+    totals = frappe.new_doc("IPC Project Totals")
+    totals.project = project
+    totals.company = company or frappe.db.get_value("Project", project, "company")
+
+    # A failed insert aborts the whole transaction on Postgres unless rolled back to a savepoint
+    frappe.db.savepoint("ensure_project_totals")
+    try:
+        totals.insert(ignore_permissions=True)
+    except frappe.DuplicateEntryError:
+        # Created by a concurrent transaction
+        frappe.db.rollback(save_point="ensure_project_totals")
+
+
+def get_project_totals(project: str) -> dict:
+    """
+    Get cumulative totals of submitted IPCs for a project from the ledger.
+
+    Args:
+        project: Project name
+
+    Returns:
+        Dictionary with cumulative totals
+    """
+    totals = frappe.db.get_value(
+        "IPC Project Totals",
+        project,
+        [*TOTAL_FIELDS, "ipc_count"],
+        as_dict=True
+    )
+
+    return totals or frappe._dict({field: 0 for field in [*TOTAL_FIELDS, "ipc_count"]})
+
+
+def get_totals_for_projects(projects: list) -> dict:
+    """
+    Get ledger totals for many projects in a single query.
+
+    Args:
+        projects: List of project names
+
+    Returns:
+        Dictionary of project -> totals; projects without submitted IPCs get zeros
+    """
+    result = {
+        project: frappe._dict({field: 0 for field in [*TOTAL_FIELDS, "ipc_count"]})
+        for project in projects
+    }
+
+    for row in frappe.get_all(
+        "IPC Project Totals",
+        filters={"name": ["in", projects]},
+        fields=["name", *TOTAL_FIELDS, "ipc_count"]
+    ):
+        result[row.pop("name")] = row
+
+    return result
+
+
+def rebuild_project_totals(projects: list = None) -> int:
+    """
+    Recompute project totals from submitted IPCs.
+
+    Used to backfill the ledger and to repair it after direct database
+    changes.
+
+    Args:
+        projects: Optional list of projects to rebuild, all projects otherwise
+
+    Returns:
+        Number of projects rebuilt
+    """
+    conditions = ""
+    if projects:
+        conditions = " AND project IN %(projects)s"
+
+    totals = frappe.db.sql(
+        f"""
+        SELECT
+            project,
+            MAX(company) as company,
+            SUM(total_work_done) as total_work_done,
+            SUM(retention_amount) as total_retention,
+            SUM(advance_deduction) as total_advance,
+            SUM(net_amount) as total_net,
+            COUNT(*) as ipc_count
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus = 1
+            {conditions}
+        GROUP BY
+            project
+        """,
+        {"projects": tuple(projects or ())},
+        as_dict=1
+    )
+    totals_by_project = {row.project: row for row in totals}
+
+    # Projects that have a ledger row but no submitted IPCs are reset to zero
+    ledger_filters = {"project": ["in", projects]} if projects else {}
+    for project in frappe.get_all("IPC Project Totals", filters=ledger_filters, pluck="name"):
+        totals_by_project.setdefault(project, frappe._dict(project=project))
+
+    for project, row in totals_by_project.items():
+        ensure_project_totals(project, row.company)
+        frappe.db.set_value(
+            "IPC Project Totals",
+            project,
+            {
+                **{field: flt(row.get(field)) for field in TOTAL_FIELDS},
+                "ipc_count": row.ipc_count or 0
+            },
+            update_modified=True
+        )
+
+    return len(totals_by_project)
+
+
+@frappe.whitelist()
+def rebuild(project: str = None) -> int:
+    """Rebuild the totals ledger for one project or for all projects."""
+    frappe.only_for("System Manager")
+
+    return rebuild_project_totals([project] if project else None)
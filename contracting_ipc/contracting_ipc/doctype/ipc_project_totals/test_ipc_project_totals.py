@@ -0,0 +1,97 @@
+"""
+Test cases for IPC Project Totals DocType.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from contracting_ipc.api import get_ipc_totals_by_project, get_ipc_totals_by_projects
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+    rebuild_project_totals,
+)
+
+
+class TestIPCProjectTotals(FrappeTestCase):
+    """Test that the project totals ledger matches the submitted IPCs."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+    def make_ipc(self, total_work_done, submit=True, **kwargs):
+        """Create an IPC for the test project."""
+        values = {"total_work_done": total_work_done, "advance_deduction": 1000}
+        values.update(kwargs)
+        return test_ipc.TestIPC.make_ipc(submit=submit, **values)
+
+    def get_totals_from_ipcs(self):
+        """Aggregate the submitted IPCs of the test project directly."""
+        return frappe.db.sql(
+            """
+            SELECT
+                COALESCE(SUM(total_work_done), 0) as total_work_done,
+                COALESCE(SUM(retention_amount), 0) as total_retention,
+                COALESCE(SUM(advance_deduction), 0) as total_advance,
+                COALESCE(SUM(net_amount), 0) as total_net,
+                COUNT(*) as ipc_count
+            FROM
+                `tabIPC`
+            WHERE
+                project = %s
+                AND docstatus = 1
+            """,
+            "_Test Project",
+            as_dict=1
+        )[0]
+
+    def assertTotalsMatch(self):
+        """Compare the ledger with the aggregate over submitted IPCs."""
+        expected = self.get_totals_from_ipcs()
+        totals = get_ipc_totals_by_project("_Test Project")
+
+        for field in ("total_work_done", "total_retention", "total_advance", "total_net"):
+            self.assertEqual(flt(totals[field], 2), flt(expected[field], 2), field)
+        self.assertEqual(totals["ipc_count"], expected["ipc_count"])
+
+    def test_totals_follow_submit_and_cancel(self):
+        """Test that submitting and cancelling IPCs keeps the ledger consistent."""
+        self.make_ipc(100000)
+        second = self.make_ipc(55000.55)
+        self.make_ipc(20000, submit=False)
+        self.assertTotalsMatch()
+
+        second.cancel()
+        self.assertTotalsMatch()
+
+    def test_rebuild_matches_aggregate(self):
+        """Test that rebuilding the ledger reproduces the aggregate."""
+        self.make_ipc(75000)
+        frappe.db.set_value("IPC Project Totals", "_Test Project", "total_work_done", 0)
+
+        rebuild_project_totals(["_Test Project"])
+        self.assertTotalsMatch()
+
+    def test_batch_totals(self):
+        """Test that batch totals match single-project totals and zero-fill unknown projects."""
+        self.make_ipc(42000)
+
+        batch = get_ipc_totals_by_projects(["_Test Project", "_Test Project Without IPCs"])
+        single = get_ipc_totals_by_project("_Test Project")
+
+        self.assertEqual(flt(batch["_Test Project"]["total_net"], 2), flt(single["total_net"], 2))
+        self.assertEqual(batch["_Test Project"]["ipc_count"], single["ipc_count"])
+        self.assertEqual(batch["_Test Project Without IPCs"]["ipc_count"], 0)
+
+    def test_batch_totals_with_cutoff(self):
+        """Test that the grouped query applies the company and date cutoff."""
+        self.make_ipc(42000)
+
+        batch = get_ipc_totals_by_projects('["_Test Project"]', company="_Test Company", to_date="2099-12-31")
+        expected = self.get_totals_from_ipcs()
+
+        self.assertEqual(flt(batch["_Test Project"]["total_work_done"], 2), flt(expected.total_work_done, 2))
+        self.assertEqual(batch["_Test Project"]["ipc_count"], expected.ipc_count)
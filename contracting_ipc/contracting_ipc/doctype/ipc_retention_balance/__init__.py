@@ -0,0 +1 @@
+# IPC Retention Balance DocType
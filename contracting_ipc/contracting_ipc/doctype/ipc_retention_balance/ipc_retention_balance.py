@@ -0,0 +1,88 @@
+"""
+IPC Retention Balance DocType Controller.
+
+Keeps the outstanding retention per project and customer. The balance is
+moved by every IPC Retention Ledger Entry, so reading what is held never
+re-aggregates the ledger or the certificates.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, now
+
+
+class IPCRetentionBalance(Document):
+    """Controller class for IPC Retention Balance DocType."""
+
+    pass
+
+
+def on_doctype_update():
+    """One balance row per project and customer."""
+    frappe.db.add_unique("IPC Retention Balance", ["project", "customer"], constraint_name="project_customer")
+
+
+def ensure_retention_balance(project: str, customer: str, company: str = None) -> str:
+    """
+    Get the balance row for a project and customer, creating it if needed.
+
+    Returns:
+        Name of the balance row
+    """
+    name = frappe.db.get_value("IPC Retention Balance", {"project": project, "customer": customer})
+    if name:
+        return name
+
+    balance = frappe.new_doc("IPC Retention Balance")
+    balance.update({"project": project, "customer": customer, "company": company})
+
+    # A failed insert aborts the whole transaction on Postgres unless rolled back to a savepoint
+    frappe.db.savepoint("ensure_retention_balance")
+    try:
+        balance.insert(ignore_permissions=True)
+        return balance.name
+    except frappe.DuplicateEntryError:
+        # Created by a concurrent transaction
+        frappe.db.rollback(save_point="ensure_retention_balance")
+        return frappe.db.get_value("IPC Retention Balance", {"project": project, "customer": customer})
+
+
+def get_outstanding_retention(project: str, customer: str, for_update: bool = False) -> float:
+    """
+    Get the retention held for a project and customer.
+
+    Args:
+        project: Project name
+        customer: Customer name
+        for_update: Lock the balance row until the end of the transaction
+
+    Returns:
+        Outstanding retention amount
+    """
+    if for_update:
+        ensure_retention_balance(project, customer)
+
+    return flt(frappe.db.get_value(
+        "IPC Retention Balance",
+        {"project": project, "customer": customer},
+        "outstanding_retention",
+        for_update=for_update
+    ))
+
+
+def update_retention_balance(project: str, customer: str, company: str, amount: float):
+    """Move the outstanding retention of a project and customer by `amount`."""
+    name = ensure_retention_balance(project, customer, company)
+
+    frappe.db.sql(
+        """
+        UPDATE
+            `tabIPC Retention Balance`
+        SET
+            outstanding_retention = outstanding_retention + %(amount)s,
+            modified = %(modified)s
+        WHERE
+            name = %(name)s
+        """,
+        {"amount": flt(amount), "modified": now(), "name": name}
+    )
@@ -0,0 +1 @@
+# IPC Retention Ledger Entry DocType
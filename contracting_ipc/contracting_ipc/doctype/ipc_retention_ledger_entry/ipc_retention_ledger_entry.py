@@ -0,0 +1,212 @@
+"""
+IPC Retention Ledger Entry DocType Controller.
+
+Every submitted IPC holds its retention amount and every IPC Retention
+Release gives part of it back. Each of them posts an entry here and moves
+the IPC Retention Balance of its project and customer. Cancelling a
+voucher marks its entries as cancelled and reverses the balance.
+
+Entries are posted on the date the voucher is submitted. Held retention
+ages from the end of the IPC period, kept apart as the age from date.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, getdate, now_datetime, nowdate
+
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_balance.ipc_retention_balance import (
+    update_retention_balance,
+)
+
+# Columns written when the ledger is rebuilt, in insert order
+LEDGER_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by", "posting_date", "age_from_date",
+    "company", "project", "customer", "voucher_type", "voucher_no", "amount", "is_cancelled"
+]
+
+
+class IPCRetentionLedgerEntry(Document):
+    """Controller class for IPC Retention Ledger Entry DocType."""
+
+    pass
+
+
+def on_doctype_update():
+    """Indexes for balance lookups, aging and voucher cancellation."""
+    frappe.db.add_index("IPC Retention Ledger Entry", ["project", "customer"])
+    frappe.db.add_index("IPC Retention Ledger Entry", ["voucher_type", "voucher_no"])
+
+
+def make_retention_entry(voucher, amount: float, posting_date, age_from_date=None):
+    """
+    Post a retention ledger entry for a voucher and move the balance.
+
+    Args:
+        voucher: IPC or IPC Retention Release document
+        amount: Positive when retention is held, negative when it is released
+        posting_date: Date the retention was held or released
+        age_from_date: Date the retention ages from, the posting date by default
+    """
+    if not flt(amount):
+        return
+
+    frappe.get_doc({
+        "doctype": "IPC Retention Ledger Entry",
+        "posting_date": posting_date,
+        "age_from_date": age_from_date or posting_date,
+        "company": voucher.company,
+        "project": voucher.project,
+        "customer": voucher.customer,
+        "voucher_type": voucher.doctype,
+        "voucher_no": voucher.name,
+        "amount": flt(amount)
+    }).insert(ignore_permissions=True)
+
+    update_retention_balance(voucher.project, voucher.customer, voucher.company, amount)
+
+
+def cancel_retention_entries(voucher):
+    """Mark the ledger entries of a cancelled voucher as cancelled and reverse the balance."""
+    entries = frappe.get_all(
+        "IPC Retention Ledger Entry",
+        filters={"voucher_type": voucher.doctype, "voucher_no": voucher.name, "is_cancelled": 0},
+        fields=["name", "project", "customer", "company", "amount"]
+    )
+
+    for entry in entries:
+        frappe.db.set_value("IPC Retention Ledger Entry", entry.name, "is_cancelled", 1)
+        update_retention_balance(entry.project, entry.customer, entry.company, -flt(entry.amount))
+
+
+def rebuild_retention_ledger(projects: list = None) -> int:
+    """
+    Re-post the retention held by submitted IPCs and recompute the balances.
+
+    Release entries are kept as they are; IPC entries are regenerated in
+    bulk from the certificates, keeping their posting dates. An IPC without
+    an entry is posted on the date it was last modified.
+
+    Args:
+        projects: Optional list of projects to rebuild, all projects otherwise
+
+    Returns:
+        Number of IPC entries posted
+    """
+    conditions = ""
+    if projects:
+        conditions = " AND project IN %(projects)s"
+    values = {"projects": tuple(projects or ())}
+
+    posting_dates = dict(frappe.db.sql(
+        f"""
+        SELECT
+            voucher_no, MIN(posting_date)
+        FROM
+            `tabIPC Retention Ledger Entry`
+        WHERE
+            voucher_type = 'IPC'
+            AND is_cancelled = 0
+            {conditions}
+        GROUP BY
+            voucher_no
+        """,
+        values
+    ))
+
+    frappe.db.sql(
+        f"""
+        DELETE FROM
+            `tabIPC Retention Ledger Entry`
+        WHERE
+            voucher_type = 'IPC'
+            {conditions}
+        """,
+        values
+    )
+
+    ipcs = frappe.db.sql(
+        f"""
+        SELECT
+            name, company, project, customer, period_to, retention_amount, modified
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus = 1
+            AND retention_amount != 0
+            {conditions}
+        """,
+        values,
+        as_dict=1
+    )
+
+    for ipc in ipcs:
+        ipc.posting_date = posting_dates.get(ipc.name) or getdate(ipc.modified)
+
+    insert_ipc_retention_entries(ipcs)
+    rebuild_retention_balances(conditions, values)
+
+    return len(ipcs)
+
+
+def insert_ipc_retention_entries(ipcs: list):
+    """
+    Post the retention held by submitted IPCs in one bulk insert, without
+    moving the balances.
+
+    Args:
+        ipcs: Dicts with name, company, project, customer, period_to and
+            retention_amount, and optionally the posting_date, today by default
+    """
+    timestamp = now_datetime()
+    posting_date = getdate(nowdate())
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        "IPC Retention Ledger Entry",
+        LEDGER_FIELDS,
+        [
+            (
+                frappe.generate_hash(length=10), timestamp, timestamp, user, user,
+                getdate(ipc.get("posting_date") or posting_date), getdate(ipc.period_to),
+                ipc.company, ipc.project, ipc.customer, "IPC", ipc.name, ipc.retention_amount, 0
+            )
+            for ipc in ipcs
+            if flt(ipc.retention_amount)
+        ]
+    )
+
+
+def rebuild_retention_balances(conditions: str, values: dict):
+    """Recompute outstanding retention from the ledger for the matching projects."""
+    frappe.db.sql(
+        f"""
+        UPDATE
+            `tabIPC Retention Balance`
+        SET
+            outstanding_retention = 0
+        WHERE
+            1 = 1
+            {conditions}
+        """,
+        values
+    )
+
+    balances = frappe.db.sql(
+        f"""
+        SELECT
+            project, customer, MAX(company) as company, SUM(amount) as outstanding_retention
+        FROM
+            `tabIPC Retention Ledger Entry`
+        WHERE
+            is_cancelled = 0
+            {conditions}
+        GROUP BY
+            project, customer
+        """,
+        values,
+        as_dict=1
+    )
+
+    for balance in balances:
+        update_retention_balance(
+            balance.project, balance.customer, balance.company, balance.outstanding_retention
+        )
@@ -0,0 +1,123 @@
+"""
+Test cases for the IPC retention ledger.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, flt, getdate, today
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_balance.ipc_retention_balance import (
+    get_outstanding_retention,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_ledger_entry.ipc_retention_ledger_entry import (
+    rebuild_retention_ledger,
+)
+from contracting_ipc.contracting_ipc.report.ipc_retention_aging.ipc_retention_aging import execute
+
+
+class TestIPCRetentionLedgerEntry(FrappeTestCase):
+    """Test cases for retention held by IPCs and given back by releases."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+    def make_ipc(self, total_work_done, period_to=None):
+        """Create and submit an IPC holding 10% retention."""
+        period_to = period_to or test_ipc.TestIPC.get_test_period()[1]
+        return test_ipc.TestIPC.make_ipc(
+            submit=True,
+            period_from=add_days(period_to, -30),
+            period_to=period_to,
+            total_work_done=total_work_done
+        )
+
+    def make_release(self, amount):
+        """Create an IPC Retention Release for the test project and customer."""
+        return frappe.get_doc({
+            "doctype": "IPC Retention Release",
+            "company": "_Test Company",
+            "project": "_Test Project",
+            "customer": "_Test Customer",
+            "amount": amount
+        })
+
+    def get_outstanding(self):
+        return get_outstanding_retention("_Test Project", "_Test Customer")
+
+    def test_submit_and_cancel_move_balance(self):
+        """Test that submitting holds retention and cancelling gives it back."""
+        opening = self.get_outstanding()
+
+        ipc = self.make_ipc(50000)
+        self.assertEqual(self.get_outstanding(), flt(opening + 5000))
+
+        ipc.cancel()
+        self.assertEqual(self.get_outstanding(), flt(opening))
+        self.assertTrue(frappe.db.get_value(
+            "IPC Retention Ledger Entry", {"voucher_type": "IPC", "voucher_no": ipc.name}, "is_cancelled"
+        ))
+
+    def test_release_reduces_balance(self):
+        """Test that a submitted release reduces the outstanding retention."""
+        self.make_ipc(20000)
+        opening = self.get_outstanding()
+
+        release = self.make_release(1500)
+        release.insert()
+        release.submit()
+        self.assertEqual(self.get_outstanding(), flt(opening - 1500))
+
+        release.cancel()
+        self.assertEqual(self.get_outstanding(), flt(opening))
+
+    def test_release_cannot_exceed_outstanding(self):
+        """Test that releasing more than is held is rejected."""
+        release = self.make_release(self.get_outstanding() + 1)
+        self.assertRaises(frappe.ValidationError, release.insert)
+
+    def test_aging_report_matches_balance(self):
+        """Test that the aging buckets add up to the balance, oldest released first."""
+        self.make_ipc(30000, period_to=add_days(today(), -200))
+        self.make_ipc(40000)
+
+        release = self.make_release(1000)
+        release.insert()
+        release.submit()
+
+        columns, data = execute({"company": "_Test Company", "project": "_Test Project"})
+        row = data[0]
+
+        self.assertEqual(flt(row.outstanding_retention, 2), flt(self.get_outstanding(), 2))
+        self.assertEqual(
+            flt(row.outstanding_retention, 2),
+            flt(row.age_0_90 + row.age_90_180 + row.age_180_365 + row.age_365_plus, 2)
+        )
+
+    def test_retention_posted_on_submission_ages_from_period_end(self):
+        """Test that held retention is posted on submission and aged from the end of the IPC period."""
+        old_ipc = self.make_ipc(30000, period_to=add_days(today(), -200))
+        entry = frappe.db.get_value(
+            "IPC Retention Ledger Entry",
+            {"voucher_type": "IPC", "voucher_no": old_ipc.name},
+            ["posting_date", "age_from_date"],
+            as_dict=True
+        )
+        self.assertEqual(entry.posting_date, getdate(today()))
+        self.assertEqual(entry.age_from_date, getdate(old_ipc.period_to))
+
+        # A period ending after the as on date is reported as soon as it is submitted
+        self.make_ipc(40000)
+        row = execute({"company": "_Test Company", "project": "_Test Project"})[1][0]
+        self.assertEqual(flt(row.outstanding_retention, 2), flt(self.get_outstanding(), 2))
+
+    def test_rebuild_preserves_balance(self):
+        """Test that rebuilding the ledger from IPCs keeps the outstanding retention."""
+        self.make_ipc(25000)
+        outstanding = self.get_outstanding()
+
+        rebuild_retention_ledger(["_Test Project"])
+        self.assertEqual(flt(self.get_outstanding(), 2), flt(outstanding, 2))
@@ -0,0 +1 @@
+# IPC Retention Release DocType
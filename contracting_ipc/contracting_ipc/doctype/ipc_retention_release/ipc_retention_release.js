@@ -0,0 +1,38 @@
+// Copyright (c) 2024, Your Company and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("IPC Retention Release", {
+    /**
+     * Project field change handler
+     */
+    project: function (frm) {
+        frm.trigger("set_outstanding_retention");
+    },
+
+    /**
+     * Customer field change handler
+     */
+    customer: function (frm) {
+        frm.trigger("set_outstanding_retention");
+    },
+
+    /**
+     * Show the retention held for the selected project and customer
+     */
+    set_outstanding_retention: function (frm) {
+        if (!frm.doc.project || !frm.doc.customer) {
+            return;
+        }
+
+        frappe.call({
+            method: "contracting_ipc.contracting_ipc.doctype.ipc_retention_release.ipc_retention_release.get_outstanding",
+            args: {
+                project: frm.doc.project,
+                customer: frm.doc.customer
+            },
+            callback: function (r) {
+                frm.set_value("outstanding_retention", r.message || 0);
+            }
+        });
+    }
+});
@@ -0,0 +1,67 @@
+"""
+IPC Retention Release DocType Controller.
+
+Records retention given back to a customer for a project. Submitting a
+release posts a negative entry to the retention ledger.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt
+
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_balance.ipc_retention_balance import (
+    get_outstanding_retention,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_ledger_entry.ipc_retention_ledger_entry import (
+    cancel_retention_entries,
+    make_retention_entry,
+)
+
+
+class IPCRetentionRelease(Document):
+    """Controller class for IPC Retention Release DocType."""
+
+    def validate(self):
+        """Validate the release amount against the retention held."""
+        if flt(self.amount) <= 0:
+            frappe.throw(_("Amount Released must be greater than zero."), title=_("Invalid Amount"))
+
+        self.outstanding_retention = get_outstanding_retention(self.project, self.customer)
+        self.validate_amount()
+
+    def before_submit(self):
+        """Re-check the outstanding retention under a row lock."""
+        self.outstanding_retention = get_outstanding_retention(self.project, self.customer, for_update=True)
+        self.validate_amount()
+
+    def validate_amount(self):
+        """Ensure no more than the outstanding retention is released."""
+        if flt(self.amount) > flt(self.outstanding_retention):
+            frappe.throw(
+                _(
+                    "Amount Released ({0}) cannot exceed the outstanding retention ({1}) for {2} / {3}."
+                ).format(
+                    frappe.format_value(self.amount, {"fieldtype": "Currency"}),
+                    frappe.format_value(self.outstanding_retention, {"fieldtype": "Currency"}),
+                    self.project,
+                    self.customer
+                ),
+                title=_("Excess Release")
+            )
+
+    def on_submit(self):
+        """Release the retention in the ledger."""
+        make_retention_entry(self, -flt(self.amount), self.posting_date)
+
+    def on_cancel(self):
+        """Reverse the release in the ledger."""
+        cancel_retention_entries(self)
+
+
+@frappe.whitelist()
+def get_outstanding(project: str, customer: str) -> float:
+    """Get the outstanding retention for a project and customer."""
+    frappe.has_permission("IPC Retention Release", "read", throw=True)
+
+    return get_outstanding_retention(project, customer)
@@ -0,0 +1 @@
+# IPC Retention Aging Report
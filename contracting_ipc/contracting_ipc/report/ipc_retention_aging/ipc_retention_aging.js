@@ -0,0 +1,33 @@
+// Copyright (c) 2024, Your Company and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["IPC Retention Aging"] = {
+    "filters": [
+        {
+            "fieldname": "company",
+            "label": __("Company"),
+            "fieldtype": "Link",
+            "options": "Company",
+            "default": frappe.defaults.get_user_default("Company")
+        },
+        {
+            "fieldname": "customer",
+            "label": __("Customer"),
+            "fieldtype": "Link",
+            "options": "Customer"
+        },
+        {
+            "fieldname": "project",
+            "label": __("Project"),
+            "fieldtype": "Link",
+            "options": "Project"
+        },
+        {
+            "fieldname": "as_on_date",
+            "label": __("As On Date"),
+            "fieldtype": "Date",
+            "default": frappe.datetime.get_today(),
+            "reqd": 1
+        }
+    ]
+};
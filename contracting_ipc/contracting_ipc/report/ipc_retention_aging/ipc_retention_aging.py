@@ -0,0 +1,157 @@
+"""
+IPC Retention Aging Report.
+
+Shows the outstanding retention per project and customer split into age
+buckets. Reads the IPC Retention Ledger Entry table; releases are applied
+to the oldest retention first.
+
+Entries posted up to the As On Date are included. Held retention ages from
+the end of its IPC period, so retention of a period ending after the As On
+Date falls in the first bucket.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, flt, getdate, today
+
+from contracting_ipc.instrumentation import instrument
+
+# Bucket fieldname -> (label, lower bound in days, upper bound in days)
+AGING_BUCKETS = {
+    "age_0_90": (_("0-90 Days"), 0, 90),
+    "age_90_180": (_("90-180 Days"), 91, 180),
+    "age_180_365": (_("180-365 Days"), 181, 365),
+    "age_365_plus": (_("365+ Days"), 366, None)
+}
+
+
+@instrument("IPC Retention Aging.execute")
+def execute(filters=None):
+    """Execute the IPC Retention Aging report."""
+    filters = frappe._dict(filters or {})
+    filters.as_on_date = getdate(filters.get("as_on_date") or today())
+
+    return get_columns(), get_data(filters)
+
+
+def get_columns():
+    """Define report columns."""
+    columns = [
+        {
+            "fieldname": "project",
+            "label": _("Project"),
+            "fieldtype": "Link",
+            "options": "Project",
+            "width": 150
+        },
+        {
+            "fieldname": "customer",
+            "label": _("Customer"),
+            "fieldtype": "Link",
+            "options": "Customer",
+            "width": 150
+        },
+        {
+            "fieldname": "company",
+            "label": _("Company"),
+            "fieldtype": "Link",
+            "options": "Company",
+            "width": 120
+        },
+        {
+            "fieldname": "outstanding_retention",
+            "label": _("Outstanding Retention"),
+            "fieldtype": "Currency",
+            "width": 150
+        }
+    ]
+
+    for fieldname, (label, _lower, _upper) in AGING_BUCKETS.items():
+        columns.append({
+            "fieldname": fieldname,
+            "label": label,
+            "fieldtype": "Currency",
+            "width": 120
+        })
+
+    return columns
+
+
+def get_data(filters):
+    """Aggregate held retention per age bucket and apply releases oldest first."""
+    # Entries posted before the age from date was kept age from their posting date
+    age_from = "COALESCE(age_from_date, posting_date)"
+    values = dict(filters)
+
+    # Bucket bounds are compared as dates, as date differences are not portable SQL
+    bucket_columns = []
+    for fieldname, (_label, lower, upper) in AGING_BUCKETS.items():
+        age_conditions = ["amount > 0"]
+        if lower:
+            values[f"{fieldname}_to"] = add_days(filters.as_on_date, -lower)
+            age_conditions.append(f"{age_from} <= %({fieldname}_to)s")
+        if upper is not None:
+            values[f"{fieldname}_from"] = add_days(filters.as_on_date, -upper)
+            age_conditions.append(f"{age_from} >= %({fieldname}_from)s")
+        bucket_columns.append(
+            f"SUM(CASE WHEN {' AND '.join(age_conditions)} THEN amount ELSE 0 END) as {fieldname}"
+        )
+    bucket_columns = ",\n            ".join(bucket_columns)
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            project,
+            customer,
+            MAX(company) as company,
+            {bucket_columns},
+            SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END) as released
+        FROM
+            `tabIPC Retention Ledger Entry`
+        WHERE
+            is_cancelled = 0
+            AND posting_date <= %(as_on_date)s
+            {get_conditions(filters)}
+        GROUP BY
+            project, customer
+        ORDER BY
+            project, customer
+        """,
+        values,
+        as_dict=1
+    )
+
+    data = []
+    for row in rows:
+        apply_releases(row)
+        row.outstanding_retention = sum(flt(row[fieldname]) for fieldname in AGING_BUCKETS)
+        if row.outstanding_retention > 0:
+            data.append(row)
+
+    return data
+
+
+def apply_releases(row):
+    """Consume released retention from the oldest bucket to the newest."""
+    released = flt(row.pop("released"))
+
+    for fieldname in reversed(AGING_BUCKETS):
+        consumed = min(flt(row[fieldname]), released)
+        row[fieldname] = flt(row[fieldname]) - consumed
+        released -= consumed
+
+
+def get_conditions(filters):
+    """Build SQL conditions based on filters."""
+    conditions = ""
+
+    if filters.get("company"):
+        conditions += " AND company = %(company)s"
+
+    if filters.get("customer"):
+        conditions += " AND customer = %(customer)s"
+
+    if filters.get("project"):
+        conditions += " AND project = %(project)s"
+
+    return conditions
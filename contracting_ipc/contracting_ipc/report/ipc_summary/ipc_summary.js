@@ -37,12 +37,209 @@ frappe.query_reports["IPC Summary"] = {
             "fieldname": "to_date",
             "label": __("To Date"),
             "fieldtype": "Date"
+        },
+        {
+            "fieldname": "start_to_date",
+            "label": __("Starting On or Before"),
+            "fieldtype": "Date"
+        },
+        {
+            "fieldname": "lazy_load",
+            "label": __("Load Rows on Scroll"),
+            "fieldtype": "Check",
+            "default": 0
+        },
+        {
+            "fieldname": "group_by",
+            "label": __("Group By"),
+            "fieldtype": "Select",
+            "options": "\nProject\nCustomer\nCompany\nMonth"
         }
     ],
 
+    /**
+     * Report load handler - adds the background export and print actions
+     */
+    onload: function (report) {
+        report.page.add_inner_button(__("Export in Background"), function () {
+            frappe.prompt(
+                {
+                    fieldname: "file_format",
+                    label: __("File Format"),
+                    fieldtype: "Select",
+                    options: "CSV\nExcel",
+                    default: "CSV",
+                    reqd: 1
+                },
+                function (values) {
+                    frappe.call({
+                        method: "contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary.enqueue_export",
+                        args: {
+                            filters: report.get_filter_values(),
+                            file_format: values.file_format
+                        }
+                    });
+                },
+                __("Export IPCs"),
+                __("Export")
+            );
+        });
+
+        report.page.add_inner_button(__("Print in Background"), function () {
+            frappe.prompt(
+                [
+                    {
+                        fieldname: "print_format",
+                        label: __("Print Format"),
+                        fieldtype: "Link",
+                        options: "Print Format",
+                        default: "IPC Standard",
+                        reqd: 1,
+                        get_query: function () {
+                            return {filters: {doc_type: "IPC"}};
+                        }
+                    },
+                    {
+                        fieldname: "letterhead",
+                        label: __("Letter Head"),
+                        fieldtype: "Link",
+                        options: "Letter Head"
+                    },
+                    {
+                        fieldname: "file_format",
+                        label: __("File Format"),
+                        fieldtype: "Select",
+                        options: "PDF\nZIP",
+                        default: "PDF",
+                        reqd: 1
+                    }
+                ],
+                function (values) {
+                    frappe.call({
+                        method: "contracting_ipc.bulk_print.enqueue_bulk_print",
+                        args: Object.assign({filters: report.get_filter_values()}, values)
+                    });
+                },
+                __("Print IPCs"),
+                __("Print")
+            );
+        });
+
+        frappe.realtime.off("ipc_bulk_print_ready");
+        frappe.realtime.on("ipc_bulk_print_ready", function (data) {
+            frappe.msgprint({
+                title: __("Print Ready"),
+                indicator: data.failed.length ? "orange" : "green",
+                message: __("{0} IPC certificates are ready: {1}", [
+                    data.count,
+                    `<a href="${data.file_url}" target="_blank">${data.file_name}</a>`
+                ])
+            });
+        });
+
+        frappe.realtime.off("ipc_export_ready");
+        frappe.realtime.on("ipc_export_ready", function (data) {
+            frappe.msgprint({
+                title: __("Export Ready"),
+                indicator: "green",
+                message: __("Your IPC export is ready: {0}", [
+                    `<a href="${data.file_url}" target="_blank">${data.file_name}</a>`
+                ])
+            });
+        });
+    },
+
+    /**
+     * Drill down from a group row to the IPCs of that group
+     */
+    drill_down: function (group_by, value) {
+        let report = frappe.query_report;
+        let filters = {group_by: ""};
+
+        if (group_by === "Month") {
+            // Months group IPCs by period start, so narrow the start date only
+            // and keep the other filters the group rows were built with
+            let month_start = value + "-01";
+            let month_end = frappe.datetime.month_end(month_start);
+            let from_date = report.get_filter_value("from_date");
+            let start_to_date = report.get_filter_value("start_to_date");
+
+            filters.from_date = from_date && from_date > month_start ? from_date : month_start;
+            filters.start_to_date = start_to_date && start_to_date < month_end ? start_to_date : month_end;
+        } else {
+            filters[group_by.toLowerCase()] = value;
+        }
+
+        report.set_filter_value(filters);
+    },
+
+    /**
+     * Attach group drill-down and infinite scrolling when rows are lazy loaded
+     */
+    after_datatable_render: function (datatable) {
+        let report = frappe.query_report;
+        report.ipc_has_more_rows = report.get_filter_value("lazy_load")
+            && !report.get_filter_value("group_by")
+            && (report.data || []).length > 0;
+        report.ipc_loading_rows = false;
+
+        $(datatable.wrapper).off("click.ipc_summary").on("click.ipc_summary", ".ipc-drill-down", function () {
+            frappe.query_reports["IPC Summary"].drill_down(
+                report.get_filter_value("group_by"),
+                $(this).attr("data-value")
+            );
+        });
+
+        $(datatable.bodyScrollable).off("scroll.ipc_summary").on("scroll.ipc_summary", function () {
+            let scrollable = this;
+            if (scrollable.scrollTop + scrollable.clientHeight < scrollable.scrollHeight - 200) {
+                return;
+            }
+            frappe.query_reports["IPC Summary"].load_next_page(datatable);
+        });
+    },
+
+    /**
+     * Fetch the rows after the last loaded row and append them
+     */
+    load_next_page: function (datatable) {
+        let report = frappe.query_report;
+        if (!report.ipc_has_more_rows || report.ipc_loading_rows) {
+            return;
+        }
+
+        let last_row = report.data[report.data.length - 1];
+        report.ipc_loading_rows = true;
+
+        frappe.call({
+            method: "contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary.get_next_page",
+            args: {
+                filters: report.get_filter_values(),
+                cursor_creation: last_row.creation,
+                cursor_name: last_row.name
+            },
+            callback: function (r) {
+                let rows = r.message || [];
+                report.ipc_has_more_rows = rows.length > 0;
+                if (rows.length) {
+                    report.data.push(...rows);
+                    datatable.appendRows(rows);
+                }
+            },
+            always: function () {
+                report.ipc_loading_rows = false;
+            }
+        });
+    },
+
     "formatter": function (value, row, column, data, default_formatter) {
         value = default_formatter(value, row, column, data);
 
+        if (column.fieldname === "group_value" && data && data.group_value) {
+            value = `<a class="ipc-drill-down" data-value="${frappe.utils.escape_html(data.group_value)}"
+                title="${__("Show IPCs")}">${value}</a>`;
+        }
+
         if (column.fieldname === "status") {
             if (data.status === "Invoiced") {
                 value = `<span class="indicator-pill green">${value}</span>`;
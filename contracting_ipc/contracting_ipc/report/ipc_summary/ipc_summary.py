@@ -2,15 +2,95 @@
 IPC Summary Report.
 
 Provides a summary view of all IPCs with filtering options.
+
+Results are cached in Redis per normalized filter set, user permission
+scope and language. Every cached result depends on one generation
+counter: that of the project, customer or company it is filtered by (the
+most selective one), or the global counter when it has none of these
+filters. Changing an IPC
+increments the counters of its project, customer and company and the
+global counter, so exactly the results that can include it are missed
+from then on.
 """
 
+import csv
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from functools import partial
+
 import frappe
 from frappe import _
+from frappe.permissions import get_user_permissions
+from frappe.utils import add_days, cint, flt, getdate, now_datetime
+
+from contracting_ipc.instrumentation import instrument
+
+# Rows per page when the report is lazy loaded
+PAGE_LENGTH = 500
+
+# Export format -> file extension
+EXPORT_FORMATS = {
+    "CSV": "csv",
+    "Excel": "xlsx"
+}
+
+# Bytes read at a time when hashing an exported file
+EXPORT_BLOCK_SIZE = 1024 * 1024
+
+# Days a background export File is kept
+EXPORT_FILE_DAYS = 7
+
+# Seconds a report result stays cached unless an IPC change invalidates it
+# first; override with ipc_summary_cache_ttl in site_config.json, 0 disables
+DEFAULT_CACHE_TTL = 600
+
+# Results with more rows are not cached
+MAX_CACHED_ROWS = 5000
+
+# Redis key prefixes of cached results and of their generation counters
+CACHE_KEY_PREFIX = "ipc_summary_result|"
+GENERATION_KEY_PREFIX = "ipc_summary_generation|"
+
+# Filters that limit a result to the IPCs of one record, most selective first
+SCOPE_FILTERS = ["project", "customer", "company"]
+
+# Group By filter option -> SQL expression of the group, portable across
+# MariaDB and Postgres; months are grouped as YYYYMM and shown as YYYY-MM
+GROUP_BY_OPTIONS = {
+    "Project": "project",
+    "Customer": "customer",
+    "Company": "company",
+    "Month": "EXTRACT(YEAR FROM period_from) * 100 + EXTRACT(MONTH FROM period_from)"
+}
 
 
+@instrument("IPC Summary.execute")
 def execute(filters=None):
-    """Execute the IPC Summary report."""
+    """Execute the IPC Summary report, from the cache when the result is current."""
+    filters = frappe._dict(filters or {})
+
+    if frappe.flags.ipc_summary_full_export:
+        # The standard export writes the rows it gets back, so it needs all of them
+        filters.pop("lazy_load", None)
+
+    return get_cached_result("execute", filters, partial(get_report_result, filters))
+
+
+def get_report_result(filters):
+    """Run the report queries for the given filters."""
+    if filters.get("group_by"):
+        # Rollup rows only; row-level data stays in the database
+        return get_group_columns(filters.group_by), get_grouped_data(filters)
+
     columns = get_columns()
+
+    if filters.get("lazy_load"):
+        # First page only; totals come from a separate aggregate query
+        data = get_data(filters, page_length=PAGE_LENGTH)
+        return columns, data, None, None, get_report_summary(get_totals(filters))
+
     data = get_data(filters)
     return columns, data
 
@@ -98,12 +178,120 @@ def get_columns():
     ]
 
 
-def get_data(filters):
-    """Fetch report data based on filters."""
+def get_group_columns(group_by):
+    """Define report columns for the grouped mode."""
+    if group_by not in GROUP_BY_OPTIONS:
+        frappe.throw(_("Invalid Group By value: {0}").format(group_by))
+
+    return [
+        {
+            "fieldname": "group_value",
+            "label": _(group_by),
+            "fieldtype": "Data",
+            "width": 180
+        },
+        {
+            "fieldname": "ipc_count",
+            "label": _("IPCs"),
+            "fieldtype": "Int",
+            "width": 80
+        },
+        {
+            "fieldname": "total_work_done",
+            "label": _("Total Work Done"),
+            "fieldtype": "Currency",
+            "width": 130
+        },
+        {
+            "fieldname": "retention_amount",
+            "label": _("Retention"),
+            "fieldtype": "Currency",
+            "width": 110
+        },
+        {
+            "fieldname": "advance_deduction",
+            "label": _("Advance Deduction"),
+            "fieldtype": "Currency",
+            "width": 130
+        },
+        {
+            "fieldname": "net_amount",
+            "label": _("Net Amount"),
+            "fieldtype": "Currency",
+            "width": 120
+        }
+    ]
+
+
+def get_grouped_data(filters):
+    """Aggregate IPCs per group in SQL and return one row per group."""
+    if filters.group_by not in GROUP_BY_OPTIONS:
+        frappe.throw(_("Invalid Group By value: {0}").format(filters.group_by))
+
+    group_expression = GROUP_BY_OPTIONS[filters.group_by]
     conditions = get_conditions(filters)
 
     data = frappe.db.sql(
-        """
+        f"""
+        SELECT
+            {group_expression} as group_value,
+            COUNT(*) as ipc_count,
+            SUM(total_work_done) as total_work_done,
+            SUM(retention_amount) as retention_amount,
+            SUM(advance_deduction) as advance_deduction,
+            SUM(net_amount) as net_amount
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus < 2
+            {conditions}
+        GROUP BY
+            group_value
+        ORDER BY
+            group_value
+        """,
+        filters,
+        as_dict=1
+    )
+
+    if filters.group_by == "Month":
+        for row in data:
+            row.group_value = "{:04d}-{:02d}".format(*divmod(cint(row.group_value), 100))
+
+    return data
+
+
+def get_data(filters, cursor=None, page_length=None):
+    """
+    Fetch report data based on filters.
+
+    Args:
+        filters: Report filters
+        cursor: Optional (creation, name) of the last row already loaded;
+            only rows after it in report order are returned
+        page_length: Optional maximum number of rows to return
+
+    Returns:
+        List of IPC rows ordered by creation, newest first
+    """
+    conditions = get_conditions(filters)
+    values = dict(filters)
+    limit = ""
+
+    if cursor:
+        conditions += get_cursor_condition()
+        values["cursor_creation"], values["cursor_name"] = cursor
+
+    if page_length:
+        limit = "LIMIT %(page_length)s"
+        values["page_length"] = cint(page_length)
+
+    return frappe.db.sql(get_data_query(conditions, limit), values, as_dict=1)
+
+
+def get_data_query(conditions, limit=""):
+    """Build the row-level report query."""
+    return """
         SELECT
             name,
             customer,
@@ -116,20 +304,361 @@ def get_data(filters):
             advance_deduction,
             net_amount,
             status,
-            sales_invoice
+            sales_invoice,
+            creation
         FROM
             `tabIPC`
         WHERE
             docstatus < 2
             {conditions}
         ORDER BY
-            creation DESC
-        """.format(conditions=conditions),
+            creation DESC, name DESC
+        {limit}
+        """.format(conditions=conditions, limit=limit)
+
+
+def get_cursor_condition():
+    """Keyset condition selecting rows after the cursor in report order."""
+    return """ AND (creation < %(cursor_creation)s
+        OR (creation = %(cursor_creation)s AND name < %(cursor_name)s))"""
+
+
+def get_totals(filters):
+    """Aggregate the amounts of all rows matching the filters."""
+    conditions = get_conditions(filters)
+
+    return frappe.db.sql(
+        f"""
+        SELECT
+            COUNT(*) as ipc_count,
+            SUM(total_work_done) as total_work_done,
+            SUM(retention_amount) as retention_amount,
+            SUM(advance_deduction) as advance_deduction,
+            SUM(net_amount) as net_amount
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus < 2
+            {conditions}
+        """,
         filters,
         as_dict=1
+    )[0]
+
+
+def get_report_summary(totals):
+    """Build the report summary cards from the aggregated totals."""
+    return [
+        {
+            "value": totals.ipc_count,
+            "label": _("IPCs"),
+            "datatype": "Int"
+        },
+        {
+            "value": flt(totals.total_work_done),
+            "label": _("Total Work Done"),
+            "datatype": "Currency"
+        },
+        {
+            "value": flt(totals.retention_amount),
+            "label": _("Retention"),
+            "datatype": "Currency"
+        },
+        {
+            "value": flt(totals.advance_deduction),
+            "label": _("Advance Deduction"),
+            "datatype": "Currency"
+        },
+        {
+            "value": flt(totals.net_amount),
+            "label": _("Net Amount"),
+            "datatype": "Currency",
+            "indicator": "Green"
+        }
+    ]
+
+
+@frappe.whitelist()
+@instrument("IPC Summary.get_next_page")
+def get_next_page(filters, cursor_creation: str, cursor_name: str) -> list:
+    """
+    Fetch the page of report rows following the given cursor.
+
+    Args:
+        filters: Report filters as JSON or dict
+        cursor_creation: Creation timestamp of the last loaded row
+        cursor_name: Name of the last loaded row
+
+    Returns:
+        List of IPC rows
+    """
+    frappe.has_permission("IPC", "report", throw=True)
+
+    filters = frappe._dict(frappe.parse_json(filters) or {})
+    cursor = (cursor_creation, cursor_name)
+
+    return get_cached_result(
+        "get_next_page", filters, partial(get_data, filters, cursor=cursor, page_length=PAGE_LENGTH), cursor
     )
 
-    return data
+
+def get_cached_result(method: str, filters, compute, *args):
+    """
+    Get a report result from the cache, or compute and cache it.
+
+    Args:
+        method: Name of the report method the result belongs to
+        filters: Report filters
+        compute: Callable computing the result on a cache miss
+        args: Further arguments the result depends on
+
+    Returns:
+        The cached or computed result
+    """
+    ttl = cint(frappe.conf.get("ipc_summary_cache_ttl", DEFAULT_CACHE_TTL))
+    if ttl <= 0:
+        return compute()
+
+    key = get_cache_key(method, filters, args)
+    result = frappe.cache.get_value(key)
+
+    if result is None:
+        result = compute()
+        rows = result if isinstance(result, list) else result[1]
+        if len(rows) <= MAX_CACHED_ROWS:
+            frappe.cache.set_value(key, result, expires_in_sec=ttl)
+
+    return result
+
+
+@contextmanager
+def summary_cache_disabled():
+    """Run the report without its result cache, so its queries can be measured."""
+    ttl = frappe.conf.get("ipc_summary_cache_ttl")
+    frappe.conf.ipc_summary_cache_ttl = 0
+
+    try:
+        yield
+    finally:
+        if ttl is None:
+            frappe.conf.pop("ipc_summary_cache_ttl", None)
+        else:
+            frappe.conf.ipc_summary_cache_ttl = ttl
+
+
+def get_cache_key(method: str, filters, args=()) -> str:
+    """
+    Build the cache key of a result from its generation, filters, the user's
+    permission scope and language, as column labels are translated.
+    """
+    payload = json.dumps(
+        [method, normalize_filters(filters), get_permission_scope(), frappe.local.lang, args],
+        sort_keys=True,
+        default=str
+    )
+
+    generation = get_generation(get_generation_key(filters))
+    return f"{CACHE_KEY_PREFIX}{generation}|{hashlib.md5(payload.encode()).hexdigest()}"
+
+
+def normalize_filters(filters) -> dict:
+    """Drop empty filters and bring dates to one format, so equal filter sets share a key."""
+    normalized = {}
+    for fieldname, value in filters.items():
+        if value in (None, "", [], 0):
+            continue
+
+        if fieldname in ("from_date", "to_date", "start_to_date"):
+            value = str(getdate(value))
+
+        normalized[fieldname] = value
+
+    return normalized
+
+
+def get_permission_scope() -> dict:
+    """Get the user's restrictions on the records the report filters by."""
+    user_permissions = get_user_permissions(frappe.session.user)
+
+    return {
+        doctype: sorted(permission.get("doc") for permission in user_permissions[doctype])
+        for doctype in ("Company", "Customer", "Project")
+        if user_permissions.get(doctype)
+    }
+
+
+def get_generation_key(filters) -> str:
+    """Get the generation counter a result with these filters depends on."""
+    for fieldname in SCOPE_FILTERS:
+        if filters.get(fieldname):
+            return f"{fieldname}|{filters.get(fieldname)}"
+
+    return "all"
+
+
+def get_generation(generation_key: str) -> int:
+    """Read a generation counter; counters are raw Redis integers, not pickled values."""
+    (generation,) = frappe.cache.pipeline().get(
+        frappe.cache.make_key(GENERATION_KEY_PREFIX + generation_key)
+    ).execute()
+
+    return cint(generation)
+
+
+def clear_summary_cache(ipcs: list) -> None:
+    """
+    Invalidate the cached results that can include the given IPCs.
+
+    The counters are incremented now, for the rest of this transaction,
+    and again after it commits, so a result cached by another request
+    before the commit is not served afterwards.
+
+    Args:
+        ipcs: IPC documents or dicts with project, customer and company
+    """
+    generation_keys = {"all"}
+    for ipc in ipcs:
+        if not ipc:
+            continue
+
+        for fieldname in SCOPE_FILTERS:
+            if ipc.get(fieldname):
+                generation_keys.add(f"{fieldname}|{ipc.get(fieldname)}")
+
+    increment_generations(generation_keys)
+    frappe.db.after_commit.add(partial(increment_generations, generation_keys))
+
+
+def increment_generations(generation_keys) -> None:
+    """Increment generation counters in one round trip."""
+    pipeline = frappe.cache.pipeline()
+    for generation_key in generation_keys:
+        pipeline.incr(frappe.cache.make_key(GENERATION_KEY_PREFIX + generation_key))
+    pipeline.execute()
+
+
+@frappe.whitelist()
+@instrument("IPC Summary.enqueue_export")
+def enqueue_export(filters, file_format: str = "CSV") -> None:
+    """
+    Queue a background export of the report rows to a private File.
+
+    The user is notified through the `ipc_export_ready` realtime event
+    when the file is available.
+
+    Args:
+        filters: Report filters as JSON or dict
+        file_format: CSV or Excel
+    """
+    frappe.has_permission("IPC", "export", throw=True)
+
+    if file_format not in EXPORT_FORMATS:
+        frappe.throw(_("Invalid export format: {0}").format(file_format))
+
+    filters = frappe._dict(frappe.parse_json(filters) or {})
+
+    frappe.enqueue(
+        "contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary.export_data",
+        queue="long",
+        timeout=3600,
+        filters=filters,
+        file_format=file_format
+    )
+
+    frappe.msgprint(_("The export has been queued. You will be notified when it is ready."), alert=True)
+
+
+@frappe.whitelist()
+def export_query():
+    """
+    Run the standard report export, flagged so IPC Summary returns every
+    row even with lazy loading on.
+
+    Replaces `frappe.desk.query_report.export_query` through
+    `override_whitelisted_methods`; other reports are exported unchanged.
+    """
+    from frappe.desk.query_report import export_query as standard_export_query
+
+    frappe.flags.ipc_summary_full_export = True
+    try:
+        return standard_export_query()
+    finally:
+        frappe.flags.ipc_summary_full_export = False
+
+
+def export_data(filters, file_format: str = "CSV") -> str:
+    """
+    Export report rows to a private File, streaming them from the database.
+
+    Rows are read through an unbuffered cursor and written straight to
+    disk, so memory use does not grow with the number of rows.
+
+    Args:
+        filters: Report filters
+        file_format: CSV or Excel
+
+    Returns:
+        URL of the created File
+    """
+    filters = frappe._dict(filters or {})
+    file_name = f"ipc_export_{frappe.generate_hash(length=10)}.{EXPORT_FORMATS[file_format]}"
+    file_path = frappe.get_site_path("private", "files", file_name)
+
+    columns = get_columns()
+    query = get_data_query(get_conditions(filters))
+
+    with frappe.db.unbuffered_cursor():
+        rows = frappe.db.sql(query, filters, as_dict=1, as_iterator=True)
+        if file_format == "Excel":
+            write_xlsx(file_path, columns, rows)
+        else:
+            write_csv(file_path, columns, rows)
+
+    content_hash = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(EXPORT_BLOCK_SIZE), b""):
+            content_hash.update(block)
+
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": "/private/files/" + file_name,
+        "is_private": 1,
+        "file_size": os.path.getsize(file_path),
+        "content_hash": content_hash.hexdigest()
+    })
+    file_doc.insert(ignore_permissions=True)
+
+    frappe.publish_realtime(
+        "ipc_export_ready",
+        {"file_url": file_doc.file_url, "file_name": file_name},
+        user=frappe.session.user,
+        after_commit=True
+    )
+
+    return file_doc.file_url
+
+
+def write_csv(file_path, columns, rows):
+    """Write report rows to a CSV file, one row at a time."""
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([column["label"] for column in columns])
+        for row in rows:
+            writer.writerow([row.get(column["fieldname"]) for column in columns])
+
+
+def write_xlsx(file_path, columns, rows):
+    """Write report rows to an XLSX file using openpyxl's write-only mode."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(_("IPC Summary"))
+    sheet.append([column["label"] for column in columns])
+    for row in rows:
+        sheet.append([row.get(column["fieldname"]) for column in columns])
+
+    workbook.save(file_path)
 
 
 def get_conditions(filters):
@@ -154,4 +683,30 @@ def get_conditions(filters):
     if filters.get("to_date"):
         conditions += " AND period_to <= %(to_date)s"
 
+    if filters.get("start_to_date"):
+        conditions += " AND period_from <= %(start_to_date)s"
+
     return conditions
+
+
+def clear_export_files(days: int = EXPORT_FILE_DAYS) -> int:
+    """
+    Delete background export Files older than a number of days; run daily.
+
+    Returns:
+        Number of Files deleted
+    """
+    names = frappe.get_all(
+        "File",
+        filters={
+            "file_name": ["like", "ipc_export_%"],
+            "is_private": 1,
+            "creation": ["<", add_days(now_datetime(), -cint(days))]
+        },
+        pluck="name"
+    )
+
+    for name in names:
+        frappe.delete_doc("File", name, ignore_permissions=True)
+
+    return len(names)
@@ -0,0 +1,183 @@
+"""
+Test cases for IPC Summary Report.
+"""
+
+import os
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, flt, today
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import (
+    execute,
+    get_data,
+    get_totals,
+    summary_cache_disabled,
+)
+from contracting_ipc.instrumentation import measure
+
+
+class TestIPCSummary(FrappeTestCase):
+    """Test cases for the IPC Summary report."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+        for i in range(7):
+            test_ipc.TestIPC.make_ipc(
+                period_from=add_days(today(), i * 31),
+                period_to=add_days(today(), i * 31 + 30),
+                total_work_done=10000 * (i + 1),
+                retention_percentage=5
+            )
+
+    def test_keyset_pages_match_full_data(self):
+        """Test that paging with the cursor returns every row exactly once, in order."""
+        filters = frappe._dict(company="_Test Company")
+        full = get_data(filters)
+
+        pages, cursor = [], None
+        while True:
+            page = get_data(filters, cursor=cursor, page_length=3)
+            if not page:
+                break
+            pages.extend(page)
+            cursor = (page[-1].creation, page[-1].name)
+
+        self.assertEqual([row.name for row in pages], [row.name for row in full])
+
+    def test_lazy_load_summary_uses_all_rows(self):
+        """Test that the summary totals cover rows beyond the first page."""
+        filters = frappe._dict(company="_Test Company", lazy_load=1)
+        columns, data, message, chart, summary = execute(filters)
+
+        totals = get_totals(filters)
+        self.assertEqual(summary[0]["value"], totals.ipc_count)
+        self.assertEqual(
+            flt(summary[1]["value"], 2),
+            flt(sum(row.total_work_done for row in get_data(filters)), 2)
+        )
+
+    def test_standard_export_ignores_lazy_load(self):
+        """Test that the standard report export gets every row even with lazy loading on."""
+        from contracting_ipc.contracting_ipc.report.ipc_summary import ipc_summary
+
+        filters = frappe._dict(company="_Test Company", lazy_load=1)
+        def standard_export_query():
+            return execute(filters)[:2]
+
+        with patch.object(ipc_summary, "PAGE_LENGTH", 2), \
+                patch("frappe.desk.query_report.export_query", side_effect=standard_export_query):
+            columns, data = ipc_summary.export_query()
+
+        self.assertEqual(len(data), len(get_data(filters)))
+        self.assertFalse(frappe.flags.ipc_summary_full_export)
+
+    def test_group_by_matches_row_totals(self):
+        """Test that grouped rows carry the sums of their IPCs."""
+        filters = frappe._dict(company="_Test Company")
+        rows = get_data(filters)
+
+        for group_by, fieldname in (("Project", "project"), ("Customer", "customer")):
+            with self.subTest(group_by=group_by):
+                columns, data = execute(frappe._dict(filters, group_by=group_by))
+                grouped = {row.group_value: row for row in data}
+
+                for value in {row[fieldname] for row in rows}:
+                    group_rows = [row for row in rows if row[fieldname] == value]
+                    self.assertEqual(grouped[value].ipc_count, len(group_rows))
+                    self.assertEqual(
+                        flt(grouped[value].net_amount, 2),
+                        flt(sum(row.net_amount for row in group_rows), 2)
+                    )
+
+    def test_group_by_month(self):
+        """Test that monthly groups are keyed by the period start month."""
+        columns, data = execute(frappe._dict(company="_Test Company", group_by="Month"))
+        months = [row.group_value for row in data]
+
+        self.assertEqual(months, sorted(months))
+        self.assertTrue(all(len(month) == 7 for month in months))
+
+    def test_month_drill_down_matches_group(self):
+        """Test that the month drill-down filters list the IPCs of the group, even those ending next month."""
+        from frappe.utils import get_last_day
+
+        filters = frappe._dict(company="_Test Company")
+        columns, data = execute(frappe._dict(filters, group_by="Month"))
+
+        for group in data:
+            with self.subTest(month=group.group_value):
+                month_start = group.group_value + "-01"
+                rows = get_data(frappe._dict(
+                    filters, from_date=month_start, start_to_date=get_last_day(month_start)
+                ))
+                self.assertEqual(len(rows), group.ipc_count)
+                self.assertEqual(flt(sum(row.net_amount for row in rows), 2), flt(group.net_amount, 2))
+
+    def test_csv_export_contains_all_rows(self):
+        """Test that the streamed CSV export writes a row per IPC."""
+        import csv
+
+        from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import export_data
+
+        filters = frappe._dict(company="_Test Company")
+        file_url = export_data(filters, "CSV")
+        file_doc = frappe.get_doc("File", {"file_url": file_url})
+
+        with open(file_doc.get_full_path(), newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+
+        self.assertEqual(len(rows) - 1, len(get_data(filters)))
+        self.assertEqual(rows[0][0], "IPC")
+        file_doc.delete()
+
+    def test_old_export_files_are_cleared(self):
+        """Test that background export Files are deleted once they are older than the retention days."""
+        from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import (
+            clear_export_files,
+            export_data,
+        )
+
+        old_file = frappe.get_doc("File", {"file_url": export_data(frappe._dict(company="_Test Company"))})
+        new_file = frappe.get_doc("File", {"file_url": export_data(frappe._dict(company="_Test Company"))})
+        frappe.db.set_value("File", old_file.name, "creation", add_days(today(), -8), update_modified=False)
+
+        clear_export_files(days=7)
+
+        self.assertFalse(frappe.db.exists("File", old_file.name))
+        self.assertFalse(os.path.exists(old_file.get_full_path()))
+        self.assertTrue(frappe.db.exists("File", new_file.name))
+        new_file.delete()
+
+    def test_cached_result_invalidated_by_ipc_changes(self):
+        """Test that a repeated run is served from the cache until an IPC of its scope changes."""
+        filters = frappe._dict(company="_Test Company", project="_Test Project")
+        columns, data = execute(filters)
+
+        with measure() as frame:
+            self.assertEqual(execute(frappe._dict(filters, customer=None))[1], data)
+        self.assertEqual(frame.sql_count, 0)
+
+        ipc = test_ipc.TestIPC.make_ipc(total_work_done=10000, retention_percentage=5)
+
+        rows = {row.name: row for row in execute(filters)[1]}
+        self.assertIn(ipc.name, rows)
+        self.assertEqual(rows[ipc.name].status, "Draft")
+
+        ipc.submit()
+        self.assertEqual({row.name: row for row in execute(filters)[1]}[ipc.name].status, "Approved")
+
+    def test_cache_disabled(self):
+        """Test that a TTL of 0 runs the queries every time."""
+        filters = frappe._dict(company="_Test Company")
+        execute(filters)
+
+        with summary_cache_disabled(), measure() as frame:
+            execute(filters)
+        self.assertGreater(frame.sql_count, 0)
@@ -123,33 +123,37 @@ after_install = "contracting_ipc.install.after_install"
 # ---------------
 # Hook on document methods and events
 
-doc_events = {
-    "IPC": {
-        "validate": "contracting_ipc.contracting_ipc.doctype.ipc.ipc.validate_ipc",
-        "on_submit": "contracting_ipc.contracting_ipc.doctype.ipc.ipc.on_submit_ipc",
-    }
-}
+# doc_events = {
+#     "*": {
+#         "on_update": "method",
+#         "on_cancel": "method",
+#         "on_trash": "method"
+#     }
+# }
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-#     "all": [
-#         "contracting_ipc.tasks.all"
-#     ],
-#     "daily": [
-#         "contracting_ipc.tasks.daily"
-#     ],
-#     "hourly": [
-#         "contracting_ipc.tasks.hourly"
-#     ],
-#     "weekly": [
-#         "contracting_ipc.tasks.weekly"
-#     ],
-#     "monthly": [
-#         "contracting_ipc.tasks.monthly"
-#     ],
-# }
+scheduler_events = {
+    "all": [
+        "contracting_ipc.bulk_print.finish_stalled_bulk_prints"
+    ],
+    "daily": [
+        "contracting_ipc.bulk_print.clear_render_cache",
+        "contracting_ipc.bulk_print.clear_bulk_print_files",
+        "contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary.clear_export_files"
+    ],
+    "daily_long": [
+        "contracting_ipc.contracting_ipc.doctype.ipc_monthly_rollup.ipc_monthly_rollup.rebuild_monthly_rollup"
+    ]
+}
+
+# Log Clearing
+# ------------
+
+default_log_clearing_doctypes = {
+    "IPC Performance Log": 30
+}
 
 # Testing
 # -------
@@ -159,9 +163,10 @@ doc_events = {
 # Overriding Methods
 # ------------------------------
 #
-# override_whitelisted_methods = {
-#     "frappe.desk.doctype.event.event.get_events": "contracting_ipc.event.get_events"
-# }
+override_whitelisted_methods = {
+    "frappe.desk.query_report.export_query":
+        "contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary.export_query"
+}
 
 # Override Document Class CRUD Methods
 # ------------------------------
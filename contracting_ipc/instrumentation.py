@@ -0,0 +1,255 @@
+"""
+Hot-path instrumentation for Contracting IPC.
+
+Records wall time, SQL query count and SQL time of the instrumented IPC
+operations. Aggregates are kept in Redis, so every web and background
+worker adds to the same counters, and are read through `get_stats` as a
+JSON snapshot or in the Prometheus text format. A sample of the calls is
+written to IPC Performance Log through a deferred insert.
+
+Enable it in site_config.json:
+
+    "ipc_instrumentation": 1,
+    "ipc_instrumentation_sample_rate": 0.01
+
+When disabled, an instrumented call costs a single config lookup.
+"""
+
+import functools
+import random
+from contextlib import contextmanager
+from time import perf_counter
+
+import frappe
+from frappe.deferred_insert import deferred_insert
+from frappe.model.document import Document
+
+# Redis key of the set of instrumented operations that have been called
+OPERATIONS_KEY = "ipc_metrics_operations"
+
+# Redis key prefix of the per-operation counters
+METRICS_KEY_PREFIX = "ipc_metrics|"
+
+# Counter -> (Prometheus metric name, type, help text)
+PROMETHEUS_METRICS = {
+    "calls": ("ipc_operation_calls_total", "counter", "Number of calls"),
+    "wall_time": ("ipc_operation_wall_seconds_total", "counter", "Wall time spent in calls"),
+    "max_wall_time": ("ipc_operation_wall_seconds_max", "gauge", "Slowest call"),
+    "sql_count": ("ipc_operation_sql_queries_total", "counter", "SQL statements executed"),
+    "sql_time": ("ipc_operation_sql_seconds_total", "counter", "Time spent in SQL statements")
+}
+
+
+def is_enabled() -> bool:
+    """Check whether instrumentation is enabled for the site."""
+    return bool(frappe.conf.get("ipc_instrumentation"))
+
+
+def instrument(operation: str):
+    """
+    Record the wall time and SQL statements of every call to the decorated
+    function under `operation`.
+
+    Use below `@frappe.whitelist()`, so the whitelisted function is the
+    wrapper; `functools.wraps` keeps the signature Frappe maps arguments
+    from.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+
+            frame = None
+            try:
+                with measure() as frame:
+                    return fn(*args, **kwargs)
+            finally:
+                # Unset when measuring itself failed to start
+                if frame is not None:
+                    record(operation, frame.wall_time, frame, reference=get_reference(args))
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def measure(record_queries: bool = False):
+    """
+    Measure the wall time and SQL statements of a block.
+
+    Yields a dictionary whose wall_time, sql_count and sql_time are filled
+    in when the block exits. Measurements can be nested.
+
+    Args:
+        record_queries: Also collect the text of every statement in `queries`
+    """
+    install_sql_hook()
+    frame = frappe._dict(wall_time=0.0, sql_count=0, sql_time=0.0, queries=[] if record_queries else None)
+    stack = get_frame_stack()
+    stack.append(frame)
+    start = perf_counter()
+
+    try:
+        yield frame
+    finally:
+        frame.wall_time = perf_counter() - start
+        stack.pop()
+
+
+def get_frame_stack() -> list:
+    """Get the measurements in progress for the current request."""
+    if not hasattr(frappe.local, "ipc_metric_frames"):
+        frappe.local.ipc_metric_frames = []
+
+    return frappe.local.ipc_metric_frames
+
+
+def install_sql_hook():
+    """
+    Wrap `frappe.db.sql` on the current connection so every statement is
+    counted and timed for the measurements in progress.
+
+    Installed once per connection, the first time a measurement starts.
+    """
+    db = frappe.db
+    if getattr(db, "ipc_sql_hook_installed", False):
+        return
+
+    sql = db.sql
+
+    @functools.wraps(sql)
+    def timed_sql(*args, **kwargs):
+        frames = getattr(frappe.local, "ipc_metric_frames", None)
+        if not frames:
+            return sql(*args, **kwargs)
+
+        start = perf_counter()
+        try:
+            return sql(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            for frame in frames:
+                frame.sql_count += 1
+                frame.sql_time += elapsed
+                if frame.queries is not None:
+                    frame.queries.append(db.last_query)
+
+    db.sql = timed_sql
+    db.ipc_sql_hook_installed = True
+
+
+def get_reference(args) -> str:
+    """Get the document name when the instrumented function is a document method."""
+    if args and isinstance(args[0], Document):
+        return args[0].name
+
+
+def record(operation: str, wall_time: float, frame, reference: str = None):
+    """Add a call to the operation's counters and sample it to IPC Performance Log."""
+    key = frappe.cache.make_key(METRICS_KEY_PREFIX + operation)
+
+    # Pipelines send raw commands, unlike the pickling helpers of frappe.cache
+    pipeline = frappe.cache.pipeline()
+    pipeline.sadd(frappe.cache.make_key(OPERATIONS_KEY), operation)
+    pipeline.hincrby(key, "calls", 1)
+    pipeline.hincrbyfloat(key, "wall_time", wall_time)
+    pipeline.hincrby(key, "sql_count", frame.sql_count)
+    pipeline.hincrbyfloat(key, "sql_time", frame.sql_time)
+    pipeline.hget(key, "max_wall_time")
+    max_wall_time = pipeline.execute()[-1]
+
+    if wall_time > float(max_wall_time or 0):
+        frappe.cache.pipeline().hset(key, "max_wall_time", wall_time).execute()
+
+    sample_rate = float(frappe.conf.get("ipc_instrumentation_sample_rate") or 0)
+    if sample_rate and random.random() < sample_rate:
+        deferred_insert("IPC Performance Log", [{
+            "operation": operation,
+            "reference_name": reference,
+            "wall_time": wall_time * 1000,
+            "sql_count": frame.sql_count,
+            "sql_time": frame.sql_time * 1000,
+            "user": frappe.session.user
+        }])
+
+
+def get_snapshot() -> dict:
+    """
+    Get the counters of every instrumented operation.
+
+    Returns:
+        Dictionary of operation -> calls, wall_time, max_wall_time,
+        sql_count and sql_time (times in seconds)
+    """
+    operations = get_operations()
+
+    pipeline = frappe.cache.pipeline()
+    for operation in operations:
+        pipeline.hgetall(frappe.cache.make_key(METRICS_KEY_PREFIX + operation))
+
+    snapshot = {}
+    for operation, counters in zip(operations, pipeline.execute(), strict=True):
+        counters = {frappe.safe_decode(field): float(value) for field, value in counters.items()}
+        snapshot[operation] = {
+            "calls": int(counters.get("calls", 0)),
+            "wall_time": counters.get("wall_time", 0.0),
+            "max_wall_time": counters.get("max_wall_time", 0.0),
+            "sql_count": int(counters.get("sql_count", 0)),
+            "sql_time": counters.get("sql_time", 0.0)
+        }
+
+    return snapshot
+
+
+def get_operations() -> list:
+    """Get the names of the operations that have counters."""
+    (operations,) = frappe.cache.pipeline().smembers(frappe.cache.make_key(OPERATIONS_KEY)).execute()
+
+    return sorted(frappe.safe_decode(operation) for operation in operations)
+
+
+def format_prometheus(snapshot: dict) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = []
+    for counter, (metric, metric_type, help_text) in PROMETHEUS_METRICS.items():
+        lines.append(f"# HELP {metric} {help_text} per IPC operation")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for operation, counters in snapshot.items():
+            lines.append(f'{metric}{{operation="{operation}"}} {counters[counter]}')
+
+    return "\n".join(lines) + "\n"
+
+
+@frappe.whitelist()
+def get_stats(output: str = "json"):
+    """
+    Get the instrumentation counters.
+
+    Args:
+        output: "json" for a snapshot dictionary, "prometheus" for a
+            text/plain response a Prometheus server can scrape
+
+    Returns:
+        Snapshot dictionary when output is "json"
+    """
+    frappe.only_for("System Manager")
+
+    snapshot = get_snapshot()
+    if output != "prometheus":
+        return snapshot
+
+    frappe.response["type"] = "txt"
+    frappe.response["doctype"] = "ipc_metrics"
+    frappe.response["result"] = format_prometheus(snapshot)
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_stats():
+    """Clear the instrumentation counters."""
+    frappe.only_for("System Manager")
+
+    keys = [frappe.cache.make_key(METRICS_KEY_PREFIX + operation) for operation in get_operations()]
+    frappe.cache.pipeline().delete(frappe.cache.make_key(OPERATIONS_KEY), *keys).execute()
@@ -0,0 +1,506 @@
+"""
+Bulk IPC import for Contracting IPC.
+
+Imports historical certificates from a CSV or JSON file. The whole batch is
+validated and its amounts are calculated in one pass, then rows are
+inserted in chunks with one commit per chunk, instead of saving IPC
+documents one at a time.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, get_first_day, getdate, now_datetime
+from frappe.utils.csvutils import read_csv_content
+
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import (
+    calculate_ipc_amounts,
+    get_amount_precisions,
+    get_balance_keys,
+    get_certified_to_date,
+    get_ipc_name,
+    is_ipc_workflow_active,
+    reserve_ipc_numbers,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_contract_balance.ipc_contract_balance import (
+    add_to_contract_balance,
+    get_advance_outstanding,
+    get_contract_balance,
+    propose_advance_deduction,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_monthly_rollup.ipc_monthly_rollup import (
+    TOTAL_FIELDS as ROLLUP_TOTAL_FIELDS,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_monthly_rollup.ipc_monthly_rollup import (
+    add_to_rollup,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+    TOTAL_FIELDS as PROJECT_TOTAL_FIELDS,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+    add_to_project_totals,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_balance.ipc_retention_balance import (
+    update_retention_balance,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_ledger_entry.ipc_retention_ledger_entry import (
+    insert_ipc_retention_entries,
+)
+from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import clear_summary_cache
+from contracting_ipc.period_overlaps import find_row_overlaps
+
+# Number of IPCs inserted between commits
+IMPORT_CHUNK_SIZE = 500
+
+REQUIRED_FIELDS = ["customer", "project", "company", "period_from", "period_to", "total_work_done"]
+
+# Columns that must hold numbers when given
+NUMERIC_FIELDS = ["total_work_done", "retention_percentage", "advance_deduction"]
+
+# Import column -> linked DocType
+LINK_FIELDS = {
+    "customer": "Customer",
+    "project": "Project",
+    "company": "Company",
+    "contract": "Contract"
+}
+
+# Columns written to tabIPC, in insert order
+INSERT_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "ipc_number", "customer", "project", "contract", "company", "status",
+    "workflow_state", "period_from", "period_to", "total_work_done",
+    "retention_percentage", "retention_amount", "manual_advance_deduction", "advance_deduction", "net_amount",
+    "previous_certified", "certified_to_date"
+]
+
+
+@frappe.whitelist()
+def enqueue_ipc_import(file_url: str, submit: int = 0) -> None:
+    """
+    Queue a bulk import of IPCs from an uploaded CSV or JSON file.
+
+    The user is notified through the `ipc_import_complete` realtime event
+    with the import report.
+
+    Args:
+        file_url: URL of the uploaded File
+        submit: Import the IPCs as submitted (Approved) certificates
+    """
+    frappe.has_permission("IPC", "create", throw=True)
+    if cint(submit):
+        frappe.has_permission("IPC", "submit", throw=True)
+
+    # The job reads the File by URL; private files of other records must stay out of reach
+    file_doc = frappe.get_doc("File", {"file_url": file_url})
+    frappe.has_permission("File", "read", doc=file_doc, throw=True)
+
+    frappe.enqueue(
+        "contracting_ipc.ipc_import.import_ipcs_from_file",
+        queue="long",
+        timeout=7200,
+        file_url=file_url,
+        submit=cint(submit)
+    )
+
+    frappe.msgprint(_("The IPC import has been queued."), alert=True)
+
+
+def import_ipcs_from_file(file_url: str, submit: int = 0) -> dict:
+    """Import IPCs from a File and notify the user with the report."""
+    report = import_ipcs(read_import_file(file_url), submit=cint(submit))
+
+    frappe.publish_realtime("ipc_import_complete", report, user=frappe.session.user)
+
+    return report
+
+
+def read_import_file(file_url: str) -> list:
+    """
+    Read import rows from a CSV or JSON File.
+
+    CSV headers may be field names or labels ("Total Work Done").
+
+    Returns:
+        List of row dictionaries keyed by IPC field name
+    """
+    file_doc = frappe.get_doc("File", {"file_url": file_url})
+    content = file_doc.get_content()
+
+    if file_doc.file_name.lower().endswith(".json"):
+        return json.loads(content)
+
+    csv_rows = read_csv_content(content)
+    if not csv_rows:
+        return []
+
+    header = [frappe.scrub(column) for column in csv_rows[0]]
+    # Short rows leave their trailing columns out
+    return [dict(zip(header, row, strict=False)) for row in csv_rows[1:] if any(row)]
+
+
+def import_ipcs(rows: list, submit: bool = False) -> dict:
+    """
+    Validate, calculate and insert a batch of IPCs.
+
+    Args:
+        rows: List of row dictionaries keyed by IPC field name
+        submit: Insert the IPCs as submitted (Approved) certificates
+
+    Returns:
+        Import report with the imported IPC names and per-row errors
+    """
+    prepared, errors = prepare_rows(rows, submit)
+    workflow_active = is_ipc_workflow_active()
+    imported = []
+
+    for start in range(0, len(prepared), IMPORT_CHUNK_SIZE):
+        chunk = prepared[start:start + IMPORT_CHUNK_SIZE]
+
+        try:
+            names, chunk_errors = insert_chunk(chunk, submit, workflow_active)
+            frappe.db.commit()
+            imported.extend(names)
+            errors.extend(chunk_errors)
+        except Exception as e:
+            frappe.db.rollback()
+            errors.extend({"row": row.idx, "errors": [str(e)]} for row in chunk)
+            frappe.log_error(title=_("IPC import chunk failed"))
+
+    return {
+        "total": len(rows),
+        "imported": imported,
+        "errors": sorted(errors, key=lambda error: error["row"])
+    }
+
+
+def prepare_rows(rows: list, submit: bool = False) -> tuple:
+    """
+    Validate all rows and calculate their amounts in a single pass.
+
+    Links are checked with one query per linked DocType for the whole
+    batch. Amounts use `calculate_ipc_amounts` with the precisions of the
+    row's company, matching `IPC.calculate_amounts`. Periods overlapping
+    another row or an existing IPC of the same contract or project are
+    rejected with `find_row_overlaps`.
+
+    Returns:
+        Tuple of (valid rows, errors); errors are {"row": index, "errors": [...]}
+    """
+    missing_links = get_missing_links(rows)
+    default_retention = flt(frappe.get_meta("IPC").get_field("retention_percentage").default)
+    precisions = {}
+    prepared, errors = [], []
+
+    for idx, row in enumerate(rows, start=1):
+        row = frappe._dict(row)
+        row_errors = []
+
+        for fieldname in REQUIRED_FIELDS:
+            if row.get(fieldname) in (None, ""):
+                row_errors.append(_("{0} is required").format(frappe.unscrub(fieldname)))
+
+        for fieldname, doctype in LINK_FIELDS.items():
+            if row.get(fieldname) and row[fieldname] in missing_links[fieldname]:
+                row_errors.append(_("{0} {1} does not exist").format(_(doctype), row[fieldname]))
+
+        for fieldname in NUMERIC_FIELDS:
+            if row.get(fieldname) not in (None, "") and not is_number(row[fieldname]):
+                row_errors.append(_("{0} must be a number").format(frappe.unscrub(fieldname)))
+
+        try:
+            period_from = getdate(row.period_from) if row.period_from else None
+            period_to = getdate(row.period_to) if row.period_to else None
+        except Exception:
+            period_from = period_to = None
+            row_errors.append(_("Invalid date in Period From or Period To"))
+
+        if period_from and period_to and period_from > period_to:
+            row_errors.append(_("Period From date cannot be after Period To date."))
+
+        if row_errors:
+            errors.append({"row": idx, "errors": row_errors})
+            continue
+
+        if row.company not in precisions:
+            precisions[row.company] = get_amount_precisions(row.company)
+
+        retention_percentage = flt(row.retention_percentage) \
+            if row.get("retention_percentage") not in (None, "") else default_retention
+        retention_amount, net_amount = calculate_ipc_amounts(
+            row.total_work_done,
+            retention_percentage,
+            row.advance_deduction,
+            *precisions[row.company]
+        )
+
+        if submit and net_amount <= 0:
+            errors.append({
+                "row": idx,
+                "errors": [_("Net Amount must be greater than zero to submit the IPC.")]
+            })
+            continue
+
+        prepared.append(frappe._dict({
+            "idx": idx,
+            "customer": row.customer,
+            "project": row.project,
+            "contract": row.get("contract") or None,
+            "company": row.company,
+            "period_from": period_from,
+            "period_to": period_to,
+            "total_work_done": flt(row.total_work_done),
+            "retention_percentage": retention_percentage,
+            "retention_amount": retention_amount,
+            "manual_advance_deduction": cint(row.get("manual_advance_deduction")),
+            "advance_deduction": flt(row.advance_deduction),
+            "net_amount": net_amount,
+            "precisions": precisions[row.company],
+            "precision": precisions[row.company][1]
+        }))
+
+    overlaps = find_row_overlaps(prepared)
+    if overlaps:
+        errors.extend({"row": idx, "errors": [error]} for idx, error in overlaps.items())
+        prepared = [row for row in prepared if row.idx not in overlaps]
+
+    return prepared, errors
+
+
+def is_number(value) -> bool:
+    """Check that an imported value is a number, as flt would otherwise read anything else as 0."""
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+
+    return True
+
+
+def get_missing_links(rows: list) -> dict:
+    """Find linked values that do not exist, with one query per linked DocType."""
+    missing_links = {}
+
+    for fieldname, doctype in LINK_FIELDS.items():
+        values = {row.get(fieldname) for row in rows if row.get(fieldname)}
+        existing = set(frappe.get_all(doctype, filters={"name": ["in", list(values)]}, pluck="name")) \
+            if values else set()
+        missing_links[fieldname] = values - existing
+
+    return missing_links
+
+
+def insert_chunk(chunk: list, submit: bool, workflow_active: bool) -> list:
+    """
+    Insert prepared rows into tabIPC and update the project totals.
+
+    Rows that would exceed their contract's value are left out and
+    reported; the rest of the chunk is still inserted.
+
+    Returns:
+        Tuple of (names of the inserted IPCs, errors of the rows left out)
+    """
+    chunk, errors = set_cumulative_amounts(chunk, submit)
+    if not chunk:
+        return [], errors
+
+    reserve_names(chunk)
+    timestamp = now_datetime()
+    user = frappe.session.user
+
+    docstatus = 1 if submit else 0
+    status = "Approved" if submit else "Draft"
+    workflow_state = status if workflow_active else None
+
+    values = [
+        (
+            row.name, timestamp, timestamp, user, user, docstatus,
+            row.ipc_number, row.customer, row.project, row.contract, row.company, status,
+            workflow_state, row.period_from, row.period_to, row.total_work_done,
+            row.retention_percentage, row.retention_amount, row.manual_advance_deduction,
+            row.advance_deduction, row.net_amount,
+            row.previous_certified, row.certified_to_date
+        )
+        for row in chunk
+    ]
+
+    frappe.db.bulk_insert("IPC", INSERT_FIELDS, values)
+    clear_summary_cache(chunk)
+
+    if submit:
+        update_ledgers(chunk)
+
+    return [row.name for row in chunk], errors
+
+
+def update_ledgers(chunk: list) -> None:
+    """
+    Apply submitted rows to the running totals and balances.
+
+    Does what `IPC.update_ledgers` does for one IPC, with one relative
+    update per project, contract, month and retention balance of the
+    chunk, so the cost of a chunk does not grow with the history of its
+    projects.
+    """
+    project_totals, contract_balances, rollups, retention = {}, {}, {}, {}
+
+    for row in chunk:
+        add_amounts(project_totals, (row.project, row.company), {
+            **{field: row[ipc_field] for field, ipc_field in PROJECT_TOTAL_FIELDS.items()},
+            "ipc_count": 1
+        })
+        add_amounts(rollups, (row.company, row.project, get_first_day(row.period_from)), {
+            **{field: row[ipc_field] for field, ipc_field in ROLLUP_TOTAL_FIELDS.items()},
+            "ipc_count": 1
+        })
+        add_amounts(retention, (row.project, row.customer, row.company), {"amount": row.retention_amount})
+
+        if row.contract:
+            add_amounts(contract_balances, (row.contract, row.company), {
+                "total_work_done": row.total_work_done,
+                "advance_deduction": row.advance_deduction,
+                "ipc_count": 1
+            })
+
+    for (project, company), values in project_totals.items():
+        add_to_project_totals(project, company, values)
+
+    for (contract, company), values in contract_balances.items():
+        add_to_contract_balance(contract, company, **values)
+
+    for (company, project, month), values in rollups.items():
+        add_to_rollup(company, project, month, values)
+
+    insert_ipc_retention_entries(chunk)
+    for (project, customer, company), values in retention.items():
+        if flt(values["amount"]):
+            update_retention_balance(project, customer, company, values["amount"])
+
+
+def add_amounts(totals: dict, key: tuple, values: dict) -> None:
+    """Add values to the totals kept under a key."""
+    totals.setdefault(key, dict.fromkeys(values, 0))
+    for field, value in values.items():
+        totals[key][field] += value
+
+
+def set_cumulative_amounts(chunk: list, submit: bool) -> tuple:
+    """
+    Set previously certified and to-date work done on prepared rows, and
+    the advance deduction of rows on contracts with an advance.
+
+    Each contract or project balance is read once per chunk. When the
+    rows are submitted, they are chained in file order, each one counting
+    the rows before it. A row that would certify more than its contract's
+    value, or recover more than its outstanding advance, is rejected and
+    does not count towards the rows after it.
+
+    Returns:
+        Tuple of (accepted rows, errors of the rejected rows)
+    """
+    balances = {}
+    contract_balances = {}
+    accepted, errors = [], []
+
+    for row in chunk:
+        keys = get_balance_keys(row.contract, row.project)
+
+        for key in keys:
+            if key in balances:
+                continue
+
+            if key[0] == "contract":
+                contract_balances[key[1]] = get_contract_balance(key[1], for_update=submit)
+                balances[key] = flt(contract_balances[key[1]].certified_to_date)
+            else:
+                balances[key] = get_certified_to_date(None, key[1], for_update=submit)
+
+        contract_balance = contract_balances.get(row.contract)
+        row_errors = set_advance_deduction(row, contract_balance, submit) if contract_balance else []
+
+        row.previous_certified = balances[keys[0]]
+        row.certified_to_date = flt(row.previous_certified + row.total_work_done, row.precision)
+
+        contract_value = flt(contract_balance.contract_value) if contract_balance else 0
+        if submit and contract_value and row.certified_to_date > contract_value:
+            row_errors.append(
+                _("Certified work of {0} on Contract {1} would exceed its value of {2}.").format(
+                    row.certified_to_date, row.contract, contract_value
+                )
+            )
+
+        if row_errors:
+            errors.append({"row": row.idx, "errors": row_errors})
+            continue
+
+        if submit:
+            for key in keys:
+                balances[key] = flt(balances[key] + row.total_work_done, row.precision)
+
+            if contract_balance:
+                contract_balance.advance_recovered = flt(
+                    flt(contract_balance.advance_recovered) + row.advance_deduction, row.precision
+                )
+
+        accepted.append(row)
+
+    return accepted, errors
+
+
+def set_advance_deduction(row, balance, submit: bool) -> list:
+    """
+    Propose a row's advance deduction from its contract's recovery terms
+    and check it against the advance outstanding, as
+    `IPC.set_advance_deduction` does, then recalculate the row's amounts.
+
+    Args:
+        row: Prepared row
+        balance: Contract balance of the row, with the rows before it recovered
+        submit: The row is imported as submitted
+
+    Returns:
+        List of the row's errors
+    """
+    if not flt(balance.total_advance):
+        return []
+
+    # Advance deductions are currency amounts, rounded like the net amount
+    currency_precision = row.precisions[1]
+    if not row.manual_advance_deduction:
+        row.advance_deduction = propose_advance_deduction(row.total_work_done, balance, currency_precision)
+
+    outstanding = get_advance_outstanding(balance)
+    if row.advance_deduction > outstanding:
+        return [
+            _("Advance Deduction ({0}) cannot exceed the advance outstanding on Contract {1} ({2}).").format(
+                row.advance_deduction, row.contract, outstanding
+            )
+        ]
+
+    row.retention_amount, row.net_amount = calculate_ipc_amounts(
+        row.total_work_done, row.retention_percentage, row.advance_deduction, *row.precisions
+    )
+    if submit and row.net_amount <= 0:
+        return [_("Net Amount must be greater than zero to submit the IPC.")]
+
+    return []
+
+
+def reserve_names(chunk: list) -> None:
+    """
+    Number and name prepared rows in file order within their project.
+
+    Reserves each project's block of numbers with one counter update per
+    chunk instead of one per IPC.
+    """
+    counts = {}
+    for row in chunk:
+        counts[row.project] = counts.get(row.project, 0) + 1
+
+    next_numbers = {project: reserve_ipc_numbers(project, count) for project, count in counts.items()}
+
+    for row in chunk:
+        row.ipc_number = next_numbers[row.project]
+        row.name = get_ipc_name(row.project, row.ipc_number)
+        next_numbers[row.project] += 1
@@ -0,0 +1,11 @@
+"""
+Add composite indexes to tabIPC on existing sites.
+
+New sites get them from `on_doctype_update` when the IPC doctype is synced.
+"""
+
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import on_doctype_update
+
+
+def execute():
+    on_doctype_update()
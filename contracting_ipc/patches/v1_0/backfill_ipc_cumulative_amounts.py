@@ -0,0 +1,53 @@
+"""
+Backfill the running balances and the cumulative fields of submitted IPCs.
+
+Rebuilds the contract balances and the IPC Project Totals ledger that new
+IPCs read, then sweeps the submitted IPCs once in period order, carrying
+each balance forward the same way submission does (`get_balance_keys`).
+"""
+
+import frappe
+from frappe.utils import flt
+
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import get_balance_keys
+from contracting_ipc.contracting_ipc.doctype.ipc_contract_balance.ipc_contract_balance import (
+    rebuild_contract_balances,
+)
+from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+    rebuild_project_totals,
+)
+
+
+def execute():
+    rebuild_contract_balances()
+    rebuild_project_totals()
+
+    ipcs = frappe.db.sql(
+        """
+        SELECT
+            name, contract, project, total_work_done
+        FROM
+            `tabIPC`
+        WHERE
+            docstatus = 1
+        ORDER BY
+            period_from, creation
+        """,
+        as_dict=1
+    )
+
+    running_totals = {}
+    updates = {}
+    for ipc in ipcs:
+        keys = get_balance_keys(ipc.contract, ipc.project)
+        previous_certified = running_totals.get(keys[0], 0)
+
+        for key in keys:
+            running_totals[key] = flt(running_totals.get(key, 0)) + flt(ipc.total_work_done)
+
+        updates[ipc.name] = {
+            "previous_certified": previous_certified,
+            "certified_to_date": flt(previous_certified) + flt(ipc.total_work_done)
+        }
+
+    frappe.db.bulk_update("IPC", updates, chunk_size=500, update_modified=False)
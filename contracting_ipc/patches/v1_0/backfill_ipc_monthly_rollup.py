@@ -0,0 +1,11 @@
+"""
+Build the monthly rollup from already submitted IPCs.
+"""
+
+from contracting_ipc.contracting_ipc.doctype.ipc_monthly_rollup.ipc_monthly_rollup import (
+    rebuild_monthly_rollup,
+)
+
+
+def execute():
+    rebuild_monthly_rollup()
@@ -0,0 +1,11 @@
+"""
+Fill the IPC Project Totals ledger from already submitted IPCs.
+"""
+
+from contracting_ipc.contracting_ipc.doctype.ipc_project_totals.ipc_project_totals import (
+    rebuild_project_totals,
+)
+
+
+def execute():
+    rebuild_project_totals()
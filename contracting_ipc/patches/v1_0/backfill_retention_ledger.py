@@ -0,0 +1,11 @@
+"""
+Post the retention held by already submitted IPCs to the retention ledger.
+"""
+
+from contracting_ipc.contracting_ipc.doctype.ipc_retention_ledger_entry.ipc_retention_ledger_entry import (
+    rebuild_retention_ledger,
+)
+
+
+def execute():
+    rebuild_retention_ledger()
@@ -0,0 +1,37 @@
+"""
+Number the existing IPCs within their projects and start each project's
+IPC counter after them.
+
+Existing IPCs keep their naming series names. Amendments share the
+number of the IPC they amend.
+"""
+
+import frappe
+
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import reserve_ipc_numbers
+
+
+def execute():
+    numbers, counts = {}, {}
+
+    for ipc in frappe.get_all(
+        "IPC",
+        filters={"ipc_number": 0},
+        fields=["name", "project", "amended_from"],
+        order_by="creation asc"
+    ):
+        if ipc.amended_from in numbers:
+            numbers[ipc.name] = numbers[ipc.amended_from]
+        else:
+            counts[ipc.project] = counts.get(ipc.project, 0) + 1
+            numbers[ipc.name] = counts[ipc.project]
+
+    frappe.db.bulk_update(
+        "IPC",
+        {name: {"ipc_number": number} for name, number in numbers.items()},
+        chunk_size=500,
+        update_modified=False
+    )
+
+    for project, count in counts.items():
+        reserve_ipc_numbers(project, count)
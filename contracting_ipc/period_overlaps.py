@@ -0,0 +1,250 @@
+"""
+Overlapping period detection for Contracting IPC.
+
+Two IPCs must not certify overlapping periods in the same scope: the
+contract when the IPC has one, otherwise the project (among the IPCs
+without a contract). Draft and submitted IPCs count; cancelled ones don't.
+
+Periods in a scope are kept disjoint, so sorted by period_from they are
+also sorted by period_to. A new period then overlaps an existing one
+exactly when it overlaps the latest period starting on or before its end,
+which a single descending index lookup finds. Overlaps that predate the
+check are found by `audit_period_overlaps` in one sorted sweep.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import getdate
+
+
+def get_period_scope(contract: str = None, project: str = None) -> tuple:
+    """Get the ("contract", name) or ("project", name) scope an IPC's period must be unique in."""
+    return ("contract", contract) if contract else ("project", project)
+
+
+def get_overlapping_ipc(contract: str, project: str, period_from, period_to,
+                        exclude: str = None) -> frappe._dict:
+    """
+    Find a draft or submitted IPC whose period overlaps the given one.
+
+    Args:
+        contract: Contract of the IPC
+        project: Project of the IPC, used when there is no contract
+        period_from: Start of the period
+        period_to: End of the period
+        exclude: Name of the IPC being validated
+
+    Returns:
+        The overlapping IPC's name, period_from and period_to, or None
+    """
+    scope, value = get_period_scope(contract, project)
+    if not value:
+        return None
+
+    conditions = "contract = %(value)s" if scope == "contract" \
+        else "project = %(value)s AND COALESCE(contract, '') = ''"
+
+    # Served by the <scope>_period_index indexes: one step back from period_to
+    latest = frappe.db.sql(
+        f"""
+        SELECT
+            name, period_from, period_to
+        FROM
+            `tabIPC`
+        WHERE
+            {conditions}
+            AND docstatus < 2
+            AND name != %(exclude)s
+            AND period_from <= %(period_to)s
+        ORDER BY
+            period_from DESC
+        LIMIT 1
+        """,
+        {"value": value, "exclude": exclude or "", "period_to": period_to},
+        as_dict=1
+    )
+
+    if latest and getdate(latest[0].period_to) >= getdate(period_from):
+        return latest[0]
+
+
+def validate_period_overlap(ipc):
+    """
+    Throw if an IPC's period overlaps another draft or submitted IPC in its scope.
+
+    Args:
+        ipc: IPC document
+    """
+    if not (ipc.period_from and ipc.period_to):
+        return
+
+    overlap = get_overlapping_ipc(
+        ipc.contract, ipc.project, ipc.period_from, ipc.period_to, exclude=ipc.name
+    )
+    if overlap:
+        scope, value = get_period_scope(ipc.contract, ipc.project)
+        frappe.throw(
+            _("The period {0} to {1} overlaps IPC {2} ({3} to {4}) on {5} {6}.").format(
+                frappe.format_value(ipc.period_from, {"fieldtype": "Date"}),
+                frappe.format_value(ipc.period_to, {"fieldtype": "Date"}),
+                frappe.utils.get_link_to_form("IPC", overlap.name),
+                frappe.format_value(overlap.period_from, {"fieldtype": "Date"}),
+                frappe.format_value(overlap.period_to, {"fieldtype": "Date"}),
+                _(scope.title()),
+                value
+            ),
+            title=_("Overlapping Period")
+        )
+
+
+def sweep_overlaps(rows):
+    """
+    Find overlapping periods in one pass over rows sorted by scope, then period_from.
+
+    Each row is compared with the row reaching furthest among the earlier
+    rows of its scope, so every row that overlaps an earlier one is
+    reported once, paired with the earlier row it overlaps.
+
+    Args:
+        rows: Iterable of dicts with scope, period_from and period_to
+
+    Yields:
+        Tuples of (row, earlier overlapping row)
+    """
+    scope = latest = None
+
+    for row in rows:
+        if row.scope != scope:
+            scope, latest = row.scope, row
+            continue
+
+        if getdate(row.period_from) <= getdate(latest.period_to):
+            yield row, latest
+
+        if getdate(row.period_to) > getdate(latest.period_to):
+            latest = row
+
+
+def find_row_overlaps(rows: list) -> dict:
+    """
+    Find rows of an import whose period overlaps another row or an existing IPC.
+
+    Existing IPCs are read with one query per scope type, limited to the
+    scopes and date window of the rows, and merged into the sweep.
+
+    Args:
+        rows: Prepared import rows with idx, contract, project, period_from and period_to
+
+    Returns:
+        Dictionary of row idx -> error message
+    """
+    if not rows:
+        return {}
+
+    intervals = []
+    for row in rows:
+        intervals.append(frappe._dict(
+            scope=get_period_scope(row.contract, row.project), period_from=row.period_from,
+            period_to=row.period_to, idx=row.idx, label=_("row {0}").format(row.idx)
+        ))
+
+    window = {
+        "period_from": min(row.period_from for row in rows),
+        "period_to": max(row.period_to for row in rows)
+    }
+    for scope in ("contract", "project"):
+        values = list({interval.scope[1] for interval in intervals if interval.scope[0] == scope})
+        if values:
+            intervals.extend(
+                frappe._dict(
+                    scope=(scope, ipc.value), period_from=ipc.period_from, period_to=ipc.period_to,
+                    idx=None, label=_("IPC {0}").format(ipc.name)
+                )
+                for ipc in get_ipcs_in_window(scope, values, window)
+            )
+
+    # Existing IPCs sort before rows starting on the same day, so a row is
+    # reported against them rather than the other way round
+    intervals.sort(key=lambda interval: (
+        interval.scope, getdate(interval.period_from), interval.idx is not None, interval.idx or 0
+    ))
+
+    errors = {}
+    for row, earlier in sweep_overlaps(intervals):
+        if row.idx is not None:
+            errors.setdefault(row.idx, _("Period overlaps {0}").format(earlier.label))
+        elif earlier.idx is not None:
+            errors.setdefault(earlier.idx, _("Period overlaps {0}").format(row.label))
+
+    return errors
+
+
+def get_ipcs_in_window(scope: str, values: list, window: dict) -> list:
+    """Get the draft and submitted IPCs of the given contracts or projects overlapping a date window."""
+    conditions = "contract IN %(values)s" if scope == "contract" \
+        else "project IN %(values)s AND COALESCE(contract, '') = ''"
+
+    return frappe.db.sql(
+        f"""
+        SELECT
+            name, {scope} as value, period_from, period_to
+        FROM
+            `tabIPC`
+        WHERE
+            {conditions}
+            AND docstatus < 2
+            AND period_from <= %(period_to)s
+            AND period_to >= %(period_from)s
+        """,
+        {"values": tuple(values), **window},
+        as_dict=1
+    )
+
+
+def audit_period_overlaps() -> list:
+    """
+    Find every pair of overlapping draft or submitted IPCs.
+
+    Reads tabIPC once, sorted by scope and period_from, through an
+    unbuffered cursor, so memory use does not grow with the table.
+
+    Returns:
+        List of {"scope", "value", "ipc", "period_from", "period_to",
+        "overlaps", "overlaps_period_from", "overlaps_period_to"} dictionaries
+    """
+    overlaps = []
+
+    with frappe.db.unbuffered_cursor():
+        rows = frappe.db.sql(
+            """
+            SELECT
+                name, contract, project, period_from, period_to
+            FROM
+                `tabIPC`
+            WHERE
+                docstatus < 2
+            ORDER BY
+                CASE WHEN COALESCE(contract, '') = '' THEN 1 ELSE 0 END,
+                COALESCE(NULLIF(contract, ''), project),
+                period_from,
+                name
+            """,
+            as_dict=1,
+            as_iterator=True
+        )
+
+        for row, earlier in sweep_overlaps(
+            frappe._dict(row, scope=get_period_scope(row.contract, row.project)) for row in rows
+        ):
+            overlaps.append({
+                "scope": row.scope[0],
+                "value": row.scope[1],
+                "ipc": row.name,
+                "period_from": row.period_from,
+                "period_to": row.period_to,
+                "overlaps": earlier.name,
+                "overlaps_period_from": earlier.period_from,
+                "overlaps_period_to": earlier.period_to
+            })
+
+    return overlaps
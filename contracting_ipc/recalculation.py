@@ -0,0 +1,152 @@
+"""
+Mass recalculation of IPC amounts for Contracting IPC.
+
+Applies a renegotiated retention percentage to every draft IPC in a scope
+(contract, project and/or company) and refreshes their retention and net
+amounts with batched writes, instead of re-saving each IPC.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+
+from contracting_ipc.contracting_ipc.doctype.ipc.ipc import (
+    calculate_ipc_amounts,
+    get_amount_precisions,
+)
+from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import clear_summary_cache
+
+# Number of IPCs written per UPDATE statement
+RECALCULATION_CHUNK_SIZE = 500
+
+
+@frappe.whitelist()
+def recalculate_retention(retention_percentage, contract: str = None, project: str = None,
+                          company: str = None, dry_run: int = 1) -> dict:
+    """
+    Apply a new retention percentage to the draft IPCs in a scope that the
+    user can read.
+
+    Args:
+        retention_percentage: New retention percentage, from 0 to 100
+        contract: Optional contract scope
+        project: Optional project scope
+        company: Optional company scope
+        dry_run: Only report the resulting deltas, without writing them
+
+    Returns:
+        Dictionary with the number of affected IPCs, total deltas and per-IPC deltas
+    """
+    frappe.has_permission("IPC", "write", throw=True)
+
+    if not (contract or project or company):
+        frappe.throw(_("Please select a Contract, Project or Company to recalculate."))
+
+    retention_percentage = flt(retention_percentage)
+    if not 0 <= retention_percentage <= 100:
+        frappe.throw(
+            _("Retention Percentage must be between 0 and 100."), title=_("Invalid Retention Percentage")
+        )
+
+    scope = {"contract": contract, "project": project, "company": company}
+    changes = get_retention_changes(retention_percentage, scope)
+
+    if not cint(dry_run):
+        if len(changes["ipcs"]) > RECALCULATION_CHUNK_SIZE:
+            frappe.enqueue(
+                "contracting_ipc.recalculation.apply_retention_changes",
+                queue="long",
+                timeout=3600,
+                retention_percentage=retention_percentage,
+                scope=scope
+            )
+            frappe.msgprint(_("Recalculation of {0} IPCs has been queued.").format(
+                len(changes["ipcs"])), alert=True)
+        else:
+            write_retention_changes(changes["ipcs"], retention_percentage)
+
+    return changes
+
+
+def apply_retention_changes(retention_percentage: float, scope: dict) -> dict:
+    """Recalculate and write the draft IPCs of a scope; run as a background job."""
+    changes = get_retention_changes(retention_percentage, scope)
+    write_retention_changes(changes["ipcs"], retention_percentage)
+
+    frappe.publish_realtime(
+        "ipc_recalculation_complete",
+        {"count": changes["count"]},
+        user=frappe.session.user,
+        after_commit=True
+    )
+
+    return changes
+
+
+def get_retention_changes(retention_percentage: float, scope: dict) -> dict:
+    """
+    Calculate new amounts for the draft IPCs in a scope that the user can
+    read, from a single query.
+
+    Amounts use `calculate_ipc_amounts` with each company's precisions,
+    matching `IPC.calculate_amounts`.
+    """
+    filters = {"docstatus": 0}
+    filters.update({field: value for field, value in scope.items() if value})
+
+    ipcs = frappe.get_list(
+        "IPC",
+        filters=filters,
+        fields=["name", "company", "customer", "project", "total_work_done",
+                "advance_deduction", "retention_amount", "net_amount"],
+        order_by="name",
+        limit_page_length=0
+    )
+
+    precisions = {}
+    changes = []
+    for ipc in ipcs:
+        if ipc.company not in precisions:
+            precisions[ipc.company] = get_amount_precisions(ipc.company)
+
+        retention_amount, net_amount = calculate_ipc_amounts(
+            ipc.total_work_done,
+            retention_percentage,
+            ipc.advance_deduction,
+            *precisions[ipc.company]
+        )
+
+        changes.append({
+            "name": ipc.name,
+            "company": ipc.company,
+            "customer": ipc.customer,
+            "project": ipc.project,
+            "retention_amount": retention_amount,
+            "net_amount": net_amount,
+            "retention_delta": flt(retention_amount - flt(ipc.retention_amount), precisions[ipc.company][0]),
+            "net_delta": flt(net_amount - flt(ipc.net_amount), precisions[ipc.company][1])
+        })
+
+    return {
+        "count": len(changes),
+        "retention_delta": sum(change["retention_delta"] for change in changes),
+        "net_delta": sum(change["net_delta"] for change in changes),
+        "ipcs": changes
+    }
+
+
+def write_retention_changes(changes: list, retention_percentage: float) -> None:
+    """Write recalculated amounts with one UPDATE per chunk."""
+    frappe.db.bulk_update(
+        "IPC",
+        {
+            change["name"]: {
+                "retention_percentage": retention_percentage,
+                "retention_amount": change["retention_amount"],
+                "net_amount": change["net_amount"]
+            }
+            for change in changes
+        },
+        chunk_size=RECALCULATION_CHUNK_SIZE
+    )
+    clear_summary_cache(changes)
@@ -0,0 +1,108 @@
+"""
+Test cases for the Contracting IPC API.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from contracting_ipc.api import get_pending_ipcs, get_pending_ipcs_page
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+
+TEST_PROJECT = "_Test Pending Project"
+
+
+class TestPendingIPCs(FrappeTestCase):
+    """Test pagination, projection and summary of get_pending_ipcs_page."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create approved IPCs for a project of their own."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+        if not frappe.db.exists("Project", TEST_PROJECT):
+            frappe.get_doc({
+                "doctype": "Project",
+                "project_name": TEST_PROJECT,
+                "company": "_Test Company"
+            }).insert(ignore_permissions=True)
+
+        cls.ipcs = []
+        for idx in range(5):
+            cls.ipcs.append(test_ipc.TestIPC.make_ipc(
+                submit=True, project=TEST_PROJECT, total_work_done=10000 * (idx + 1)
+            ))
+
+    def get_all_pages(self, **kwargs):
+        """Follow the cursors of get_pending_ipcs_page to the last page."""
+        rows = []
+        result = get_pending_ipcs_page(project=TEST_PROJECT, **kwargs)
+        rows.extend(result["data"])
+
+        while result["next_cursor"]:
+            result = get_pending_ipcs_page(project=TEST_PROJECT, cursor=result["next_cursor"], **kwargs)
+            self.assertNotIn("summary", result)
+            rows.extend(result["data"])
+
+        return rows
+
+    def test_pages_cover_every_ipc_once(self):
+        """Test that pages follow each other without gaps or repeats."""
+        rows = self.get_all_pages(page_length=2)
+
+        self.assertEqual([row.name for row in rows], [ipc.name for ipc in reversed(self.ipcs)])
+
+    def test_sort_keys(self):
+        """Test ascending and descending sort keys."""
+        rows = self.get_all_pages(page_length=2, order_by="net_amount asc")
+        self.assertEqual([row.name for row in rows], [ipc.name for ipc in self.ipcs])
+
+        rows = self.get_all_pages(page_length=3, order_by="period_to desc")
+        self.assertEqual([row.name for row in rows], [ipc.name for ipc in reversed(self.ipcs)])
+
+    def test_projection(self):
+        """Test that only the requested fields, name and the sort field are returned."""
+        result = get_pending_ipcs_page(project=TEST_PROJECT, fields=["net_amount"], page_length=1)
+
+        self.assertEqual(set(result["data"][0]), {"net_amount", "creation", "name"})
+
+        self.assertRaises(
+            frappe.ValidationError, get_pending_ipcs_page, project=TEST_PROJECT, fields=["`tabUser`.password"]
+        )
+        self.assertRaises(frappe.ValidationError, get_pending_ipcs_page, order_by="customer desc")
+
+    def test_summary(self):
+        """Test that the summary covers the whole backlog, not just the page."""
+        result = get_pending_ipcs_page(project=TEST_PROJECT, page_length=1)
+
+        self.assertEqual(len(result["data"]), 1)
+        self.assertEqual(result["summary"]["count"], 5)
+        self.assertEqual(
+            flt(result["summary"]["net_amount"], 2), flt(sum(ipc.net_amount for ipc in self.ipcs), 2)
+        )
+
+        result = get_pending_ipcs_page(project=TEST_PROJECT, page_length=1, with_summary=0)
+        self.assertNotIn("summary", result)
+
+    def test_cursor_of_another_order(self):
+        """Test that a cursor is rejected under a different sort order."""
+        cursor = get_pending_ipcs_page(project=TEST_PROJECT, page_length=1)["next_cursor"]
+
+        self.assertRaises(
+            frappe.ValidationError,
+            get_pending_ipcs_page,
+            project=TEST_PROJECT,
+            cursor=cursor,
+            order_by="net_amount asc"
+        )
+
+    def test_unpaged_list(self):
+        """Test that get_pending_ipcs still returns every pending IPC as a plain list."""
+        rows = get_pending_ipcs(project=TEST_PROJECT)
+
+        self.assertIsInstance(rows, list)
+        self.assertEqual([row.name for row in rows], [ipc.name for ipc in reversed(self.ipcs)])
+        self.assertEqual(
+            set(rows[0]), {"name", "customer", "project", "net_amount", "period_from", "period_to"}
+        )
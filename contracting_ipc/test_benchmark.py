@@ -0,0 +1,55 @@
+"""
+Test cases for the IPC benchmark suite.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from contracting_ipc.benchmark import compare_with_baseline, run_case
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+
+
+def make_results(median_ms, sql_count):
+    return {"results": {"case": {"median_ms": median_ms, "sql_count": sql_count}}}
+
+
+class TestBenchmark(FrappeTestCase):
+    """Test cases for benchmark measurement and baseline comparison."""
+
+    def test_compare_flags_slower_cases(self):
+        """Test that only slowdowns beyond the tolerance and noise floor are regressions."""
+        baseline = make_results(100, 10)
+
+        self.assertEqual(compare_with_baseline(make_results(120, 10), baseline, 0.25), [])
+        self.assertEqual(
+            compare_with_baseline(make_results(130, 10), baseline, 0.25)[0]["metric"], "median_ms"
+        )
+        self.assertEqual(compare_with_baseline(make_results(1.5, 0), make_results(1, 0), 0.25), [])
+
+    def test_compare_flags_extra_queries(self):
+        """Test that any additional SQL statement is a regression."""
+        regressions = compare_with_baseline(make_results(100, 11), make_results(100, 10))
+
+        self.assertEqual(
+            regressions, [{"case": "case", "metric": "sql_count", "baseline": 10, "current": 11}]
+        )
+
+    def test_run_case_measures_and_rolls_back(self):
+        """Test that a case is timed per iteration and only its own writes are undone."""
+        test_ipc.TestIPC.create_test_data()
+        count = frappe.db.count("IPC")
+
+        # Written by the caller before the benchmark, in the same transaction
+        todo = frappe.get_doc({"doctype": "ToDo", "description": "Benchmark caller"}).insert()
+
+        def insert(state):
+            # The same period every time, which only passes if the previous iteration was rolled back
+            test_ipc.TestIPC.make_ipc(period_from="2040-01-01", period_to="2040-01-31")
+
+        result = run_case(frappe._dict(run=insert, rollback=True), iterations=3)
+
+        self.assertEqual(result["iterations"], 3)
+        self.assertGreater(result["sql_count"], 0)
+        self.assertLessEqual(result["min_ms"], result["median_ms"])
+        self.assertEqual(frappe.db.count("IPC"), count)
+        self.assertTrue(frappe.db.exists("ToDo", todo.name))
@@ -0,0 +1,187 @@
+"""
+Test cases for background bulk printing of IPCs.
+"""
+
+import io
+import zipfile
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from contracting_ipc import bulk_print
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+
+
+def make_pdf() -> bytes:
+    """Get a one page PDF."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def run_now(method, **kwargs):
+    """Run an enqueued method in the test instead of a worker."""
+    for key in ("queue", "timeout", "now", "enqueue_after_commit", "job_id"):
+        kwargs.pop(key, None)
+    return frappe.get_attr(method)(**kwargs)
+
+
+def get_ready_message(publish_realtime):
+    """Get the message of the `ipc_bulk_print_ready` event from a patched publish_realtime."""
+    return next(
+        call.args[1] for call in publish_realtime.call_args_list if call.args[0] == "ipc_bulk_print_ready"
+    )
+
+
+class TestBulkPrint(FrappeTestCase):
+    """Test the render cache and the fan-out and merge of bulk print jobs."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+    def test_render_cache(self):
+        """Test that an IPC is rendered again only after it changes."""
+        ipc = test_ipc.TestIPC.make_ipc()
+        print_format_modified = bulk_print.get_print_format_modified("IPC Standard")
+
+        def render():
+            return bulk_print.get_rendered_pdf(ipc.name, ipc.modified, "IPC Standard", print_format_modified)
+
+        with patch("frappe.get_print", return_value=make_pdf()) as get_print:
+            path = render()
+            self.assertEqual(render(), path)
+            self.assertEqual(get_print.call_count, 1)
+
+            ipc.submit()
+            self.assertNotEqual(render(), path)
+            self.assertEqual(get_print.call_count, 2)
+
+    def test_render_cache_is_per_user(self):
+        """Test that a PDF rendered for one user is not reused for another."""
+        ipc = test_ipc.TestIPC.make_ipc()
+        print_format_modified = bulk_print.get_print_format_modified("IPC Standard")
+        args = (ipc.name, ipc.modified, "IPC Standard", print_format_modified)
+
+        path = bulk_print.get_render_cache_path(*args)
+        frappe.set_user("Guest")
+        try:
+            self.assertNotEqual(bulk_print.get_render_cache_path(*args), path)
+        finally:
+            frappe.set_user("Administrator")
+
+    def test_bulk_print_merges_batches(self):
+        """Test that the batches of a job are merged into one PDF in order, skipping failures."""
+        from pypdf import PdfReader
+
+        ipcs = [test_ipc.TestIPC.make_ipc() for _i in range(5)]
+        broken = ipcs[2].name
+
+        def get_print(doctype, name, *args, **kwargs):
+            if name == broken:
+                raise frappe.ValidationError("Broken template")
+            return make_pdf()
+
+        with patch.object(bulk_print, "BULK_PRINT_BATCH_SIZE", 2), \
+                patch("frappe.enqueue", side_effect=run_now), \
+                patch("frappe.get_print", side_effect=get_print), \
+                patch("frappe.publish_realtime") as publish_realtime:
+            job = bulk_print.enqueue_bulk_print(names=[ipc.name for ipc in ipcs])
+
+        self.assertEqual(job["count"], 5)
+
+        ready = get_ready_message(publish_realtime)
+        self.assertEqual(ready["count"], 4)
+        self.assertEqual([failure["ipc"] for failure in ready["failed"]], [broken])
+
+        file_doc = frappe.get_doc("File", {"file_url": ready["file_url"]})
+        self.assertEqual(len(PdfReader(file_doc.get_full_path()).pages), 4)
+        self.assertIsNone(frappe.cache.get_value(bulk_print.BULK_PRINT_KEY_PREFIX + job["job_id"]))
+
+    def test_killed_batch_is_merged_by_stalled_job_check(self):
+        """Test that a job whose batch was killed is merged by the check for stalled jobs."""
+        ipcs = [test_ipc.TestIPC.make_ipc() for _i in range(4)]
+
+        def enqueue(method, **kwargs):
+            # The first batch is killed before it counts itself as done
+            if kwargs.get("job_id", "").endswith("|0"):
+                return
+            return run_now(method, **kwargs)
+
+        with patch.object(bulk_print, "BULK_PRINT_BATCH_SIZE", 2), \
+                patch("frappe.enqueue", side_effect=enqueue) as patched_enqueue, \
+                patch("frappe.get_print", return_value=make_pdf()), \
+                patch("frappe.publish_realtime") as publish_realtime:
+            job = bulk_print.enqueue_bulk_print(names=[ipc.name for ipc in ipcs])
+            self.assertFalse(publish_realtime.called)
+
+            with patch("frappe.utils.background_jobs.is_job_enqueued", return_value=True):
+                self.assertEqual(bulk_print.finish_stalled_bulk_prints(), 0)
+
+            with patch("frappe.utils.background_jobs.is_job_enqueued", return_value=False):
+                self.assertEqual(bulk_print.finish_stalled_bulk_prints(), 1)
+
+            # Merged once
+            self.assertEqual(bulk_print.finish_stalled_bulk_prints(), 0)
+            self.assertEqual(patched_enqueue.call_count, 3)
+
+        self.assertEqual(get_ready_message(publish_realtime)["count"], 4)
+        self.assertIsNone(frappe.cache.get_value(bulk_print.BULK_PRINT_KEY_PREFIX + job["job_id"]))
+
+    def test_bulk_print_zip(self):
+        """Test that a ZIP holds a PDF per IPC, named after it."""
+        ipcs = [test_ipc.TestIPC.make_ipc() for _i in range(3)]
+
+        with patch("frappe.enqueue", side_effect=run_now), \
+                patch("frappe.get_print", return_value=make_pdf()), \
+                patch("frappe.publish_realtime") as publish_realtime:
+            bulk_print.enqueue_bulk_print(names=[ipc.name for ipc in ipcs], file_format="ZIP")
+
+        file_doc = frappe.get_doc("File", {"file_url": get_ready_message(publish_realtime)["file_url"]})
+        with zipfile.ZipFile(file_doc.get_full_path()) as archive:
+            self.assertEqual(archive.namelist(), [f"{ipc.name}.pdf" for ipc in ipcs])
+
+    def test_old_bulk_print_files_are_cleared(self):
+        """Test that bulk print Files are deleted once they are older than the retention days."""
+        from frappe.utils import add_days, today
+
+        with patch("frappe.enqueue", side_effect=run_now), \
+                patch("frappe.get_print", return_value=make_pdf()), \
+                patch("frappe.publish_realtime") as publish_realtime:
+            bulk_print.enqueue_bulk_print(names=[test_ipc.TestIPC.make_ipc().name])
+
+        file_doc = frappe.get_doc("File", {"file_url": get_ready_message(publish_realtime)["file_url"]})
+        self.assertEqual(bulk_print.clear_bulk_print_files(days=7), 0)
+
+        frappe.db.set_value("File", file_doc.name, "creation", add_days(today(), -8), update_modified=False)
+        self.assertEqual(bulk_print.clear_bulk_print_files(days=7), 1)
+        self.assertFalse(frappe.db.exists("File", file_doc.name))
+
+    def test_report_filters_select_report_rows(self):
+        """Test that printing from the report selects the rows the report shows."""
+        from contracting_ipc.contracting_ipc.report.ipc_summary.ipc_summary import get_data
+
+        ipcs = [test_ipc.TestIPC.make_ipc() for _i in range(3)]
+        filters = {
+            "company": "_Test Company",
+            "project": "_Test Project",
+            "from_date": ipcs[1].period_from,
+            "start_to_date": ipcs[1].period_from,
+            "lazy_load": 1
+        }
+
+        names = bulk_print.get_bulk_print_names(filters=filters)
+
+        self.assertEqual(names, [ipcs[1].name])
+        self.assertEqual(set(names), {row.name for row in get_data(frappe._dict(filters))})
+
+    def test_invalid_print_format(self):
+        """Test that a print format of another DocType is rejected."""
+        self.assertRaises(frappe.ValidationError, bulk_print.get_print_format_modified, "Standard")
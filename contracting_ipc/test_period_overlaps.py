@@ -0,0 +1,122 @@
+"""
+Test cases for overlapping IPC period detection.
+"""
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate
+
+from contracting_ipc.contracting_ipc.doctype.ipc import test_ipc
+from contracting_ipc.ipc_import import prepare_rows
+from contracting_ipc.period_overlaps import audit_period_overlaps, sweep_overlaps
+
+
+class TestPeriodOverlaps(FrappeTestCase):
+    """Test that IPC periods of a contract or project cannot overlap."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data."""
+        super().setUpClass()
+        test_ipc.TestIPC.create_test_data()
+
+        cls.contract = frappe.get_doc({
+            "doctype": "Contract",
+            "party_type": "Customer",
+            "party_name": "_Test Customer",
+            "start_date": "2050-01-01",
+            "contract_terms": "_Test Contract Terms"
+        }).insert(ignore_permissions=True).name
+
+    def make_ipc(self, period_from, period_to, **kwargs):
+        """Insert a draft IPC on the test project."""
+        return test_ipc.TestIPC.make_ipc(period_from=period_from, period_to=period_to, **kwargs)
+
+    def test_overlap_rejected(self):
+        """Test that a period overlapping a draft or submitted IPC is rejected."""
+        period_from, period_to = test_ipc.TestIPC.get_test_period(days=60)
+        self.make_ipc(period_from, add_days(period_from, 30)).submit()
+        draft = self.make_ipc(add_days(period_from, 31), period_to)
+
+        for start, end in ((period_from, period_from), (add_days(period_from, 20), add_days(period_from, 40)),
+                           (period_to, period_to), (add_days(period_from, -5), add_days(period_to, 5))):
+            with self.subTest(start=start, end=end):
+                self.assertRaises(frappe.ValidationError, self.make_ipc, start, end)
+
+        # Saving an IPC again does not compare it with itself
+        draft.save()
+
+    def test_adjacent_and_cancelled_periods_allowed(self):
+        """Test that back-to-back periods and periods of cancelled IPCs are free."""
+        period_from, period_to = test_ipc.TestIPC.get_test_period(days=61)
+        first = self.make_ipc(period_from, add_days(period_from, 30))
+        self.make_ipc(add_days(period_from, 31), period_to)
+
+        first.submit()
+        first.cancel()
+        self.make_ipc(period_from, add_days(period_from, 30))
+
+    def test_contract_scope(self):
+        """Test that IPCs of a contract are checked against the contract, not the project."""
+        period_from, period_to = test_ipc.TestIPC.get_test_period()
+        self.make_ipc(period_from, period_to)
+
+        self.make_ipc(period_from, period_to, contract=self.contract)
+        self.assertRaises(
+            frappe.ValidationError, self.make_ipc, period_from, period_to, contract=self.contract
+        )
+
+    def test_sweep(self):
+        """Test that the sweep pairs each overlapping row with the furthest-reaching earlier row."""
+        rows = [
+            frappe._dict(name=name, scope=scope, period_from=getdate(start), period_to=getdate(end))
+            for name, scope, start, end in (
+                ("A", 1, "2050-01-01", "2050-03-31"),
+                ("B", 1, "2050-02-01", "2050-02-10"),
+                ("C", 1, "2050-03-01", "2050-04-30"),
+                ("D", 1, "2050-05-01", "2050-05-31"),
+                ("E", 2, "2050-01-01", "2050-12-31")
+            )
+        ]
+
+        self.assertEqual(
+            [(row.name, earlier.name) for row, earlier in sweep_overlaps(rows)],
+            [("B", "A"), ("C", "A")]
+        )
+
+    def test_audit_finds_existing_overlaps(self):
+        """Test that the audit reports overlaps written before the check existed."""
+        period_from, period_to = test_ipc.TestIPC.get_test_period(days=61)
+        first = self.make_ipc(period_from, add_days(period_from, 30))
+        second = self.make_ipc(add_days(period_from, 31), period_to)
+        frappe.db.set_value("IPC", second.name, "period_from", add_days(period_from, 10))
+
+        overlaps = [(overlap["ipc"], overlap["overlaps"]) for overlap in audit_period_overlaps()]
+        self.assertIn((second.name, first.name), overlaps)
+
+    def test_import_rejects_overlaps(self):
+        """Test that imported rows may not overlap each other or existing IPCs."""
+        period_from, period_to = test_ipc.TestIPC.get_test_period(days=91)
+        self.make_ipc(period_from, add_days(period_from, 30))
+
+        def row(start, end):
+            return {
+                "customer": "_Test Customer",
+                "project": "_Test Project",
+                "company": "_Test Company",
+                "period_from": start,
+                "period_to": end,
+                "total_work_done": 1000
+            }
+
+        prepared, errors = prepare_rows([
+            # Overlaps the existing IPC
+            row(add_days(period_from, 15), add_days(period_from, 45)),
+            row(add_days(period_from, 46), add_days(period_from, 60)),
+            # Overlaps the row above
+            row(add_days(period_from, 55), add_days(period_from, 70)),
+            row(add_days(period_from, 71), period_to)
+        ])
+
+        self.assertEqual([row.idx for row in prepared], [2, 4])
+        self.assertEqual([error["row"] for error in errors], [1, 3])